@@ -0,0 +1,158 @@
+"""
+Batch conversion: manifest and directory parsing, outputs confined to the
+output directory, skip/resume of existing outputs, duplicate-output
+detection and the results JSONL. Piper is replaced by a stub that writes the
+text's bytes as PCM frames.
+
+    pytest tests/test_batch.py
+"""
+import json
+import sys
+import wave
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from text2audio import batch, core  # noqa: E402
+
+
+@pytest.fixture
+def calls(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_piper(text, model, out):
+        calls.append(text)
+        data = text.encode("utf-8")
+        with wave.open(str(out), "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(22050)
+            wf.writeframes(data + b"\0" * (len(data) % 2))
+        return Path(out)
+
+    model = tmp_path / "voice.onnx"
+    model.write_bytes(b"fake")
+    monkeypatch.setattr(core, "resolve_piper_model", lambda m: model)
+    monkeypatch.setattr(core, "tts_piper", fake_piper)
+    return calls
+
+
+def _manifest(tmp_path, *rows):
+    path = tmp_path / "manifest.jsonl"
+    path.write_text("\n".join(r if isinstance(r, str) else json.dumps(r) for r in rows) + "\n", encoding="utf-8")
+    return path
+
+
+def _items(manifest, out_dir, **kw):
+    return list(batch.items_from_manifest(manifest, out_dir, backend="piper", piper_model="voice", **kw))
+
+
+def _run(items, tmp_path, **kw):
+    return batch.run(iter(items), results=tmp_path / "results.jsonl", jobs=2, cache=False, **kw)
+
+
+def _results(tmp_path):
+    lines = (tmp_path / "results.jsonl").read_text(encoding="utf-8").splitlines()
+    return [json.loads(line) for line in lines]
+
+
+def test_manifest_fields_and_defaults(tmp_path):
+    (tmp_path / "docs").mkdir()
+    manifest = _manifest(
+        tmp_path,
+        {"text": "Hello."},
+        "",
+        {"id": "b", "file": "docs/b.txt", "lang": "de", "voice": "other"},
+        {"text": "Named.", "out": "sub/named.wav", "backend": "gtts"},
+    )
+    out = tmp_path / "out"
+    a, b, c = _items(manifest, out, fmt="flac")
+    assert (a.id, a.out, a.lang, a.piper_model) == ("1", out.resolve() / "1.flac", "en", "voice")
+    assert (b.file, b.lang, b.piper_model) == (tmp_path / "docs" / "b.txt", "de", "other")
+    assert b.out == out.resolve() / "b.flac"
+    assert (c.backend, c.out) == ("gtts", out.resolve() / "sub" / "named.wav")
+
+
+@pytest.mark.parametrize("row", [
+    "not json",
+    {"id": "no text"},
+    {"text": "x", "out": "../escape.wav"},
+    {"text": "x", "out": "sub/../../escape.wav"},
+    {"text": "x", "out": "/tmp/abs.wav"},
+    {"text": "x", "id": "../escape"},
+])
+def test_manifest_rejects_bad_lines(tmp_path, row):
+    with pytest.raises(ValueError, match="manifest.jsonl:1"):
+        _items(_manifest(tmp_path, row), tmp_path / "out")
+
+
+def test_directory_mirrors_layout(tmp_path):
+    docs = tmp_path / "docs"
+    (docs / "sub").mkdir(parents=True)
+    for name in ("a.txt", "sub/b.pdf", "sub/c.docx", "ignored.md"):
+        (docs / name).write_text("x", encoding="utf-8")
+    out = tmp_path / "out"
+    items = list(batch.items_from_directory(docs, out, backend="piper", piper_model="voice", fmt="ogg"))
+    assert [i.id for i in items] == ["a.txt", "sub/b.pdf", "sub/c.docx"]
+    assert [i.out for i in items] == [out / "a.ogg", out / "sub" / "b.ogg", out / "sub" / "c.ogg"]
+
+
+def test_run_writes_outputs_and_results(calls, tmp_path):
+    out = tmp_path / "out"
+    items = _items(_manifest(tmp_path, {"id": "a", "text": "First item."}, {"id": "b", "text": "Second item."}), out)
+    summary = _run(items, tmp_path)
+    assert (summary["ok"], summary["skipped"], summary["failed"]) == (2, 0, 0)
+    assert sorted(calls) == ["First item.", "Second item."]
+    results = {r["id"]: r for r in _results(tmp_path)}
+    assert results["a"]["status"] == "ok" and results["a"]["chars"] == len("First item.")
+    assert Path(results["b"]["output"]) == out.resolve() / "b.wav"
+    assert (out / "a.wav").exists() and (out / "b.wav").exists()
+
+
+def test_existing_outputs_are_skipped_unless_forced(calls, tmp_path):
+    out = tmp_path / "out"
+    manifest = _manifest(tmp_path, {"id": "a", "text": "First item."}, {"id": "b", "text": "Second item."})
+    _run(_items(manifest, out)[:1], tmp_path)  # an interrupted run
+    calls.clear()
+
+    summary = _run(_items(manifest, out), tmp_path)
+    assert (summary["ok"], summary["skipped"]) == (1, 1)
+    assert calls == ["Second item."]
+    assert [r["status"] for r in _results(tmp_path)] == ["ok", "skipped", "ok"]
+
+    calls.clear()
+    summary = _run(_items(manifest, out), tmp_path, force=True)
+    assert summary["ok"] == 2 and sorted(calls) == ["First item.", "Second item."]
+
+
+def test_duplicate_outputs_fail(calls, tmp_path):
+    out = tmp_path / "out"
+    manifest = _manifest(
+        tmp_path,
+        {"id": "a", "text": "First item.", "out": "same"},
+        {"id": "b", "text": "Second item.", "out": "x/../same"},
+    )
+    summary = _run(_items(manifest, out), tmp_path)
+    assert (summary["ok"], summary["failed"]) == (1, 1)
+    failed = [r for r in _results(tmp_path) if r["status"] == "failed"]
+    assert failed[0]["id"] == "b" and "duplicate output" in failed[0]["error"]
+    assert calls == ["First item."]
+
+
+def test_failures_are_recorded_and_do_not_stop_the_run(calls, tmp_path, monkeypatch):
+    def flaky(text, model, out):
+        if "bad" in text:
+            raise RuntimeError("synthesis failed")
+        return fake(text, model, out)
+
+    fake = core.tts_piper
+    monkeypatch.setattr(core, "tts_piper", flaky)
+    out = tmp_path / "out"
+    items = _items(_manifest(tmp_path, {"id": "a", "text": "A bad item."}, {"id": "b", "text": "A good item."}), out)
+    summary = _run(items, tmp_path)
+    assert (summary["ok"], summary["failed"]) == (1, 1)
+    results = {r["id"]: r for r in _results(tmp_path)}
+    assert results["a"]["status"] == "failed" and "synthesis failed" in results["a"]["error"]
+    assert not (out / "a.wav").exists()
@@ -0,0 +1,92 @@
+"""
+Offline benchmarks (pytest-benchmark) on the deterministic fake backend.
+
+    pytest tests/test_bench.py --benchmark-json=bench.json
+    pytest tests/test_bench.py --benchmark-compare   # against the last saved run
+"""
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+pytest.importorskip("pytest_benchmark")
+
+from text2audio import bench  # noqa: E402
+from text2audio.audio import concat_writer  # noqa: E402
+from text2audio.file_to_text import extract_text_from_bytes  # noqa: E402
+from text2audio.segment import iter_segments  # noqa: E402
+from text2audio.streaming import iter_piper_pcm  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def voice():
+    return bench.FakeVoice(load_s=0)
+
+
+@pytest.fixture(scope="module")
+def chunk_files(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("chunks")
+    return [bench.write_fake_wav(tmp / f"chunk_{i}.wav", 5.0) for i in range(1, 21)]
+
+
+@pytest.mark.parametrize("chars", bench.DEFAULT_LENGTHS)
+def test_fake_backend_synthesis(benchmark, voice, chars):
+    text = bench.sample_text(chars)
+    pcm = benchmark(lambda: b"".join(iter_piper_pcm(voice, text)))
+    assert pcm and pcm == b"".join(iter_piper_pcm(voice, text))  # deterministic
+
+
+def test_fake_backend_load(benchmark):
+    benchmark.pedantic(bench.FakeVoice, kwargs={"load_s": 0.01}, rounds=5)
+
+
+def test_segmentation(benchmark):
+    text = bench.sample_text(200_000)
+    chunks = benchmark(lambda: list(iter_segments(text, 1200, lang="en")))
+    assert all(len(c) <= 1200 for c in chunks)
+
+
+def test_concat_wav(benchmark, chunk_files, tmp_path):
+    def _concat():
+        with concat_writer(tmp_path / "joined.wav") as writer:
+            for f in chunk_files:
+                writer.append(f)
+        return writer.count
+
+    assert benchmark(_concat) == len(chunk_files)
+
+
+def test_zip_stored(benchmark, chunk_files, tmp_path):
+    def _zip():
+        with zipfile.ZipFile(tmp_path / "chunks.zip", "w", compression=zipfile.ZIP_STORED) as zf:
+            for f in chunk_files:
+                zf.write(f, arcname=f.name)
+
+    benchmark(_zip)
+
+
+def test_extract_txt(benchmark):
+    data = bench.sample_text(500_000).encode("utf-8")
+    text = benchmark(extract_text_from_bytes, "bench.txt", data, cache=False)
+    assert len(text) > 400_000
+
+
+def test_extract_pdf(benchmark):
+    pytest.importorskip("pdfminer")
+    pdf = bench.make_pdf([f"Page {i} of the benchmark document." for i in range(50)])
+    text = benchmark(extract_text_from_bytes, "bench.pdf", pdf, cache=False)
+    assert "Page 49" in text
+
+
+def test_report_is_json_and_comparable(tmp_path):
+    import json
+
+    report = bench.run(["fake"], lengths=[40], repeats=2, stages=False)
+    report = json.loads(json.dumps(report))
+    [fake] = report["backends"]
+    assert {"load_s", "peak_rss_mb"} <= fake.keys()
+    assert {"p50", "p95", "p99"} <= fake["lengths"]["40"]["latency_s"].keys()
+    assert bench.compare(report, report) == []
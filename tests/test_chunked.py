@@ -0,0 +1,81 @@
+"""
+Chunked synthesis with several workers: the joined WAV holds every chunk's
+audio in text order, and the stored ZIP lists the chunks in order. Piper is
+replaced by a stub that writes the chunk's text as PCM frames and finishes
+later chunks first.
+
+    pytest tests/test_chunked.py
+"""
+import re
+import sys
+import time
+import wave
+import zipfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from text2audio import core, parallel  # noqa: E402
+from text2audio.chunked import synthesize_chunked  # noqa: E402
+from text2audio.segment import iter_segments  # noqa: E402
+
+WORKERS = 4
+CHUNK = 60
+TEXT = " ".join(f"Sentence number {i} is part of the text." for i in range(24))
+
+
+def _pcm(text):
+    data = text.encode("utf-8")
+    return data + b"\0" * (len(data) % 2)
+
+
+@pytest.fixture(autouse=True)
+def stub(monkeypatch, tmp_path):
+    def fake_piper(text, model, out):
+        first = int(re.search(r"\d+", text).group())
+        time.sleep(0.01 * (24 - first) / 4)  # later chunks finish first
+        with wave.open(str(out), "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(22050)
+            wf.writeframes(_pcm(text))
+        return Path(out)
+
+    model = tmp_path / "voice.onnx"
+    model.write_bytes(b"fake")
+    monkeypatch.setattr(core, "resolve_piper_model", lambda m: model)
+    monkeypatch.setattr(core, "tts_piper", fake_piper)
+    before = parallel.MAX_PARALLEL
+    parallel.configure(WORKERS)
+    yield
+    parallel.configure(before)
+
+
+def _chunked(out, **kw):
+    return synthesize_chunked(TEXT, out, backend="piper", piper_model="voice", chunk_size=CHUNK,
+                              parallelism=WORKERS, cache=False, **kw)
+
+
+def test_concat_keeps_chunk_order(tmp_path):
+    parts = list(iter_segments(TEXT, CHUNK))
+    assert len(parts) > WORKERS
+    done = []
+    result = _chunked(tmp_path / "out.wav", on_progress=lambda idx, total: done.append(idx))
+    assert result["chunks"] == len(parts)
+    assert done == list(range(1, len(parts) + 1))
+    with wave.open(str(result["output"])) as wf:
+        assert wf.readframes(wf.getnframes()) == b"".join(_pcm(p) for p in parts)
+
+
+def test_zip_keeps_chunk_order(tmp_path):
+    parts = list(iter_segments(TEXT, CHUNK))
+    result = _chunked(tmp_path / "out.wav", mode="zip")
+    names = [f"out_{i}.wav" for i in range(1, len(parts) + 1)]
+    assert result["outputs"] == names
+    with zipfile.ZipFile(result["zip"]) as zf:
+        assert zf.namelist() == names
+        for name, part in zip(names, parts):
+            with zf.open(name) as fh, wave.open(fh) as wf:
+                assert wf.readframes(wf.getnframes()) == _pcm(part)
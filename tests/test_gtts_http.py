@@ -0,0 +1,128 @@
+"""
+The concurrent gTTS client against a local stand-in for the batchexecute
+endpoint (what TEXT2AUDIO_GTTS_URL points at): request payload, decoding of
+audio split over several RPC lines, token order, and retries on 5xx/429.
+
+    pytest tests/test_gtts_http.py
+"""
+import base64
+import json
+import sys
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+pytest.importorskip("requests")
+
+from text2audio import gtts_http  # noqa: E402
+from text2audio.audio import mp3_seconds  # noqa: E402
+
+ID3 = b"ID3\x04\x00\x00\x00\x00\x00\x00"  # empty ID3v2 tag, as Google sends one per token
+
+
+def frame(payload: bytes) -> bytes:
+    """One MPEG-1 Layer III frame (32 kbps, 44.1 kHz: 104 bytes) carrying payload."""
+    return (b"\xff\xfb\x10\x00" + payload.ljust(100, b"\0"))[:104]
+
+
+def token_audio(token: str):
+    """What the stand-in answers for a token: split over two RPC lines."""
+    return [ID3 + frame(token.encode()), frame(token[::-1].encode())]
+
+
+class Endpoint:
+    def __init__(self):
+        self.posts = []  # (headers, form body)
+        self.fail = []  # statuses to answer, in order, before succeeding
+        self._lock = threading.Lock()
+        ep = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, data=b"", headers=()):
+                self.send_response(status)
+                for k, v in headers:
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+                with ep._lock:
+                    ep.posts.append((dict(self.headers), body))
+                    status = ep.fail.pop(0) if ep.fail else 200
+                if status != 200:
+                    self._send(status, headers=[("Retry-After", "0")] if status == 429 else [])
+                    return
+                rpc = json.loads(urllib.parse.unquote(body[len("f.req="):-1]))
+                token = json.loads(rpc[0][0][1])[0]
+                lines = [")]}'", "", "123"]
+                for part in token_audio(token):
+                    b64 = base64.b64encode(part).decode()
+                    lines.append(f'[["wrb.fr","jQ1olc","[\\"{b64}\\"]",null,null,null,"generic"]]')
+                self._send(200, "\n".join(lines).encode())
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/batchexecute"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def endpoint(monkeypatch):
+    ep = Endpoint()
+    monkeypatch.setattr(gtts_http, "GTTS_URL", ep.url)  # as if TEXT2AUDIO_GTTS_URL were set
+    monkeypatch.setattr(gtts_http, "_BACKOFF_S", 0.001)
+    yield ep
+    ep.server.shutdown()
+    ep.server.server_close()
+
+
+def test_payload_format(endpoint, tmp_path):
+    gtts_http.synthesize_to_mp3("Hallo Welt.", "de", tmp_path / "a.mp3")
+    [(headers, body)] = endpoint.posts
+    assert headers["Content-Type"] == "application/x-www-form-urlencoded;charset=utf-8"
+    assert body.startswith("f.req=") and body.endswith("&")
+    rpc = json.loads(urllib.parse.unquote(body[len("f.req="):-1]))
+    assert rpc[0][0][0] == "jQ1olc" and rpc[0][0][3] == "generic"
+    assert json.loads(rpc[0][0][1]) == ["Hallo Welt.", "de", None, "null"]
+
+
+def test_tokens_decode_into_one_mp3_in_order(endpoint, tmp_path):
+    text = " ".join(f"Sentence number {i} is here to make the text longer than one token." for i in range(6))
+    tokens = list(gtts_http._tokens(text, "en"))
+    assert len(tokens) > 1 and all(len(t) <= gtts_http.MAX_CHARS for t in tokens)
+
+    out = gtts_http.synthesize_to_mp3(text, "en", tmp_path / "a.mp3")
+    expected = b"".join(
+        b"".join(token_audio(t)) if i == 0 else b"".join(token_audio(t))[len(ID3):]
+        for i, t in enumerate(tokens)
+    )
+    data = out.read_bytes()
+    assert data == expected  # one ID3 tag at the start, frames in text order
+    assert mp3_seconds(data) == pytest.approx(2 * len(tokens) * 1152 / 44100)
+
+
+@pytest.mark.parametrize("statuses", [[503], [429], [500, 429, 502]])
+def test_retries_5xx_and_429(endpoint, tmp_path, statuses):
+    endpoint.fail = list(statuses)
+    out = gtts_http.synthesize_to_mp3("Hello.", "en", tmp_path / "a.mp3")
+    assert out.read_bytes() == b"".join(token_audio("Hello."))
+    assert len(endpoint.posts) == len(statuses) + 1
+
+
+def test_client_errors_are_not_retried(endpoint, tmp_path):
+    endpoint.fail = [400]
+    with pytest.raises(RuntimeError, match="HTTP 400"):
+        gtts_http.synthesize_to_mp3("Hello.", "en", tmp_path / "a.mp3")
+    assert len(endpoint.posts) == 1
+    assert not (tmp_path / "a.mp3").exists()
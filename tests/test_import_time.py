@@ -0,0 +1,79 @@
+"""
+Startup regression tests: importing the entry points must not pull in the
+heavy optional dependencies, and must stay within an import-time budget.
+
+    pytest tests/test_import_time.py
+    TEXT2AUDIO_IMPORT_BUDGET_SCALE=2 pytest tests/test_import_time.py   # slow machine
+
+Times come from ``python -X importtime`` in a fresh interpreter (best of
+three runs), counting only the module's own import, not interpreter startup.
+"""
+import importlib.util
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY = ("pdfminer", "docx2txt", "piper", "onnxruntime", "pyttsx3", "gtts", "requests", "numpy")
+
+# Cumulative import time in ms. Loading pdfminer alone costs ~110 ms, the
+# backends ~25 ms, so any of them creeping back in fails these.
+BUDGET_MS = {
+    "text2audio.cli": 25,
+    "text2audio.file_to_text": 40,
+    "text2audio.core": 60,
+}
+SCALE = float(os.getenv("TEXT2AUDIO_IMPORT_BUDGET_SCALE", "1"))
+RUNS = 3
+
+
+def _python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.getenv("PYTHONPATH")])))
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+
+def _import_ms(module: str) -> float:
+    cp = _python(f"import {module}", "-X", "importtime")
+    m = re.search(r"^import time:\s+\d+ \|\s+(\d+) \| " + re.escape(module) + "$", cp.stderr, re.M)
+    assert m, f"no importtime line for {module}"
+    return int(m.group(1)) / 1000
+
+
+@pytest.mark.parametrize("module", sorted(BUDGET_MS))
+def test_import_time_budget(module):
+    best = min(_import_ms(module) for _ in range(RUNS))
+    budget = BUDGET_MS[module] * SCALE
+    assert best <= budget, f"import {module} took {best:.1f} ms (budget {budget:.0f} ms)"
+
+
+@pytest.mark.parametrize("module", ["text2audio.cli", "text2audio.core", "text2audio.file_to_text",
+                                    "text2audio.chunked", "text2audio.pipeline", "text2audio.batch",
+                                    "text2audio.api"])
+def test_no_heavy_imports(module):
+    if module == "text2audio.api" and importlib.util.find_spec("fastapi") is None:
+        pytest.skip("fastapi not installed")
+    code = (
+        f"import json, sys, {module}; "
+        f"print(json.dumps(sorted({{m.split('.')[0] for m in sys.modules}} & set({HEAVY!r}))))"
+    )
+    loaded = json.loads(_python(code).stdout)
+    assert loaded == [], f"import {module} loaded {', '.join(loaded)}"
+
+
+def test_help_skips_backends():
+    code = (
+        "import sys; sys.argv = ['text2audio', '--help']\n"
+        "from text2audio import cli\n"
+        "try:\n    cli.main()\nexcept SystemExit:\n    pass\n"
+        "print('text2audio.core' in sys.modules, 'text2audio.backends' in sys.modules)"
+    )
+    assert _python(code).stdout.strip().splitlines()[-1] == "False False"
@@ -0,0 +1,158 @@
+"""
+Background jobs: state persists across managers on the same database,
+interrupted jobs are re-queued and run after a restart, queued and running
+jobs can be cancelled, and a second process-level owner of the database is
+refused. Runners are fakes.
+
+    pytest tests/test_jobs.py
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from text2audio import jobs  # noqa: E402
+from text2audio.jobs import JobManager  # noqa: E402
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.01)
+
+
+def _status(manager, job_id):
+    return manager.get(job_id)["status"]
+
+
+class Runner:
+    """Records requests; blocks until released (or cancelled) when ``block`` is set."""
+
+    def __init__(self, block=False):
+        self.block = block
+        self.release = threading.Event()
+        self.requests = []
+        self.exited = threading.Event()
+
+    def __call__(self, request, on_progress, cancel):
+        self.requests.append(request)
+        try:
+            on_progress(1, 2)
+            while self.block and not self.release.is_set():
+                if cancel.wait(0.01):
+                    raise RuntimeError("Synthesis cancelled.")
+            on_progress(2, 2)
+            return {"output": f"{request['text']}.wav"}
+        finally:
+            self.exited.set()
+
+
+@pytest.fixture
+def managers(tmp_path):
+    started = []
+
+    def make(runner, workers=2):
+        manager = JobManager(tmp_path / "jobs.sqlite3", runner, workers=workers)
+        started.append(manager)
+        return manager
+
+    yield make
+    for manager in started:
+        manager.shutdown()
+        manager.store.close()
+
+
+def test_state_persists_across_managers(managers):
+    first = managers(Runner())
+    first.start()
+    job_id = first.submit({"text": "hello"})
+    _wait_for(lambda: _status(first, job_id) == "done")
+    first.shutdown()
+
+    second = managers(Runner())
+    job = second.get(job_id)
+    assert job["request"] == {"text": "hello"}
+    assert (job["status"], job["done"], job["total"]) == ("done", 2, 2)
+    assert job["outputs"] == {"output": "hello.wav"}
+    assert [j["id"] for j in second.list()] == [job_id]
+
+
+def test_interrupted_job_is_requeued_after_restart(managers):
+    blocked = Runner(block=True)
+    first = managers(blocked)
+    first.start()
+    job_id = first.submit({"text": "long"})
+    _wait_for(lambda: _status(first, job_id) == "running")
+    first.shutdown()
+    assert blocked.exited.wait(5)
+    assert _status(first, job_id) == "running"  # left for the next start()
+
+    runner = Runner()
+    second = managers(runner)
+    second.start()
+    _wait_for(lambda: _status(second, job_id) == "done")
+    assert runner.requests == [{"text": "long"}]
+
+
+def test_queued_job_survives_restart(managers):
+    first = managers(Runner())
+    job_id = first.store.create({"text": "queued"})  # accepted, never started
+
+    runner = Runner()
+    second = managers(runner)
+    second.start()
+    _wait_for(lambda: _status(second, job_id) == "done")
+    assert runner.requests == [{"text": "queued"}]
+
+
+def test_cancel_queued_job(managers):
+    runner = Runner(block=True)
+    manager = managers(runner, workers=1)
+    manager.start()
+    running = manager.submit({"text": "first"})
+    queued = manager.submit({"text": "second"})
+    _wait_for(lambda: _status(manager, running) == "running")
+
+    assert manager.cancel(queued)
+    assert _status(manager, queued) == "cancelled"
+    runner.release.set()
+    _wait_for(lambda: _status(manager, running) == "done")
+    time.sleep(0.05)
+    assert runner.requests == [{"text": "first"}]
+    assert _status(manager, queued) == "cancelled"
+
+
+def test_cancel_running_job(managers):
+    manager = managers(Runner(block=True))
+    manager.start()
+    job_id = manager.submit({"text": "long"})
+    _wait_for(lambda: _status(manager, job_id) == "running")
+    assert manager.cancel(job_id)
+    _wait_for(lambda: _status(manager, job_id) == "cancelled")
+    assert not manager.cancel(job_id)
+
+
+def test_cancel_finished_job_fails(managers):
+    manager = managers(Runner())
+    manager.start()
+    job_id = manager.submit({"text": "short"})
+    _wait_for(lambda: _status(manager, job_id) == "done")
+    assert not manager.cancel(job_id)
+    assert not manager.cancel("unknown")
+
+
+@pytest.mark.skipif(jobs.fcntl is None, reason="needs fcntl")
+def test_second_owner_of_the_database_is_refused(managers):
+    first = managers(Runner())
+    first.start()
+    second = managers(Runner())
+    with pytest.raises(RuntimeError, match="in use by another process"):
+        second.start()
+    first.shutdown()
+    second.start()  # free again once the owner stops
@@ -0,0 +1,146 @@
+"""
+Voice downloads against a local stand-in for the model repository (the URL
+TEXT2AUDIO_MODEL_MIRROR points at): resuming an interrupted download,
+gzip-compressed models, and single-flight for concurrent callers.
+
+    pytest tests/test_model_repo.py
+"""
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+pytest.importorskip("requests")
+
+from text2audio import model_repo  # noqa: E402
+
+KEY = "Amy (US)"
+DIRPATH, BASE = model_repo.MODELS[KEY]
+ONNX = os.urandom(2 * 1024 * 1024)  # passes the size check; never loaded
+META = json.dumps({"audio": {"sample_rate": 22050}}).encode()
+
+
+class Mirror:
+    """Serves files from memory with Range support; records every request."""
+
+    def __init__(self, files):
+        self.files = dict(files)
+        self.requests = []  # (method, path, Range header)
+        self.cut_next_get = None  # path whose next GET stops halfway
+        self.delay_s = 0.0
+        mirror = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _head(self, with_body):
+                mirror.requests.append((self.command, self.path, self.headers.get("Range")))
+                data = mirror.files.get(self.path)
+                if data is None:
+                    self.send_error(404)
+                    return
+                start, status = 0, 200
+                rng = self.headers.get("Range")
+                if rng:
+                    start = int(rng.split("=")[1].split("-")[0])
+                    status = 206
+                body = data[start:]
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Accept-Ranges", "bytes")
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+                self.end_headers()
+                if not with_body:
+                    return
+                if mirror.cut_next_get == self.path:
+                    mirror.cut_next_get = None
+                    self.wfile.write(body[: len(body) // 2])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                for i in range(0, len(body), 64 * 1024):
+                    time.sleep(mirror.delay_s)
+                    self.wfile.write(body[i:i + 64 * 1024])
+
+            def do_HEAD(self):
+                self._head(False)
+
+            def do_GET(self):
+                self._head(True)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def gets(self, suffix):
+        return [r for r in self.requests if r[0] == "GET" and r[1].endswith(suffix)]
+
+
+@pytest.fixture
+def mirror(monkeypatch):
+    def start(files):
+        m = Mirror({f"/{DIRPATH}/{BASE}{ext}": data for ext, data in files.items()})
+        monkeypatch.setattr(model_repo, "HF_BASE", m.url)  # as if TEXT2AUDIO_MODEL_MIRROR were set
+        servers.append(m)
+        return m
+
+    servers = []
+    yield start
+    for m in servers:
+        m.server.shutdown()
+        m.server.server_close()
+
+
+def test_interrupted_download_resumes(mirror, tmp_path):
+    m = mirror({".onnx": ONNX, ".onnx.json": META})
+    m.cut_next_get = f"/{DIRPATH}/{BASE}.onnx"
+    with pytest.raises(RuntimeError):
+        model_repo.ensure_model(KEY, tmp_path)
+    part = tmp_path / f"{BASE}.onnx.part"
+    kept = part.stat().st_size
+    assert 0 < kept < len(ONNX)
+
+    onnx, meta = model_repo.ensure_model(KEY, tmp_path)
+    assert onnx.read_bytes() == ONNX and meta.read_bytes() == META
+    assert m.gets(".onnx")[-1][2] == f"bytes={kept}-"  # only the missing tail was fetched
+    assert not part.exists()
+
+
+def test_gzip_model_is_decompressed(mirror, tmp_path):
+    m = mirror({".onnx.gz": gzip.compress(ONNX), ".onnx.json": META})
+    onnx, _ = model_repo.ensure_model(KEY, tmp_path)
+    assert onnx.read_bytes() == ONNX
+    assert len(m.gets(".onnx.gz")) == 1
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_concurrent_callers_download_once(mirror, tmp_path):
+    m = mirror({".onnx": ONNX, ".onnx.json": META})
+    m.delay_s = 0.005  # keep the first download in flight while the others arrive
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(model_repo.ensure_model(KEY, tmp_path))
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len(set(results)) == 1 and results[0][0].read_bytes() == ONNX
+    assert len(m.gets(".onnx")) == 1
+    assert len(m.gets(".onnx.json")) == 1
@@ -0,0 +1,87 @@
+"""
+Concurrent chunk synthesis: with several workers, chunks that finish out of
+order are still yielded in text order, several run at once, and a failing
+chunk raises. Piper is replaced by a stub whose later chunks finish first.
+
+    pytest tests/test_parallel.py
+"""
+import re
+import sys
+import threading
+import time
+import wave
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from text2audio import core, parallel  # noqa: E402
+
+WORKERS = 4
+
+
+def _write_text_wav(text, out):
+    data = text.encode("utf-8")
+    with wave.open(str(out), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(22050)
+        wf.writeframes(data + b"\0" * (len(data) % 2))
+    return Path(out)
+
+
+@pytest.fixture
+def stub(monkeypatch, tmp_path):
+    state = {"running": 0, "peak": 0, "finished": []}
+    lock = threading.Lock()
+
+    def fake_piper(text, model, out):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        try:
+            if "fail" in text:
+                raise RuntimeError("chunk failed")
+            n = int(re.search(r"\d+", text).group())
+            time.sleep(0.02 * (10 - n % 10))  # later chunks finish first
+            with lock:
+                state["finished"].append(text)
+            return _write_text_wav(text, out)
+        finally:
+            with lock:
+                state["running"] -= 1
+
+    model = tmp_path / "voice.onnx"
+    model.write_bytes(b"fake")
+    monkeypatch.setattr(core, "resolve_piper_model", lambda m: model)
+    monkeypatch.setattr(core, "tts_piper", fake_piper)
+    before = parallel.MAX_PARALLEL
+    parallel.configure(WORKERS)
+    yield state
+    parallel.configure(before)
+
+
+def _parts(tmp_path, parts):
+    return parallel.synthesize_parts(
+        parts, lambda idx: tmp_path / f"chunk_{idx}.wav", backend="piper", piper_model="voice",
+        parallelism=WORKERS, cache=False,
+    )
+
+
+def test_chunks_are_yielded_in_text_order(stub, tmp_path):
+    parts = [f"Part {i}." for i in range(10)]
+    got = list(_parts(tmp_path, parts))
+    assert [idx for idx, _ in got] == list(range(1, 11))
+    assert [path for _, path in got] == [tmp_path / f"chunk_{i}.wav" for i in range(1, 11)]
+    for (_, path), part in zip(got, parts):
+        with wave.open(str(path)) as wf:
+            assert wf.readframes(wf.getnframes()).rstrip(b"\0") == part.encode()
+    assert stub["finished"] != parts  # they did complete out of order
+    assert 1 < stub["peak"] <= WORKERS
+
+
+def test_failing_chunk_raises(stub, tmp_path):
+    parts = [f"Part {i}." for i in range(6)] + ["Part 9 will fail."]
+    with pytest.raises(RuntimeError, match="chunk failed"):
+        list(_parts(tmp_path, parts))
@@ -0,0 +1,111 @@
+"""
+The piper CLI fallback against fake ``piper`` scripts: the piper-tts 1.3.0
+interface (text on stdin, no --text flag) and a --json-input binary.
+
+    pytest tests/test_piper_cli.py
+"""
+import os
+import sys
+import textwrap
+import wave
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from text2audio import piper_cli  # noqa: E402
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="fake CLI is a shebang script")
+
+# Mirrors piper-tts 1.3.0's __main__: parse_known_args, leftover args become
+# the text, otherwise stdin lines. Each run is logged to $FAKE_PIPER_LOG.
+_COMMON = f"""\
+#!{sys.executable}
+import argparse, json, os, sys, wave
+
+def write(path, text):
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1); wf.setsampwidth(2); wf.setframerate(16000)
+        wf.writeframes(b"\\x01\\x00" * 100 * len(text))
+
+def log(entry):
+    with open(os.environ["FAKE_PIPER_LOG"], "a") as f:
+        f.write(json.dumps(entry) + "\\n")
+"""
+
+FAKE_130 = _COMMON + textwrap.dedent("""
+    p = argparse.ArgumentParser()
+    p.add_argument("-m", "--model", required=True)
+    p.add_argument("-f", "--output-file", "--output_file")
+    p.add_argument("-d", "--output-dir", "--output_dir")
+    p.add_argument("--output-raw", "--output_raw", action="store_true")
+    args, unknown = p.parse_known_args()
+    lines = [" ".join(unknown)] if unknown else [l.strip() for l in sys.stdin if l.strip()]
+    log({"pid": os.getpid(), "argv": sys.argv[1:], "text": " ".join(lines)})
+    write(args.output_file, " ".join(lines))
+""")
+
+FAKE_JSON = _COMMON + textwrap.dedent("""
+    if "--help" in sys.argv:
+        print("  --json-input  stdin input is lines of JSON instead of plain text")
+        sys.exit(0)
+    for line in sys.stdin:
+        req = json.loads(line)
+        log({"pid": os.getpid(), "argv": sys.argv[1:], "text": req["text"]})
+        write(req["output_file"], req["text"])
+        print(req["output_file"], flush=True)
+""")
+
+
+def _fake(tmp_path, monkeypatch, source):
+    cli = tmp_path / "piper"
+    cli.write_text(source)
+    cli.chmod(0o755)
+    log = tmp_path / "calls.jsonl"
+    monkeypatch.setenv("FAKE_PIPER_LOG", str(log))
+    model = tmp_path / "voice.onnx"
+    model.write_bytes(b"")
+    return str(cli), model, log
+
+
+def _calls(log):
+    import json
+    return [json.loads(line) for line in log.read_text().splitlines()]
+
+
+def _frames(path):
+    with wave.open(str(path), "rb") as wf:
+        return wf.getnframes()
+
+
+def test_cli_130_reads_text_from_stdin(tmp_path, monkeypatch):
+    cli, model, log = _fake(tmp_path, monkeypatch, FAKE_130)
+    assert not piper_cli.supports_json_input(cli)
+    text = "Hello there. --length_scale is just text."
+    out = piper_cli.synthesize(cli, model, text, tmp_path / "a.wav")
+    (call,) = _calls(log)
+    assert call["text"] == text
+    assert call["argv"] == ["--model", str(model), "--output_file", str(out)]
+    assert _frames(out) == 100 * len(text)
+
+
+def test_cli_130_failure_is_reported(tmp_path, monkeypatch):
+    cli, model, _ = _fake(tmp_path, monkeypatch, FAKE_130.replace("log({", "sys.exit('no voice'); log({"))
+    with pytest.raises(RuntimeError, match="no voice"):
+        piper_cli.synthesize(cli, model, "Hello.", tmp_path / "a.wav")
+
+
+def test_json_input_worker_is_reused(tmp_path, monkeypatch):
+    cli, model, log = _fake(tmp_path, monkeypatch, FAKE_JSON)
+    assert piper_cli.supports_json_input(cli)
+    try:
+        a = piper_cli.synthesize(cli, model, "First.", tmp_path / "a.wav")
+        b = piper_cli.synthesize(cli, model, "Second one.", tmp_path / "b.wav")
+    finally:
+        piper_cli.shutdown()
+    calls = _calls(log)
+    assert [c["text"] for c in calls] == ["First.", "Second one."]
+    assert calls[0]["pid"] == calls[1]["pid"]  # one process, model loaded once
+    assert calls[0]["argv"] == ["--model", str(model.resolve()), "--json-input"]
+    assert (_frames(a), _frames(b)) == (600, 1100)
@@ -0,0 +1,78 @@
+"""
+Result cache: hits are copies of the entry, so the output's mtime is not
+touched by later hits and editing an output never changes what the cache
+serves; ``link=True`` (private temp dirs) shares the inode. The ``enabled``
+switch on the instance is what synthesize() consults.
+
+    pytest tests/test_result_cache.py
+"""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from text2audio import core, result_cache  # noqa: E402
+from text2audio.result_cache import ResultCache  # noqa: E402
+
+
+def test_hits_are_independent_copies(tmp_path):
+    cache = ResultCache(tmp_path / "cache", 1 << 20)
+    src = tmp_path / "src.wav"
+    src.write_bytes(b"audio")
+    cache.put("k", src)
+
+    out = tmp_path / "out.wav"
+    assert cache.get("k", out) == out
+    assert out.stat().st_nlink == 1
+    out.write_bytes(b"edited by the user")
+
+    again = tmp_path / "again.wav"
+    cache.get("k", again)
+    assert again.read_bytes() == b"audio"
+    assert out.read_bytes() == b"edited by the user"
+
+
+def test_hit_does_not_touch_earlier_output(tmp_path):
+    cache = ResultCache(tmp_path / "cache", 1 << 20)
+    src = tmp_path / "src.wav"
+    src.write_bytes(b"audio")
+    cache.put("k", src)
+    out = tmp_path / "out.wav"
+    cache.get("k", out)
+    os.utime(out, (1000, 1000))
+    cache.get("k", tmp_path / "other.wav")
+    assert out.stat().st_mtime == 1000
+
+
+def test_link_shares_the_entry(tmp_path):
+    cache = ResultCache(tmp_path / "cache", 1 << 20)
+    src = tmp_path / "src.wav"
+    src.write_bytes(b"audio")
+    cache.put("k", src)
+    out = tmp_path / "tmp" / "piece.wav"
+    cache.get("k", out, link=True)
+    assert out.read_bytes() == b"audio"
+    assert out.stat().st_nlink == 2
+
+
+def test_synthesize_follows_the_instance_switch(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_gtts(text, lang, out):
+        calls.append(text)
+        Path(out).write_bytes(b"ID3" + bytes(200))
+        return Path(out)
+
+    monkeypatch.setattr(core, "tts_gtts", fake_gtts)
+    cache = ResultCache(tmp_path / "cache", 1 << 20, enabled=False)
+    monkeypatch.setattr(result_cache, "RESULTS", cache)
+    core.synthesize("hello", backend="gtts", out=str(tmp_path / "a.mp3"))
+    core.synthesize("hello", backend="gtts", out=str(tmp_path / "b.mp3"))
+    assert len(calls) == 2
+
+    cache.enabled = True
+    core.synthesize("hello", backend="gtts", out=str(tmp_path / "c.mp3"))
+    core.synthesize("hello", backend="gtts", out=str(tmp_path / "d.mp3"))
+    assert len(calls) == 3
+    assert cache.stats()["enabled"] is True
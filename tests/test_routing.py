@@ -0,0 +1,60 @@
+"""
+Routing between the Piper Python API and its CLI fallback: every failure of
+the Python path reaches the fallback, but only backend failures count toward
+opening the circuit breaker.
+
+    pytest tests/test_routing.py
+"""
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from text2audio import backends, routing, streaming, voice_cache  # noqa: E402
+
+
+@pytest.fixture
+def piper(monkeypatch, tmp_path):
+    cli_calls = []
+    voice = SimpleNamespace(config=SimpleNamespace(sample_rate=22050))
+
+    def fake_cli(text, model_path, out, py_err):
+        cli_calls.append(py_err)
+        out.write_bytes(b"RIFF")
+        return out
+
+    def run(error, name):
+        def pcm(_voice, _text):
+            raise error
+            yield b""  # pragma: no cover
+
+        model = tmp_path / f"{name}.onnx"
+        monkeypatch.setattr(backends, "resolve_piper_model", lambda m: model)
+        monkeypatch.setattr(voice_cache, "get_voice", lambda p: voice)
+        monkeypatch.setattr(streaming, "iter_piper_pcm", pcm)
+        monkeypatch.setattr(backends, "_piper_cli", fake_cli)
+        monkeypatch.setattr(backends.shutil, "which", lambda name: "/usr/bin/piper")
+        out = backends.tts_piper("Hello.", name, tmp_path / f"{name}.wav")
+        return out, routing.breaker("piper_python", model.name)
+
+    run.cli_calls = cli_calls
+    return run
+
+
+@pytest.mark.parametrize("error", [AttributeError("no attribute 'phonemize'"), TypeError("bad args"),
+                                   ValueError("unexpected text")])
+def test_other_python_errors_still_reach_the_cli(piper, error):
+    out, breaker = piper(error, f"api-mismatch-{type(error).__name__}")
+    assert out.read_bytes() == b"RIFF"
+    assert piper.cli_calls == [error]
+    assert breaker.snapshot()["errors"] == 0 and breaker.state == "closed"
+
+
+def test_backend_errors_reach_the_cli_and_open_the_breaker(piper):
+    for _ in range(routing.FAILURES):
+        _, breaker = piper(routing.BackendError("session crashed"), "broken")
+    assert len(piper.cli_calls) == routing.FAILURES
+    assert breaker.state == "open"
@@ -0,0 +1,47 @@
+"""
+Segmentation scales linearly: multi-MB strings and long streams of small
+pieces must not rescan the buffer per sentence candidate or per piece.
+
+    pytest tests/test_segment.py
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from text2audio.segment import iter_sentences  # noqa: E402
+
+TEXT = "Dr. Smith met J. R. R. Tolkien on 3. Oktober, z.B. in Nr. 5. Then they left! Why? Nobody knows. "
+
+
+def _seconds(make_input) -> float:
+    best = float("inf")
+    for _ in range(2):
+        data = make_input()
+        t0 = time.perf_counter()
+        for _ in iter_sentences(data):
+            pass
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def test_multi_mb_string_is_linear():
+    # One line, no newline anywhere: the case that used to search back to the buffer start.
+    small = _seconds(lambda: TEXT * (1_000_000 // len(TEXT)))
+    large = _seconds(lambda: TEXT * (4_000_000 // len(TEXT)))
+    assert large < 8 * small, f"4 MB took {large:.2f}s vs {small:.2f}s for 1 MB"
+
+
+def test_many_small_pieces_are_linear():
+    small = _seconds(lambda: ("word " for _ in range(20_000)))
+    large = _seconds(lambda: ("word " for _ in range(200_000)))
+    assert large < 20 * small + 0.05, f"200k pieces took {large:.2f}s vs {small:.2f}s for 20k"
+
+
+def test_streamed_pieces_match_the_whole_string():
+    text = TEXT * 50
+    whole = list(iter_sentences(text, lang="de"))
+    for size in (1, 7, 64, 1000):
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        assert list(iter_sentences(pieces, lang="de")) == whole
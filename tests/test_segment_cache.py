@@ -0,0 +1,109 @@
+"""
+Sentence cache (opt-in): re-synthesizing an edited text only synthesizes the
+changed sentence, the joined output is a valid WAV/MP3 with pauses between
+sentences, and mismatched sentence formats fall back to one-piece synthesis.
+Backends are replaced by deterministic fakes.
+
+    pytest tests/test_segment_cache.py
+"""
+import sys
+import wave
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from text2audio import bench, core, result_cache, segment_cache  # noqa: E402
+from text2audio.audio import mp3_seconds  # noqa: E402
+from text2audio.result_cache import ResultCache  # noqa: E402
+
+RATE = 22050
+TEXT = "The first sentence is here. The second one follows it. And a third closes the text."
+EDITED = "The first sentence is here. The second one was edited. And a third closes the text."
+
+
+def _frame(payload: int) -> bytes:
+    """One MPEG-2 Layer III frame (32 kbps, 24 kHz: 96 bytes)."""
+    return bytes([0xFF, 0xF3, 0x44, 0xC4, payload]) + bytes(91)
+
+
+@pytest.fixture
+def calls(monkeypatch, tmp_path):
+    monkeypatch.setattr(result_cache, "RESULTS", ResultCache(tmp_path / "results", 1 << 30, enabled=True))
+    monkeypatch.setattr(segment_cache, "SEGMENTS", ResultCache(tmp_path / "segments", 1 << 30, enabled=False))
+    calls = []
+
+    def fake_piper(text, model, out):
+        calls.append(text)
+        rate = 16000 if "wrong rate" in text else RATE
+        with wave.open(str(out), "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(rate)
+            wf.writeframes(bench.fake_pcm(len(text) / 100, rate))
+        return Path(out)
+
+    def fake_gtts(text, lang, out):
+        calls.append(text)
+        Path(out).write_bytes(b"ID3\x04\x00\x00\x00\x00\x00\x00" + b"".join(_frame(len(text)) for _ in range(5)))
+        return Path(out)
+
+    model = tmp_path / "voice.onnx"
+    model.write_bytes(b"fake")
+    monkeypatch.setattr(core, "resolve_piper_model", lambda m: model)
+    monkeypatch.setattr(core, "tts_piper", fake_piper)
+    monkeypatch.setattr(core, "tts_gtts", fake_gtts)
+    return calls
+
+
+def _piper(text, out, **kw):
+    return core.synthesize(text, backend="piper", out=str(out), piper_model="voice", cache=True, **kw)
+
+
+def test_off_by_default(calls, tmp_path):
+    _piper(TEXT, tmp_path / "a.wav")
+    assert calls == [TEXT]
+
+
+def test_edited_sentence_is_the_only_one_resynthesized(calls, tmp_path):
+    first = _piper(TEXT, tmp_path / "a.wav", sentence_cache=True)
+    assert len(calls) == 3
+    calls.clear()
+    edited = _piper(EDITED, tmp_path / "b.wav", sentence_cache=True)
+    assert calls == ["The second one was edited."]
+
+    units = segment_cache.split(EDITED)
+    with wave.open(str(edited), "rb") as wf:
+        assert (wf.getnchannels(), wf.getsampwidth(), wf.getframerate()) == (1, 2, RATE)
+        speech = sum(int(len(u) / 100 * RATE) for u in units)
+        pauses = (len(units) - 1) * RATE * segment_cache.PAUSE_MS // 1000
+        assert wf.getnframes() == speech + pauses
+    with wave.open(str(first), "rb") as wf:
+        assert wf.getnframes() > 0
+
+
+def test_joined_mp3_is_one_valid_stream(calls, tmp_path):
+    out = core.synthesize(TEXT, backend="gtts", out=str(tmp_path / "a.mp3"), cache=True, sentence_cache=True)
+    assert len(calls) == 3
+    data = out.read_bytes()
+    assert data.count(b"ID3") == 1
+    frame_s = 576 / 24000
+    pause_frames = -(-segment_cache.PAUSE_MS * 24000 // (1000 * 576))
+    assert mp3_seconds(data) == pytest.approx((3 * 5 + 2 * pause_frames) * frame_s)
+
+
+def test_mismatched_formats_fall_back_to_one_piece(calls, tmp_path):
+    text = "This one is fine. This one has the wrong rate."
+    out = _piper(text, tmp_path / "a.wav", sentence_cache=True)
+    assert calls[-1] == text  # joined sentences failed, the whole text was synthesized
+    with wave.open(str(out), "rb") as wf:
+        assert wf.getnframes() > 0
+
+
+def test_chunk_workers_never_use_it(calls, tmp_path, monkeypatch):
+    from text2audio import parallel
+
+    monkeypatch.setattr(segment_cache, "ENABLED", True)
+    parallel._synth_chunk(TEXT, "piper", "en", str(tmp_path / "c.wav"), "voice", True)
+    assert calls == [TEXT]
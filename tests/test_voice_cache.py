@@ -0,0 +1,137 @@
+"""
+Voice cache: hit/miss counting, LRU eviction by count and by size, stale
+entries replaced when the model file changes, and concurrent callers sharing
+a single load. Loaders are fakes; no Piper voice is needed.
+
+    pytest tests/test_voice_cache.py
+"""
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from text2audio.voice_cache import VoiceCache  # noqa: E402
+
+
+@pytest.fixture
+def models(tmp_path):
+    def make(name, size=100):
+        path = tmp_path / f"{name}.onnx"
+        path.write_bytes(bytes(size))
+        return path
+    return make
+
+
+class Loader:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.loaded = []
+        self._lock = threading.Lock()
+
+    def __call__(self, path):
+        time.sleep(self.delay)
+        with self._lock:
+            self.loaded.append(path.name)
+        return object()
+
+
+def test_hits_and_misses(models):
+    loader = Loader()
+    cache = VoiceCache(max_voices=4, loader=loader)
+    a = models("a")
+    first = cache.get(a)
+    assert cache.get(a) is first
+    assert cache.get(str(a)) is first
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert loader.loaded == ["a.onnx"]
+
+
+def test_lru_eviction_by_count(models):
+    loader = Loader()
+    cache = VoiceCache(max_voices=2, loader=loader)
+    a, b, c = models("a"), models("b"), models("c")
+    cache.get(a)
+    cache.get(b)
+    cache.get(a)  # b is now least recently used
+    cache.get(c)
+    assert [Path(v).name for v in cache.stats()["voices"]] == ["a.onnx", "c.onnx"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_eviction_by_size(models):
+    cache = VoiceCache(max_voices=10, max_bytes=250, loader=Loader())
+    a, b, c = models("a", 100), models("b", 100), models("c", 100)
+    cache.get(a)
+    cache.get(b)
+    cache.get(c)
+    stats = cache.stats()
+    assert [Path(v).name for v in stats["voices"]] == ["b.onnx", "c.onnx"]
+    assert stats["bytes"] == 200
+
+
+def test_oversized_voice_is_still_kept(models):
+    cache = VoiceCache(max_voices=10, max_bytes=50, loader=Loader())
+    cache.get(models("a", 100))
+    assert cache.stats()["size"] == 1
+
+
+def test_changed_file_replaces_stale_entry(models):
+    loader = Loader()
+    cache = VoiceCache(max_voices=4, loader=loader)
+    a = models("a")
+    old = cache.get(a)
+    a.write_bytes(bytes(200))
+    st = a.stat()
+    os.utime(a, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    new = cache.get(a)
+    assert new is not old
+    stats = cache.stats()
+    assert stats["size"] == 1 and stats["bytes"] == 200
+    assert loader.loaded == ["a.onnx", "a.onnx"]
+
+
+def test_concurrent_callers_share_one_load(models):
+    loader = Loader(delay=0.2)
+    cache = VoiceCache(max_voices=4, loader=loader)
+    a = models("a")
+    start = threading.Barrier(8)
+    got = []
+
+    def worker():
+        start.wait()
+        got.append(cache.get(a))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert loader.loaded == ["a.onnx"]
+    assert len({id(v) for v in got}) == 1
+    assert cache.stats()["misses"] == 1
+    assert cache._loading == {}
+
+
+def test_failed_load_is_retried(models):
+    calls = []
+
+    def flaky(path):
+        calls.append(path)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return object()
+
+    cache = VoiceCache(loader=flaky)
+    a = models("a")
+    with pytest.raises(RuntimeError):
+        cache.get(a)
+    assert cache._loading == {}
+    cache.get(a)
+    assert len(calls) == 2
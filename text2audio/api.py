@@ -1,104 +1,283 @@
 # api.py
 from __future__ import annotations
 from pathlib import Path
-from typing import Optional, List
-import tempfile
-import zipfile
+from typing import Literal, Optional
+from contextlib import asynccontextmanager
 import os
+import time
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
+from text2audio import metrics
 from text2audio.core import synthesize
 from text2audio.model_repo import ensure_model, MODELS
-
-app = FastAPI(title="text2audio API", version="1.0")
+from text2audio.chunked import synthesize_chunked
+from text2audio.jobs import JobManager
 
 # Allow overriding via env; default matches your compose bind-mount
 OUTPUT_DIR = Path(os.getenv("OUTPUT_DIR", "/data"))
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+JOBS_DB = Path(os.getenv("TEXT2AUDIO_JOBS_DB", str(OUTPUT_DIR / ".text2audio-jobs.sqlite3")))
+JOB_WORKERS = int(os.getenv("TEXT2AUDIO_JOB_WORKERS", "2"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from text2audio.warmup import start_background
+    start_background()  # preload voices/engines; progress at /ready
+    JOBS.start()
+    yield
+    JOBS.shutdown()
+
+app = FastAPI(title="text2audio API", version="1.0", lifespan=lifespan)
+
+def _route(request: Request) -> str:
+    """Route template (/api/jobs/{job_id}) rather than the raw path, to bound label values."""
+    from starlette.routing import Match
+    for route in app.router.routes:
+        if route.matches(request.scope)[0] == Match.FULL:
+            return getattr(route, "path", request.url.path)
+    return "unmatched"
+
+@app.middleware("http")
+async def instrument(request: Request, call_next):
+    """In-flight gauge and latency histogram per route; Server-Timing if enabled."""
+    if not (metrics.ENABLED or metrics.SERVER_TIMING):
+        return await call_next(request)
+    route = _route(request)
+    metrics.INFLIGHT.inc(route=route)
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        # Stages timed while handling the request (sync endpoints run in a
+        # worker thread that copies this context) land in `timings`.
+        with metrics.request_timings() as timings:
+            response = await call_next(request)
+        status = response.status_code
+        if metrics.SERVER_TIMING:
+            response.headers["Server-Timing"] = metrics.server_timing(timings, time.perf_counter() - t0)
+        return response
+    finally:
+        metrics.INFLIGHT.dec(route=route)
+        metrics.HTTP_SECONDS.observe(time.perf_counter() - t0, method=request.method, route=route, status=status)
+
 class SynthesizeRequest(BaseModel):
     text: str = Field(..., description="Plain text to synthesize")
     backend: str = Field("pyttsx3", pattern="^(gtts|pyttsx3|piper)$")
+    lang: str = Field("en", description="Language code (gTTS/pyttsx3 voice, sentence splitting hints)")
     piper_model: Optional[str] = Field(
         None, description="Required if backend='piper' (short key or ONNX path)"
     )
     filename: Optional[str] = Field(
-        None, description="Target filename; defaults to .wav for piper/pyttsx3, .mp3 for gtts"
+        None,
+        description="Target filename; the extension picks the format (.wav, .mp3, .ogg/.opus, .flac). "
+                    "Defaults to .wav for piper/pyttsx3, .mp3 for gtts",
     )
     chunking: bool = Field(
-        False, description="If true and text is long, split into chunks and return ZIP"
+        False, description="If true and text is long, split into chunks and join them"
+    )
+    chunk_output: Literal["concat", "zip"] = Field(
+        "concat", description="'concat' → one gapless audio file; 'zip' → stored ZIP of chunk files"
+    )
+    pause_ms: int = Field(
+        0, ge=0, le=5000, description="Silence inserted between chunks"
     )
     chunk_size: int = Field(
         1200, ge=200, le=8000, description="Characters per chunk when chunking is enabled"
     )
+    parallelism: Optional[int] = Field(
+        None, ge=1, le=64, description="Max chunks synthesized concurrently for this request"
+    )
+    cache: bool = Field(
+        True, description="Reuse cached audio for identical text/voice/format"
+    )
+    sentence_cache: bool = Field(
+        False,
+        description="Keep audio per sentence so a re-submitted, edited text only re-synthesizes "
+                    "the changed sentences (single-file output only)",
+    )
+    bitrate: Optional[str] = Field(
+        None, pattern=r"^\d+k?$", description="Encoder bitrate for .mp3/.ogg/.opus, e.g. '48k'"
+    )
+    sample_rate: Optional[int] = Field(
+        None, ge=8000, le=48000, description="Resample the output to this rate (Hz)"
+    )
+    channels: Optional[int] = Field(
+        None, ge=1, le=2, description="Output channels; 1 downmixes to mono"
+    )
 
-def _chunk_iter(s: str, n: int = 1200):
-    s = s.strip()
-    for i in range(0, len(s), n):
-        yield s[i : i + n]
+class StreamRequest(BaseModel):
+    text: str = Field(..., description="Plain text to synthesize")
+    piper_model: str = Field(..., description="Piper short key or ONNX path")
+    lang: Optional[str] = Field(None, description="Sentence splitting hint, e.g. 'de' or 'en'")
+    format: Literal["wav", "pcm", "ogg", "mp3"] = Field(
+        "wav",
+        description="'wav' → streaming WAV header + PCM; 'pcm' → raw s16le mono; "
+                    "'ogg'/'mp3' → encoded on the fly (Opus in Ogg, MP3)",
+    )
+    bitrate: Optional[str] = Field(
+        None, pattern=r"^\d+k?$", description="Encoder bitrate for 'ogg'/'mp3', e.g. '32k'"
+    )
+    segment_chars: int = Field(
+        400, ge=50, le=4000, description="Max characters synthesized per step; smaller → faster first audio"
+    )
 
 @app.get("/api/models")
 def list_models():
-    """List Piper short keys available via model_repo.py."""
-    return {"models": sorted(MODELS.keys())}
+    """List Piper short keys available via model_repo.py, with install/index details."""
+    from text2audio.model_registry import list_models as indexed
+    return {"models": sorted(MODELS.keys()), "voices": indexed()}
+
+@app.get("/api/voice-cache")
+def voice_cache_stats():
+    """Loaded Piper voices plus hit/miss/eviction counters."""
+    from text2audio.voice_cache import stats
+    return stats()
+
+@app.delete("/api/voice-cache")
+def voice_cache_clear():
+    from text2audio.voice_cache import invalidate
+    return {"status": "ok", "dropped": invalidate()}
+
+@app.get("/api/engines/pyttsx3")
+def pyttsx3_pool_stats():
+    """pyttsx3 worker pool: size, live workers, dispatch and restart counters."""
+    from text2audio.pyttsx3_pool import get_pool
+    return get_pool().stats()
+
+@app.get("/api/routing")
+def routing_stats():
+    """Per-path circuit breakers (Piper Python API → CLI, pyttsx3 → espeak): state, errors, skips."""
+    from text2audio.routing import stats
+    return stats()
+
+@app.delete("/api/routing")
+def routing_reset():
+    """Close all breakers, e.g. after fixing the host; the next calls try the primary paths again."""
+    from text2audio.routing import reset
+    return {"status": "ok", "closed": reset()}
+
+@app.get("/api/cache")
+def result_cache_stats():
+    """Synthesis result cache and sentence cache: size, budget and hit/miss counters (this process)."""
+    from text2audio.result_cache import RESULTS
+    from text2audio.segment_cache import SEGMENTS
+    return {**RESULTS.stats(), "segments": SEGMENTS.stats()}
+
+@app.delete("/api/cache")
+def result_cache_clear():
+    from text2audio.result_cache import RESULTS
+    from text2audio.segment_cache import SEGMENTS
+    return {"status": "ok", "removed": RESULTS.clear(), "segments_removed": SEGMENTS.clear()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """Prometheus text format: stage/synthesis latency, RTF, characters, cache, fallbacks, in-flight."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
-@app.post("/api/synthesize")
-def synthesize_json(payload: SynthesizeRequest):
+@app.get("/ready")
+def ready():
+    """Readiness probe: 200 once configured voices are loaded and warmed up, else 503."""
+    from text2audio.warmup import READINESS
+    snap = READINESS.snapshot()
+    return JSONResponse(snap, status_code=200 if snap["ready"] else 503)
+
+def _check_request(payload: SynthesizeRequest) -> str:
+    """Validate a synthesis request and fill in defaults; returns the stripped text."""
     text = (payload.text or "").strip()
     if not text:
         raise HTTPException(422, "Field 'text' must be a non-empty string.")
-
-    # Piper voice pre-check (downloads model if needed)
-    if payload.backend == "piper":
-        if not payload.piper_model:
-            raise HTTPException(422, "backend='piper' requires 'piper_model'.")
-        if payload.piper_model in MODELS:
-            ensure_model(payload.piper_model)  # download if missing
+    if payload.backend == "piper" and not payload.piper_model:
+        raise HTTPException(422, "backend='piper' requires 'piper_model'.")
 
     # Determine default filename if not supplied
     if not payload.filename:
         payload.filename = "speech.wav" if payload.backend in ("piper", "pyttsx3") else "speech.mp3"
+    return text
 
-    # Ensure output path
+def _output_path(payload: SynthesizeRequest) -> Path:
     out_path = (OUTPUT_DIR / payload.filename).resolve()
     out_path.parent.mkdir(parents=True, exist_ok=True)
+    return out_path
+
+def _run_job(request: dict, on_progress, cancel) -> dict:
+    payload = SynthesizeRequest(**request)
+    text = _check_request(payload)
+    if payload.backend == "piper" and payload.piper_model in MODELS:
+        ensure_model(payload.piper_model)
+    result = synthesize_chunked(
+        text,
+        _output_path(payload),
+        backend=payload.backend,
+        lang=payload.lang,
+        piper_model=payload.piper_model if payload.backend == "piper" else None,
+        chunk_size=payload.chunk_size,
+        mode=payload.chunk_output,
+        pause_ms=payload.pause_ms,
+        parallelism=payload.parallelism,
+        cancel=cancel,
+        cache=payload.cache,
+        on_progress=on_progress,
+        bitrate=payload.bitrate,
+        sample_rate=payload.sample_rate,
+        channels=payload.channels,
+    )
+    if payload.chunk_output == "zip":
+        return {"zip": str(result["zip"]), "outputs": result["outputs"]}
+    return {"output": str(result["output"])}
+
+JOBS = JobManager(JOBS_DB, _run_job, workers=JOB_WORKERS)
+
+@app.post("/api/synthesize")
+def synthesize_json(payload: SynthesizeRequest):
+    text = _check_request(payload)
+
+    # Piper voice pre-check (downloads model if needed)
+    if payload.backend == "piper" and payload.piper_model in MODELS:
+        ensure_model(payload.piper_model)  # download if missing
+
+    # Ensure output path
+    out_path = _output_path(payload)
 
     try:
-        # Chunked flow → multiple files + a ZIP in /data
+        # Chunked flow → one concatenated file (or a stored ZIP) in /data
         if payload.chunking and len(text) > payload.chunk_size:
-            tmpdir = Path(tempfile.mkdtemp(prefix="tts_chunks_"))
-            paths: List[Path] = []
-            stem = out_path.stem
-            suffix = out_path.suffix
-
-            for idx, part in enumerate(_chunk_iter(text, payload.chunk_size), start=1):
-                part_out = tmpdir / f"{stem}_{idx}{suffix}"
-                final_part = synthesize(
-                    part,
-                    backend=payload.backend,
-                    out=str(part_out),
-                    piper_model=payload.piper_model if payload.backend == "piper" else None,
+            result = synthesize_chunked(
+                text,
+                out_path,
+                backend=payload.backend,
+                lang=payload.lang,
+                piper_model=payload.piper_model if payload.backend == "piper" else None,
+                chunk_size=payload.chunk_size,
+                mode=payload.chunk_output,
+                pause_ms=payload.pause_ms,
+                parallelism=payload.parallelism,
+                cache=payload.cache,
+                bitrate=payload.bitrate,
+                sample_rate=payload.sample_rate,
+                channels=payload.channels,
+            )
+            if payload.chunk_output == "zip":
+                return JSONResponse(
+                    {
+                        "status": "ok",
+                        "outputs": result["outputs"],
+                        "zip": str(result["zip"]),
+                        "message": f"Saved {result['chunks']} chunks to ZIP.",
+                    }
                 )
-                paths.append(final_part)
-
-            zip_path = out_path.with_suffix(".zip")
-            with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-                for p in paths:
-                    zf.write(p, arcname=p.name)
-
             return JSONResponse(
                 {
                     "status": "ok",
-                    "outputs": [str(p) for p in paths],
-                    "zip": str(zip_path),
-                    "message": f"Saved {len(paths)} chunks and ZIP.",
+                    "output": str(result["output"]),
+                    "chunks": result["chunks"],
+                    "message": f"Joined {result['chunks']} chunks into one file.",
                 }
             )
 
@@ -106,8 +285,14 @@ def synthesize_json(payload: SynthesizeRequest):
         final = synthesize(
             text,
             backend=payload.backend,
+            lang=payload.lang,
             out=str(out_path),
             piper_model=payload.piper_model if payload.backend == "piper" else None,
+            cache=payload.cache,
+            sentence_cache=payload.sentence_cache,
+            bitrate=payload.bitrate,
+            sample_rate=payload.sample_rate,
+            channels=payload.channels,
         )
         return {"status": "ok", "output": str(final)}
 
@@ -115,3 +300,127 @@ def synthesize_json(payload: SynthesizeRequest):
         raise
     except Exception as e:
         raise HTTPException(500, f"Synthesis failed: {e}")
+
+@app.post("/api/synthesize/stream")
+def synthesize_stream(payload: StreamRequest):
+    """Stream Piper audio while it is generated (first bytes after the first segment)."""
+    from text2audio.streaming import stream_piper
+
+    text = (payload.text or "").strip()
+    if not text:
+        raise HTTPException(422, "Field 'text' must be a non-empty string.")
+    try:
+        if payload.format in ("ogg", "mp3"):
+            from text2audio.encode import require_ffmpeg
+            require_ffmpeg()  # encode_stream starts ffmpeg only once the body is sent; fail before the 200
+        rate, chunks = stream_piper(
+            text,
+            payload.piper_model,
+            lang=payload.lang,
+            segment_chars=payload.segment_chars,
+            container="pcm" if payload.format in ("ogg", "mp3") else payload.format,
+        )
+    except Exception as e:
+        raise HTTPException(500, f"Synthesis failed: {e}")
+
+    if payload.format in ("ogg", "mp3"):
+        from text2audio.encode import encode_stream
+        chunks = encode_stream(chunks, rate, f".{payload.format}", bitrate=payload.bitrate)
+        media_type = "audio/ogg" if payload.format == "ogg" else "audio/mpeg"
+    elif payload.format == "wav":
+        media_type = "audio/wav"
+    else:
+        media_type = f"audio/L16; rate={rate}; channels=1"
+    return StreamingResponse(chunks, media_type=media_type, headers={"X-Sample-Rate": str(rate)})
+
+@app.post("/api/documents/stream")
+def document_stream(
+    file: UploadFile = File(..., description=".pdf, .docx or .txt"),
+    backend: str = Form("piper", pattern="^(gtts|pyttsx3|piper)$"),
+    lang: str = Form("en"),
+    piper_model: Optional[str] = Form(None),
+    use_ocr: bool = Form(False),
+    ocr_lang: str = Form("eng+deu"),
+    chunk_size: int = Form(1200, ge=200, le=8000),
+    cache: bool = Form(True),
+):
+    """Extract, segment and synthesize a document concurrently; audio streams as chunks finish."""
+    import itertools
+    import shutil
+    import tempfile
+    from text2audio.backends import resolve_piper_model
+    from text2audio.pipeline import document_to_audio, iter_audio_bytes
+
+    suffix = Path(file.filename or "").suffix.lower()
+    if suffix not in (".pdf", ".docx", ".txt"):
+        raise HTTPException(422, "Unsupported file type. Supported: .pdf, .docx, .txt")
+    if backend == "piper":
+        if not piper_model:
+            raise HTTPException(422, "backend='piper' requires 'piper_model'.")
+        try:
+            piper_model = str(resolve_piper_model(piper_model))
+        except Exception as e:
+            raise HTTPException(500, f"Synthesis failed: {e}")
+
+    tmp = tempfile.NamedTemporaryFile(prefix="tts_upload_", suffix=suffix, delete=False)
+    with tmp:
+        shutil.copyfileobj(file.file, tmp)  # uploads are spooled to disk; never held whole in memory
+    fmt = "mp3" if backend == "gtts" else "wav"
+
+    def body():
+        try:
+            chunks = document_to_audio(
+                tmp.name, backend=backend, lang=lang, piper_model=piper_model, chunk_size=chunk_size,
+                use_ocr=use_ocr, ocr_lang=ocr_lang, cache=cache,
+            )
+            yield from iter_audio_bytes(chunks, fmt)
+        finally:
+            Path(tmp.name).unlink(missing_ok=True)
+
+    stream = body()
+    try:
+        first = next(stream)  # surface extraction/synthesis errors before the response starts
+    except StopIteration:
+        raise HTTPException(422, "No text found in document.")
+    except Exception as e:
+        raise HTTPException(500, f"Synthesis failed: {e}")
+    media_type = "audio/mpeg" if fmt == "mp3" else "audio/wav"
+    return StreamingResponse(itertools.chain([first], stream), media_type=media_type)
+
+@app.post("/api/jobs", status_code=202)
+def create_job(payload: SynthesizeRequest):
+    """Queue a (long) synthesis and return immediately; chunking is always on for jobs."""
+    _check_request(payload)
+    job_id = JOBS.submit(payload.model_dump())
+    return {"status": "queued", "id": job_id}
+
+@app.get("/api/jobs")
+def list_jobs(limit: int = 50):
+    return {"jobs": [_job_view(j) for j in JOBS.list(limit)]}
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(404, f"Unknown job: {job_id}")
+    return _job_view(job)
+
+@app.delete("/api/jobs/{job_id}")
+def cancel_job(job_id: str):
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(404, f"Unknown job: {job_id}")
+    if not JOBS.cancel(job_id):
+        raise HTTPException(409, f"Job already {job['status']}.")
+    return {"status": "cancelling", "id": job_id}
+
+def _job_view(job: dict) -> dict:
+    return {
+        "id": job["id"],
+        "status": job["status"],
+        "progress": {"done": job["done"], "total": job["total"]},
+        "outputs": job["outputs"],
+        "error": job["error"],
+        "created": job["created"],
+        "updated": job["updated"],
+    }
@@ -0,0 +1,262 @@
+# audio.py
+"""Small audio helpers: streaming WAV/MP3 concatenation."""
+from __future__ import annotations
+import os
+import struct
+import wave
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+_BLOCK_FRAMES = 1 << 16
+_UNKNOWN_SIZE = 0xFFFFFFFF
+_MP3_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+_MP3_KBPS = {3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+             2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)}
+
+
+class FormatMismatch(RuntimeError):
+    """Parts to be joined have different sample rates, widths or channel counts."""
+
+
+def wav_header(
+    sample_rate: int,
+    nchannels: int = 1,
+    sampwidth: int = 2,
+    data_size: Optional[int] = None,
+) -> bytes:
+    """
+    44-byte PCM WAV header. Without data_size the RIFF and data sizes are set
+    to 0xFFFFFFFF, which players treat as "read until end of stream".
+    """
+    if data_size is None:
+        riff_size = data_len = _UNKNOWN_SIZE
+    else:
+        riff_size, data_len = 36 + data_size, data_size
+    byte_rate = sample_rate * nchannels * sampwidth
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", riff_size, b"WAVE",
+        b"fmt ", 16, 1, nchannels, sample_rate, byte_rate, nchannels * sampwidth, sampwidth * 8,
+        b"data", data_len,
+    )
+
+
+class WavConcatWriter:
+    """
+    Append the PCM frames of several WAV files into one WAV file.
+
+    Each appended file is read once, block by block; earlier audio is never
+    re-read. Output goes to a temporary sibling and is moved into place on
+    close(), so readers never see a half-written file.
+    """
+
+    def __init__(self, out: Union[str, Path], pause_ms: int = 0):
+        self.out = Path(out)
+        self.pause_ms = max(0, int(pause_ms))
+        self._tmp = self.out.with_name(f".{self.out.name}.part")
+        self._wf: Optional[wave.Wave_write] = None
+        self._params: Optional[Tuple[int, int, int]] = None
+        self.count = 0
+
+    def _open(self, nchannels: int, sampwidth: int, framerate: int) -> wave.Wave_write:
+        self.out.parent.mkdir(parents=True, exist_ok=True)
+        wf = wave.open(str(self._tmp), "wb")
+        wf.setnchannels(nchannels)
+        wf.setsampwidth(sampwidth)
+        wf.setframerate(framerate)
+        self._params = (nchannels, sampwidth, framerate)
+        return wf
+
+    def write_silence(self, ms: int) -> None:
+        if self._wf is None or self._params is None or ms <= 0:
+            return
+        nchannels, sampwidth, framerate = self._params
+        frames = framerate * ms // 1000
+        self._wf.writeframesraw(b"\0" * (frames * nchannels * sampwidth))
+
+    def write_frames(self, pcm: bytes, nchannels: int, sampwidth: int, framerate: int) -> None:
+        """Append raw PCM in the given format (must match earlier appends)."""
+        if self._wf is None:
+            self._wf = self._open(nchannels, sampwidth, framerate)
+        elif self._params != (nchannels, sampwidth, framerate):
+            raise FormatMismatch(
+                f"Cannot concatenate WAV with format {(nchannels, sampwidth, framerate)}; "
+                f"expected {self._params}"
+            )
+        self._wf.writeframesraw(pcm)
+
+    def append(self, wav_path: Union[str, Path]) -> None:
+        with wave.open(str(wav_path), "rb") as src:
+            fmt = (src.getnchannels(), src.getsampwidth(), src.getframerate())
+            self.write_frames(b"", *fmt)  # opens the output / checks the format
+            if self.count:
+                self.write_silence(self.pause_ms)
+            while True:
+                block = src.readframes(_BLOCK_FRAMES)
+                if not block:
+                    break
+                self.write_frames(block, *fmt)
+        self.count += 1
+
+    def close(self) -> Path:
+        if self._wf is None:
+            raise RuntimeError("No audio was appended.")
+        self._wf.close()  # patches the RIFF/data sizes in the header once
+        self._wf = None
+        os.replace(self._tmp, self.out)
+        return self.out
+
+    def abort(self) -> None:
+        if self._wf is not None:
+            try:
+                self._wf.close()
+            except Exception:
+                pass
+            self._wf = None
+        self._tmp.unlink(missing_ok=True)
+
+    def __enter__(self) -> "WavConcatWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _skip_id3v2(data: bytes) -> bytes:
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        return data[10 + size :]
+    return data
+
+
+def mp3_frames(data: bytes, first: bool = False) -> bytes:
+    """MP3 data ready to append to a stream: no ID3v1 trailer, no ID3v2 header unless first."""
+    if not first:
+        data = _skip_id3v2(data)
+    if data[-128:-125] == b"TAG":
+        data = data[:-128]  # ID3v1 trailer
+    return data
+
+
+def _mp3_frame(data: bytes, i: int) -> Optional[Tuple[int, int, int]]:
+    """(sample rate, samples, size in bytes) of the Layer III frame at data[i], or None."""
+    if i + 4 > len(data):
+        return None
+    b1, b2 = data[i + 1], data[i + 2]
+    version, bi, ri = (b1 >> 3) & 3, b2 >> 4, (b2 >> 2) & 3
+    if data[i] != 0xFF or (b1 & 0xE6) != 0xE2 or version == 1 or bi in (0, 15) or ri == 3:
+        return None
+    rate = _MP3_RATES[version][ri]
+    samples = 1152 if version == 3 else 576
+    return rate, samples, samples // 8 * _MP3_KBPS[3 if version == 3 else 2][bi] * 1000 // rate + ((b2 >> 1) & 1)
+
+
+def _mp3_first_header(data: bytes) -> Optional[bytes]:
+    data = _skip_id3v2(data)
+    for i in range(len(data) - 3):
+        if _mp3_frame(data, i) is not None:
+            return data[i:i + 4]
+    return None
+
+
+def mp3_silence(header: bytes, ms: int) -> bytes:
+    """
+    Silent frames in the format of the frame header: no CRC, no padding and
+    zeroed side info, so every granule decodes to zeros. Rounded up to whole frames.
+    """
+    header = bytes([header[0], header[1] | 0x01, header[2] & ~0x02 & 0xFF, header[3]])
+    rate, samples, size = _mp3_frame(header, 0)  # type: ignore[misc]
+    frames = -(-ms * rate // (1000 * samples)) if ms > 0 else 0
+    return (header + bytes(size - 4)) * frames
+
+
+def mp3_seconds(data: bytes) -> float:
+    """Duration of an MPEG-1/2/2.5 Layer III stream, counted frame by frame."""
+    data, i, seconds = _skip_id3v2(data), 0, 0.0
+    while i + 4 <= len(data):
+        frame = _mp3_frame(data, i)
+        if frame is None:
+            i += 1  # not a Layer III frame header; resync
+            continue
+        rate, samples, size = frame
+        seconds += samples / rate
+        i += max(size, 1)
+    return seconds
+
+
+def audio_seconds(path: Union[str, Path]) -> float:
+    """Duration of a WAV or MP3 file."""
+    if Path(path).suffix.lower() == ".wav":
+        with wave.open(str(path), "rb") as wf:
+            return wf.getnframes() / float(wf.getframerate())
+    return mp3_seconds(Path(path).read_bytes())
+
+
+class Mp3ConcatWriter:
+    """
+    Join MP3 streams frame-wise. MPEG audio frames are self-contained, so
+    dropping the ID3 tags of later parts yields one continuous stream.
+    Pauses are written as silent frames (see mp3_silence()). Parts must share
+    MPEG version, sample rate and channel mode, as one stream cannot change them.
+    """
+
+    def __init__(self, out: Union[str, Path], pause_ms: int = 0):
+        self.out = Path(out)
+        self.pause_ms = max(0, int(pause_ms))
+        self._tmp = self.out.with_name(f".{self.out.name}.part")
+        self._fh = None
+        self._format: Optional[Tuple[int, int, int]] = None
+        self.count = 0
+
+    def append(self, mp3_path: Union[str, Path]) -> None:
+        data = Path(mp3_path).read_bytes()
+        header = _mp3_first_header(data)
+        if header is not None:
+            fmt = ((header[1] >> 3) & 3, (header[2] >> 2) & 3, header[3] >> 6)
+            if self._format is None:
+                self._format = fmt
+            elif fmt != self._format:
+                raise FormatMismatch(f"Cannot concatenate MP3 with format {fmt}; expected {self._format}")
+        if self._fh is None:
+            self.out.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = open(self._tmp, "wb")
+        if self.count and self.pause_ms and header is not None:
+            self._fh.write(mp3_silence(header, self.pause_ms))
+        self._fh.write(mp3_frames(data, first=not self.count))
+        self.count += 1
+
+    def close(self) -> Path:
+        if self._fh is None:
+            raise RuntimeError("No audio was appended.")
+        self._fh.close()
+        self._fh = None
+        os.replace(self._tmp, self.out)
+        return self.out
+
+    def abort(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        self._tmp.unlink(missing_ok=True)
+
+    def __enter__(self) -> "Mp3ConcatWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def concat_writer(out: Union[str, Path], pause_ms: int = 0):
+    """Pick the concatenation writer for out's extension (.wav or .mp3)."""
+    suffix = Path(out).suffix.lower()
+    if suffix == ".wav":
+        return WavConcatWriter(out, pause_ms=pause_ms)
+    if suffix == ".mp3":
+        return Mp3ConcatWriter(out, pause_ms=pause_ms)
+    raise ValueError(f"Cannot concatenate {suffix or 'extensionless'} audio; use .wav or .mp3")
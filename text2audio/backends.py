@@ -1,6 +1,7 @@
 from pathlib import Path
 from typing import Optional, Union
-import shutil, subprocess, inspect
+import shutil, subprocess
+from text2audio import lazy, metrics
 
 def _prep_out(out: Path) -> Path:
     out = out.expanduser().resolve()
@@ -8,25 +9,49 @@ def _prep_out(out: Path) -> Path:
     return out
 
 def tts_gtts(text: str, lang: str = "en", out: Path = Path("out.mp3")) -> Path:
-    from gtts import gTTS
+    from text2audio import gtts_http
     out = _prep_out(out)
-    tts = gTTS(text=text, lang=lang)
-    tts.save(str(out))
+    if gtts_http.enabled():
+        with metrics.timed("gtts"):
+            return gtts_http.synthesize_to_mp3(text, lang, out)  # concurrent token requests
+    gtts = lazy.load("gtts", "gTTS not installed. Install with: pip install gTTS")
+    tts = gtts.gTTS(text=text, lang=lang)
+    with metrics.timed("gtts"):
+        tts.save(str(out))
     if not out.exists():
         raise RuntimeError(f"gTTS reported success but file not found: {out}")
     return out
 
 # text2audio/backends.py
+def _espeak() -> Optional[str]:
+    return shutil.which("espeak") or shutil.which("espeak-ng")
+
+
+def _probe(synth, *args) -> None:
+    """Background health probe: synthesize a short phrase into a throwaway file."""
+    import tempfile
+    from text2audio.routing import PROBE_PHRASE
+
+    with tempfile.TemporaryDirectory(prefix="tts_probe_") as tmp:
+        synth(PROBE_PHRASE, *args, Path(tmp) / "probe.wav")
+
+
+def _pyttsx3_engine(text: str, lang: Optional[str], out: Path) -> Path:
+    from text2audio.pyttsx3_pool import synthesize_to_wav  # one engine per worker process
+
+    with metrics.timed("pyttsx3"):
+        return Path(synthesize_to_wav(text, str(out), voice_lang=lang))
+
+
 def tts_pyttsx3(text: str, lang: Optional[str] = None, out: Path = Path("out.wav")) -> Path:
-    from pyttsx3_engine import synthesize_to_wav
-    import shutil, subprocess, tempfile
+    from text2audio import routing
 
     out = _prep_out(out)
-    try:
-        return Path(synthesize_to_wav(text, str(out), voice_lang=lang))
-    except Exception as e_py:
+
+    def espeak(e_py: BaseException) -> Path:
         # Fallback to espeak CLI
-        es = shutil.which("espeak") or shutil.which("espeak-ng")
+        metrics.FALLBACKS.inc(backend="pyttsx3", fallback="espeak")
+        es = _espeak()
         if not es:
             raise RuntimeError(f"pyttsx3 failed ({e_py}) and no espeak/espeak-ng CLI in PATH")
         cmd = [es, "-w", str(out)]
@@ -34,11 +59,42 @@ def tts_pyttsx3(text: str, lang: Optional[str] = None, out: Path = Path("out.wav
             # espeak lang codes look like 'en', 'de', 'en-us' etc.
             cmd += ["-v", lang]
         # Use stdin to avoid quote/escape headaches
-        cp = subprocess.run(cmd, input=text.encode("utf-8"), check=False)
+        with metrics.timed("espeak"):
+            cp = subprocess.run(cmd, input=text.encode("utf-8"), check=False)
         if cp.returncode != 0 or (not out.exists() or out.stat().st_size == 0):
             raise RuntimeError(f"espeak CLI failed with code {cp.returncode}") from e_py
         return out
 
+    # After repeated pyttsx3 failures go straight to espeak (see routing.py).
+    return routing.route(
+        "pyttsx3",
+        lambda: _pyttsx3_engine(text, lang, out),
+        espeak,
+        probe=lambda: _probe(_pyttsx3_engine, None),
+        fallback_ready=lambda: _espeak() is not None,
+    )
+
+
+def resolve_piper_model(model: Union[str, Path]) -> Path:
+    """
+    Map a short key (auto-downloaded) or .onnx path to a validated model path.
+    Raises for gzipped/LFS/HTML files and for a missing .onnx.json sidecar
+    (see model_registry).
+    """
+    # Resolve model path (and auto-download if using short key)
+    if isinstance(model, str) and "/" not in model and "\\" not in model:
+        from text2audio.model_repo import ensure_model  # your helper module
+        onnx_path, _ = ensure_model(model)
+        model_path = onnx_path
+    else:
+        model_path = Path(model).expanduser().resolve()
+
+    # Header checks, sidecar and checksum are validated once and kept in the
+    # models index; here that costs a stat() unless the file changed.
+    from text2audio.model_registry import validated
+    validated(model_path)
+    return model_path
+
 
 def tts_piper(
     text: str,
@@ -49,62 +105,63 @@ def tts_piper(
     Robust Piper backend:
       • supports model short-keys (auto-download) or direct .onnx path
       • adapts to old/new Python APIs
-      • falls back to 'piper' CLI if Python API fails
+      • falls back to 'piper' CLI if Python API fails, and goes to the CLI
+        directly while the Python API's circuit breaker is open
     """
+    from text2audio import routing
+
     out = _prep_out(out)
+    model_path = resolve_piper_model(model)
 
-    # Resolve model path (and auto-download if using short key)
-    if isinstance(model, str) and "/" not in model and "\\" not in model:
-        from text2audio.model_repo import ensure_model  # your helper module
-        onnx_path, _ = ensure_model(model)
-        model_path = onnx_path
-    else:
-        model_path = Path(model).expanduser().resolve()
+    # Python API first, the CLI after repeated failures of it (see routing.py).
+    return routing.route(
+        "piper_python",
+        lambda: _piper_python(text, model_path, out),
+        lambda py_err: _piper_cli(text, model_path, out, py_err),
+        scope=model_path.name,
+        probe=lambda: _probe(_piper_python, model_path),
+        fallback_ready=lambda: shutil.which("piper") is not None,
+    )
+
+
+def _piper_python(text: str, model_path: Path, out: Path) -> Path:
+    import wave
+    from text2audio.routing import BackendError
+    from text2audio.streaming import iter_piper_pcm
+    from text2audio.voice_cache import get_voice
+
+    try:
+        voice = get_voice(model_path)  # loaded once per process, see voice_cache.py
+    except Exception as e:  # piper not installed, or the model won't load
+        raise BackendError(f"Piper voice could not be loaded: {e}") from e
 
-    # Guard common file issues early
-    sig = model_path.read_bytes()[:256]
-    if sig.startswith(b"\x1f\x8b"):
-        raise RuntimeError(f"{model_path.name} is gzipped (.onnx.gz). Decompress first.")
-    if sig.startswith(b"version https://git-lfs"):
-        raise RuntimeError(f"{model_path.name} is a Git LFS pointer. Download the real model.")
-    if b"<html" in sig.lower() or b"<!doctype html" in sig.lower():
-        raise RuntimeError(f"{model_path.name} looks like an HTML page, not a model.")
-    sidecar = model_path.with_suffix(model_path.suffix + ".json")
-    if not sidecar.exists():
-        raise FileNotFoundError(f"Missing sidecar next to model: {sidecar.name}")
-
-    # ---------- Try Python API first ----------
     try:
-        import wave
-        from piper import PiperVoice
-        
-        voice = PiperVoice.load(model_path)
+        with metrics.timed("piper_inference"), wave.open(str(out), "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(int(voice.config.sample_rate))
+            for pcm in iter_piper_pcm(voice, text):
+                wf.writeframes(pcm)
+    except Exception as e:
+        if type(e).__module__.startswith("onnxruntime"):  # onnxruntime's own error types
+            raise BackendError(f"Piper inference failed: {e}") from e
+        raise
 
-        with wave.open(str(out), "wb") as wf:
-            voice.synthesize_wav(text, wf)
+    if not out.exists() or out.stat().st_size == 0:
+        raise BackendError("Piper produced no audio via Python API.")
+    return out
 
-        if not out.exists() or out.stat().st_size == 0:
-            raise RuntimeError("Piper produced no audio via Python API.")
-        return out
 
-    except Exception as py_err:
-        # ---------- Fallback to CLI ----------
-        cli = shutil.which("piper")
-        if not cli:
-            raise RuntimeError(f"Piper Python API failed ({py_err}). Also no 'piper' CLI found in PATH. "
-                               f"Install CLI with: pip install piper-tts") from py_err
-
-        cmd = [
-            cli, "--model", str(model_path),
-            "--output_file", str(out),
-            "--text", text,
-        ]
-
-        try:
-            subprocess.run(cmd, check=True)
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"Piper CLI failed: {e}") from py_err
-
-        if not out.exists() or out.stat().st_size == 0:
-            raise RuntimeError("Piper produced no audio via CLI.")
-        return out
\ No newline at end of file
+def _piper_cli(text: str, model_path: Path, out: Path, py_err: BaseException) -> Path:
+    metrics.FALLBACKS.inc(backend="piper", fallback="cli")
+    cli = shutil.which("piper")
+    if not cli:
+        raise RuntimeError(f"Piper Python API failed ({py_err}). Also no 'piper' CLI found in PATH. "
+                           f"Install CLI with: pip install piper-tts") from py_err
+
+    from text2audio import piper_cli
+    try:
+        with metrics.timed("piper_cli"):
+            return piper_cli.synthesize(cli, model_path, text, out)
+    except (RuntimeError, OSError) as e:
+        raise RuntimeError(f"Piper CLI failed: {e}") from py_err
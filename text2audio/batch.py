@@ -0,0 +1,293 @@
+# batch.py
+"""
+Bulk conversion in one process: a JSONL manifest or a directory of
+.txt/.pdf/.docx files in, one audio file per item out.
+
+    text2audio batch manifest.jsonl -o out/ -b piper --piper-model "Thorsten (DE)" -w 4
+    text2audio batch docs/ -o out/ --format ogg
+
+Manifest lines are JSON objects with ``text`` or ``file`` and optionally
+``id``, ``out``, ``backend``, ``piper_model`` (alias ``voice``), ``lang``,
+``use_ocr``; missing fields take the command-line defaults.
+
+Python start-up, imports and model loads are paid once: chunks of all items
+go to the shared pools of parallel.py, whose workers keep their voices
+loaded (voice_cache.py). Outputs are written atomically and existing ones
+are skipped, so an interrupted run resumes where it stopped. Each item's
+outcome is appended to a results JSONL as soon as it is known.
+"""
+from __future__ import annotations
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Union
+
+DOCUMENT_SUFFIXES = (".txt", ".pdf", ".docx")
+
+
+@dataclass
+class BatchItem:
+    id: str
+    out: Path
+    backend: str
+    lang: str = "en"
+    piper_model: Optional[str] = None
+    text: Optional[str] = None
+    file: Optional[Path] = None
+    use_ocr: bool = False
+
+    @property
+    def source(self) -> str:
+        return str(self.file) if self.file is not None else "<text>"
+
+
+def _output(out_dir: Path, name: str, backend: str, fmt: Optional[str]) -> Path:
+    from text2audio import encode
+
+    path = out_dir / name
+    suffix = f".{fmt.lstrip('.')}" if fmt else path.suffix
+    return path.with_suffix(encode.output_suffix(suffix, backend))
+
+
+def items_from_manifest(
+    manifest: Union[str, Path], out_dir: Path, *, backend: str, lang: str = "en",
+    piper_model: Optional[str] = None, fmt: Optional[str] = None, use_ocr: bool = False,
+) -> Iterator[BatchItem]:
+    """
+    One BatchItem per non-empty manifest line; relative ``file`` paths are
+    relative to the manifest. ``out`` (or ``id``) names a path below out_dir;
+    lines whose output would land outside it are rejected.
+    """
+    manifest = Path(manifest)
+    root = out_dir.resolve()
+    with open(manifest, encoding="utf-8") as fh:
+        for lineno, line in enumerate(fh, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{manifest}:{lineno}: invalid JSON ({e})") from e
+            if not isinstance(row, dict) or not (row.get("text") or row.get("file")):
+                raise ValueError(f"{manifest}:{lineno}: needs a 'text' or 'file' field")
+            item_id = str(row.get("id") or lineno)
+            file = Path(row["file"]).expanduser() if row.get("file") else None
+            if file is not None and not file.is_absolute():
+                file = manifest.parent / file
+            item_backend = row.get("backend") or backend
+            out = _output(root, str(row.get("out") or item_id), item_backend, None if row.get("out") else fmt).resolve()
+            if root not in out.parents:
+                raise ValueError(f"{manifest}:{lineno}: output {out} is outside {out_dir}")
+            yield BatchItem(
+                id=item_id,
+                out=out,
+                backend=item_backend,
+                lang=row.get("lang") or lang,
+                piper_model=row.get("piper_model") or row.get("voice") or piper_model,
+                text=row.get("text"),
+                file=file,
+                use_ocr=bool(row.get("use_ocr", use_ocr)),
+            )
+
+
+def items_from_directory(
+    directory: Union[str, Path], out_dir: Path, *, backend: str, lang: str = "en",
+    piper_model: Optional[str] = None, fmt: Optional[str] = None, use_ocr: bool = False,
+) -> Iterator[BatchItem]:
+    """Every .txt/.pdf/.docx below directory; outputs mirror the relative layout."""
+    directory = Path(directory)
+    for path in sorted(p for p in directory.rglob("*") if p.is_file() and p.suffix.lower() in DOCUMENT_SUFFIXES):
+        rel = path.relative_to(directory)
+        yield BatchItem(
+            id=rel.as_posix(),
+            out=_output(out_dir, str(rel.with_suffix("")), backend, fmt),
+            backend=backend,
+            lang=lang,
+            piper_model=piper_model,
+            file=path,
+            use_ocr=use_ocr,
+        )
+
+
+def convert(item: BatchItem, *, chunk_size: int = 1200, cache: Optional[bool] = None,
+            cancel: Optional[threading.Event] = None, **encoding: Any) -> Dict[str, Any]:
+    """Synthesize one item into item.out; returns output path, characters and chunks."""
+    from text2audio.chunked import synthesize_chunked
+    from text2audio.pipeline import document_to_file
+
+    item.out.parent.mkdir(parents=True, exist_ok=True)
+    model = item.piper_model if item.backend == "piper" else None
+    if item.file is not None:
+        out, chunks = document_to_file(
+            item.file, item.out, backend=item.backend, lang=item.lang, piper_model=model,
+            chunk_size=chunk_size, use_ocr=item.use_ocr, cache=cache, cancel=cancel, **encoding,
+        )
+        return {"output": str(out), "chunks": chunks}
+    text = (item.text or "").strip()
+    if not text:
+        raise ValueError("empty text")
+    result = synthesize_chunked(
+        text, item.out, backend=item.backend, lang=item.lang, piper_model=model,
+        chunk_size=chunk_size, cancel=cancel, cache=cache, **encoding,
+    )
+    return {"output": str(result["output"]), "chunks": result["chunks"], "chars": len(text)}
+
+
+def run(
+    items: Iterator[BatchItem],
+    *,
+    results: Optional[Union[str, Path]] = None,
+    jobs: int = 2,
+    force: bool = False,
+    chunk_size: int = 1200,
+    cache: Optional[bool] = None,
+    encoding: Optional[Dict[str, Any]] = None,
+    total: Optional[int] = None,
+    on_progress: Optional[Callable[[Dict[str, Any], Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Convert items with up to ``jobs`` items in flight and return a summary.
+    Every outcome ({"id", "status": ok|skipped|failed, ...}) is appended to
+    ``results`` and passed to ``on_progress(outcome, summary)``.
+    """
+    summary: Dict[str, Any] = {"total": total, "ok": 0, "skipped": 0, "failed": 0, "chars": 0,
+                               "elapsed_s": 0.0}
+    cancel = threading.Event()
+    seen: Set[Path] = set()
+    t0 = time.perf_counter()
+    fh = open(results, "a", encoding="utf-8") if results else None
+
+    def _finish(outcome: Dict[str, Any]) -> None:
+        summary[outcome["status"]] += 1
+        summary["chars"] += outcome.get("chars") or 0
+        summary["elapsed_s"] = time.perf_counter() - t0
+        if fh is not None:
+            fh.write(json.dumps(outcome, ensure_ascii=False) + "\n")
+            fh.flush()
+        if on_progress:
+            on_progress(outcome, summary)
+
+    def _one(item: BatchItem) -> Dict[str, Any]:
+        started = time.perf_counter()
+        done = convert(item, chunk_size=chunk_size, cache=cache, cancel=cancel, **(encoding or {}))
+        return {"id": item.id, "source": item.source, "status": "ok",
+                "seconds": round(time.perf_counter() - started, 3), **done}
+
+    pool = ThreadPoolExecutor(max_workers=max(1, jobs), thread_name_prefix="tts-batch")
+    inflight: Dict[Future, BatchItem] = {}
+    try:
+        for item in items:
+            if item.out in seen:
+                _finish({"id": item.id, "source": item.source, "status": "failed",
+                         "error": f"duplicate output {item.out}"})
+                continue
+            seen.add(item.out)
+            if item.out.exists() and not force:
+                _finish({"id": item.id, "source": item.source, "status": "skipped", "output": str(item.out)})
+                continue
+            while len(inflight) >= max(1, jobs):
+                _collect(wait(inflight, return_when=FIRST_COMPLETED).done, inflight, _finish)
+            inflight[pool.submit(_one, item)] = item
+        while inflight:
+            _collect(wait(inflight, return_when=FIRST_COMPLETED).done, inflight, _finish)
+    except BaseException:
+        cancel.set()  # Ctrl-C: running items stop at their next chunk
+        raise
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        if fh is not None:
+            fh.close()
+    summary["elapsed_s"] = time.perf_counter() - t0
+    return summary
+
+
+def _collect(done: Set[Future], inflight: Dict[Future, BatchItem],
+             finish: Callable[[Dict[str, Any]], None]) -> None:
+    for fut in done:
+        item = inflight.pop(fut)
+        try:
+            outcome = fut.result()
+        except Exception as e:
+            outcome = {"id": item.id, "source": item.source, "status": "failed", "error": f"{type(e).__name__}: {e}"}
+        finish(outcome)
+
+
+def _print_progress(outcome: Dict[str, Any], summary: Dict[str, Any]) -> None:
+    n = summary["ok"] + summary["skipped"] + summary["failed"]
+    of = f"/{summary['total']}" if summary["total"] else ""
+    elapsed = max(summary["elapsed_s"], 1e-9)
+    detail = outcome.get("error") or outcome.get("output", "")
+    rate = f"{summary['ok'] / elapsed:.2f} items/s"
+    if summary["chars"]:  # known for text items; documents are counted as items only
+        rate += f", {summary['chars'] / elapsed:.0f} chars/s"
+    print(f"[{n}{of}] {outcome['status']:<7} {outcome['id']}  {detail}  ({rate})", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="text2audio batch", description="Convert a JSONL manifest or a directory.")
+    ap.add_argument("source", help="JSONL manifest, or a directory of .txt/.pdf/.docx files")
+    ap.add_argument("-o", "--out-dir", required=True, help="Output directory")
+    ap.add_argument("-b", "--backend", choices=["gtts", "pyttsx3", "piper"], default="piper")
+    ap.add_argument("--piper-model", default=None, help="Default Piper voice (short key or .onnx path)")
+    ap.add_argument("-l", "--lang", default="en")
+    ap.add_argument("--format", default=None, help="Output format: wav, mp3, ogg, opus, flac (default: backend's)")
+    ap.add_argument("--bitrate", default=None)
+    ap.add_argument("--sample-rate", type=int, default=None)
+    ap.add_argument("--channels", type=int, default=None)
+    ap.add_argument("-w", "--workers", type=int, default=None,
+                    help="Synthesis workers (chunks in flight across all items; default TEXT2AUDIO_MAX_PARALLEL)")
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="Items in flight (default: --workers)")
+    ap.add_argument("--chunk-size", type=int, default=1200)
+    ap.add_argument("--ocr", action="store_true", help="OCR PDFs")
+    ap.add_argument("--force", action="store_true", help="Re-create outputs that already exist")
+    ap.add_argument("--no-cache", action="store_true")
+    ap.add_argument("--results", default=None, help="Results JSONL (default: <out-dir>/batch-results.jsonl)")
+    args = ap.parse_args(argv)
+
+    from text2audio import parallel
+
+    if args.workers:
+        parallel.configure(args.workers)
+    out_dir = Path(args.out_dir).expanduser().resolve()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    src = Path(args.source).expanduser()
+    opts = dict(backend=args.backend, lang=args.lang, piper_model=args.piper_model, fmt=args.format,
+                use_ocr=args.ocr)
+    reader = items_from_directory if src.is_dir() else items_from_manifest
+    # Listing is cheap next to synthesis; knowing the total makes progress readable.
+    items = list(reader(src, out_dir, **opts))
+
+    from text2audio.model_repo import MODELS, ensure_model
+    for model in {i.piper_model for i in items if i.backend == "piper"}:
+        if not model:
+            print("Piper items need --piper-model or a 'piper_model' field.", file=sys.stderr)
+            return 2
+        if model in MODELS:
+            ensure_model(model)  # download once, before workers start
+
+    summary = run(
+        iter(items),
+        results=args.results or out_dir / "batch-results.jsonl",
+        jobs=args.jobs or parallel.MAX_PARALLEL,
+        force=args.force,
+        chunk_size=args.chunk_size,
+        cache=False if args.no_cache else None,
+        encoding=dict(bitrate=args.bitrate, sample_rate=args.sample_rate, channels=args.channels),
+        total=len(items),
+        on_progress=_print_progress,
+    )
+    elapsed = max(summary["elapsed_s"], 1e-9)
+    summary["items_per_s"] = round(summary["ok"] / elapsed, 3)
+    summary["chars_per_s"] = round(summary["chars"] / elapsed, 1)
+    summary["elapsed_s"] = round(summary["elapsed_s"], 3)
+    print(json.dumps(summary))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
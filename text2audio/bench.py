@@ -0,0 +1,442 @@
+# bench.py
+"""
+Benchmarks for backends and pipeline stages.
+
+    text2audio bench                                   # fake backend + stages, offline
+    text2audio bench -b piper --piper-model "Thorsten (DE)" --json run.json
+    text2audio bench --compare baseline.json run.json  # exit 1 on regressions
+
+Per backend/voice: model load time, time to first audio, real-time factor,
+characters per second and p50/p95/p99 latency for several text lengths,
+plus the process' peak RSS. Stages: segmentation, WAV concat, ZIP, and text
+extraction (.txt, .pdf when pdfminer is installed).
+
+The ``fake`` backend is deterministic (fixed load time, fixed compute and
+audio duration per character) so runs are comparable on CI without
+network or voice models. Results are JSON; ``--compare`` flags p50
+timings that got slower than a baseline by more than ``--tolerance``.
+"""
+from __future__ import annotations
+import argparse
+import json
+import math
+import os
+import platform
+import struct
+import sys
+import tempfile
+import time
+import wave
+import zipfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from text2audio.audio import audio_seconds
+
+DEFAULT_LENGTHS = (50, 200, 1000)
+DEFAULT_REPEATS = 5
+_REPORT_VERSION = 1
+
+_SAMPLE = (
+    "The quick brown fox jumps over the lazy dog. Dr. Smith arrived at 10 a.m. and "
+    "asked whether the report, which ran to forty pages, was ready; nobody answered. "
+    "Speech synthesis turns written text into audio, one sentence at a time! "
+    "Does it sound natural? That depends on the voice, the model and the text. "
+)
+
+
+def sample_text(chars: int) -> str:
+    """Deterministic English text of about ``chars`` characters, cut at a word boundary."""
+    text = _SAMPLE * (chars // len(_SAMPLE) + 1)
+    cut = text.rfind(" ", 0, chars + 1)
+    return text[: cut if cut > 0 else chars].strip()
+
+
+# ---------- statistics ----------
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """Linear-interpolated percentile (p in 0..100)."""
+    xs = sorted(values)
+    if not xs:
+        return float("nan")
+    k = (len(xs) - 1) * p / 100.0
+    lo, hi = math.floor(k), math.ceil(k)
+    return xs[lo] + (xs[hi] - xs[lo]) * (k - lo)
+
+
+def summarize(values: Sequence[float]) -> Dict[str, float]:
+    return {
+        "n": len(values),
+        "mean": sum(values) / len(values) if values else float("nan"),
+        "min": min(values) if values else float("nan"),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else float("nan"),
+    }
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process and its (waited-for) children."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+             resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(kb / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)  # bytes on macOS
+
+
+def timeit(fn: Callable[[], Any], repeats: int) -> Dict[str, float]:
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return summarize(times)
+
+
+# ---------- fake backend ----------
+
+class _FakeConfig:
+    sample_rate = 22050
+
+
+class FakeVoice:
+    """
+    Stand-in for a Piper voice: fixed load time, ``compute_s_per_char`` of
+    "inference" per sentence, ``audio_s_per_char`` of deterministic PCM.
+    Uses the pre-1.3 streaming API, which iter_piper_pcm() understands.
+    """
+
+    config = _FakeConfig()
+
+    def __init__(self, load_s: float = 0.05, compute_s_per_char: float = 2e-4, audio_s_per_char: float = 1 / 15):
+        time.sleep(load_s)
+        self.compute_s_per_char = compute_s_per_char
+        self.audio_s_per_char = audio_s_per_char
+
+    def synthesize_stream_raw(self, text: str) -> Iterator[bytes]:
+        from text2audio.segment import iter_sentences
+
+        for sentence in iter_sentences(text):
+            time.sleep(len(sentence) * self.compute_s_per_char)
+            yield fake_pcm(len(sentence) * self.audio_s_per_char, self.config.sample_rate)
+
+
+def fake_pcm(seconds: float, rate: int = 22050) -> bytes:
+    """A ~220 Hz tone as s16le mono (one period, repeated)."""
+    n, period = int(seconds * rate), max(1, rate // 220)
+    wave_ = struct.pack(f"<{period}h", *(int(8000 * math.sin(2 * math.pi * i / period)) for i in range(period)))
+    return (wave_ * (n // period + 1))[: 2 * n]
+
+
+def write_fake_wav(path: Path, seconds: float, rate: int = 22050) -> Path:
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(fake_pcm(seconds, rate))
+    return path
+
+
+def make_pdf(pages: Sequence[str]) -> bytes:
+    """Minimal text PDF (Helvetica, one line per page) for extraction benchmarks."""
+    font = 3 + 2 * len(pages)
+    objs = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(len(pages)))}] /Count {len(pages)} >>",
+    ]
+    for i, text in enumerate(pages):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objs.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+                    f"/Resources << /Font << /F1 {font} 0 R >> >> >>")
+        objs.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objs.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    out, offsets = "%PDF-1.4\n", []
+    for n, obj in enumerate(objs, 1):
+        offsets.append(len(out))
+        out += f"{n} 0 obj\n{obj}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n" + "".join(f"{o:010d} 00000 n \n" for o in offsets)
+    out += f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return out.encode("latin-1")
+
+
+# ---------- backends ----------
+
+class _Target:
+    """One backend/voice under test: load() once, then run(text) → (ttfa_s, total_s, audio_s)."""
+
+    name = ""
+    voice = ""
+
+    def load(self) -> None:
+        pass
+
+    def run(self, text: str) -> Tuple[float, float, float]:
+        raise NotImplementedError
+
+
+class _StreamTarget(_Target):
+    """Piper-like voices: audio arrives sentence by sentence via iter_piper_pcm()."""
+
+    def __init__(self, name: str, voice: str, loader: Callable[[], Any]):
+        self.name, self.voice, self._loader = name, voice, loader
+        self._voice: Any = None
+
+    def load(self) -> None:
+        self._voice = self._loader()
+
+    def run(self, text: str) -> Tuple[float, float, float]:
+        from text2audio.streaming import iter_piper_pcm
+
+        t0 = time.perf_counter()
+        first, nbytes = None, 0
+        for pcm in iter_piper_pcm(self._voice, text):
+            if first is None:
+                first = time.perf_counter() - t0
+            nbytes += len(pcm)
+        total = time.perf_counter() - t0
+        return first if first is not None else total, total, nbytes / 2 / int(self._voice.config.sample_rate)
+
+
+class _FileTarget(_Target):
+    """gTTS/pyttsx3: one finished file per call, so time to first audio is the total."""
+
+    def __init__(self, backend: str, lang: str, tmpdir: Path):
+        self.name = self.voice = backend
+        self._lang, self._tmpdir = lang, tmpdir
+
+    def load(self) -> None:
+        self.run("Hello.")  # engine start-up / connection setup
+
+    def run(self, text: str) -> Tuple[float, float, float]:
+        from text2audio.core import synthesize
+
+        t0 = time.perf_counter()
+        out = synthesize(text, backend=self.name, lang=self._lang,  # type: ignore[arg-type]
+                         out=str(self._tmpdir / f"bench_{self.name}"), cache=False)
+        total = time.perf_counter() - t0
+        seconds = audio_seconds(out)
+        out.unlink(missing_ok=True)
+        return total, total, seconds
+
+
+def _piper_loader(model: str) -> Callable[[], Any]:
+    def _load() -> Any:
+        from text2audio.backends import resolve_piper_model
+        from text2audio.voice_cache import get_voice, invalidate
+
+        path = resolve_piper_model(model)
+        invalidate(path)  # measure a cold load
+        return get_voice(path)
+    return _load
+
+
+def bench_backend(target: _Target, lengths: Sequence[int], repeats: int) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    target.load()
+    load_s = time.perf_counter() - t0
+
+    by_length: Dict[str, Any] = {}
+    for n in lengths:
+        text = sample_text(n)
+        target.run(text)  # warm-up, not recorded
+        ttfa, total, rtf, cps = [], [], [], []
+        for _ in range(repeats):
+            first, took, audio = target.run(text)
+            ttfa.append(first)
+            total.append(took)
+            rtf.append(took / audio if audio else float("inf"))
+            cps.append(len(text) / took if took else float("inf"))
+        by_length[str(n)] = {
+            "chars": len(text),
+            "latency_s": summarize(total),
+            "ttfa_s": summarize(ttfa),
+            "rtf": percentile(rtf, 50),
+            "chars_per_s": percentile(cps, 50),
+        }
+    return {"backend": target.name, "voice": target.voice, "load_s": load_s,
+            "lengths": by_length, "peak_rss_mb": peak_rss_mb()}
+
+
+# ---------- pipeline stages ----------
+
+def bench_stages(tmpdir: Path, repeats: int = DEFAULT_REPEATS, chunks: int = 20,
+                 chunk_s: float = 5.0) -> Dict[str, Any]:
+    from text2audio.audio import concat_writer
+    from text2audio.file_to_text import extract_text_from_bytes
+    from text2audio.segment import iter_segments
+
+    stages: Dict[str, Any] = {}
+
+    text = sample_text(200_000)
+    stats = timeit(lambda: sum(1 for _ in iter_segments(text, 1200, lang="en")), repeats)
+    stages["segment"] = {"chars": len(text), "time_s": stats, "chars_per_s": len(text) / stats["p50"]}
+
+    files = [write_fake_wav(tmpdir / f"chunk_{i}.wav", chunk_s) for i in range(1, chunks + 1)]
+    nbytes = sum(f.stat().st_size for f in files)
+
+    def _concat() -> None:
+        with concat_writer(tmpdir / "joined.wav") as writer:
+            for f in files:
+                writer.append(f)
+
+    def _zip() -> None:
+        with zipfile.ZipFile(tmpdir / "chunks.zip", "w", compression=zipfile.ZIP_STORED) as zf:
+            for f in files:
+                zf.write(f, arcname=f.name)
+
+    for name, fn in (("concat_wav", _concat), ("zip", _zip)):
+        stats = timeit(fn, repeats)
+        stages[name] = {"chunks": chunks, "bytes": nbytes, "time_s": stats, "mb_per_s": nbytes / 2**20 / stats["p50"]}
+
+    txt = sample_text(500_000).encode("utf-8")
+    stats = timeit(lambda: extract_text_from_bytes("bench.txt", txt, cache=False), repeats)
+    stages["extract_txt"] = {"bytes": len(txt), "time_s": stats, "mb_per_s": len(txt) / 2**20 / stats["p50"]}
+
+    try:
+        import pdfminer  # noqa: F401
+    except ImportError:
+        stages["extract_pdf"] = {"skipped": "pdfminer.six not installed"}
+    else:
+        pages = [sample_text(80).replace("(", "").replace(")", "") for _ in range(50)]
+        pdf = make_pdf(pages)
+        stats = timeit(lambda: extract_text_from_bytes("bench.pdf", pdf, cache=False), repeats)
+        stages["extract_pdf"] = {"pages": len(pages), "time_s": stats, "pages_per_s": len(pages) / stats["p50"]}
+    return stages
+
+
+# ---------- runs and comparison ----------
+
+def run(
+    backends: Sequence[str] = ("fake",),
+    *,
+    piper_models: Sequence[str] = (),
+    lang: str = "en",
+    lengths: Sequence[int] = DEFAULT_LENGTHS,
+    repeats: int = DEFAULT_REPEATS,
+    stages: bool = True,
+    on_info: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """Run the selected benchmarks and return a JSON-serializable report."""
+    report: Dict[str, Any] = {
+        "version": _REPORT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "lengths": list(lengths),
+        "repeats": repeats,
+        "backends": [],
+    }
+    with tempfile.TemporaryDirectory(prefix="tts_bench_") as tmp:
+        tmpdir = Path(tmp)
+        targets: List[_Target] = []
+        for backend in backends:
+            if backend == "fake":
+                targets.append(_StreamTarget("fake", "fake", FakeVoice))
+            elif backend == "piper":
+                if not piper_models:
+                    raise ValueError("backend 'piper' needs at least one --piper-model")
+                targets += [_StreamTarget("piper", m, _piper_loader(m)) for m in piper_models]
+            elif backend in ("gtts", "pyttsx3"):
+                targets.append(_FileTarget(backend, lang, tmpdir))
+            else:
+                raise ValueError(f"Unknown backend: {backend}")
+        for target in targets:
+            if on_info:
+                on_info(f"backend {target.name} ({target.voice})")
+            report["backends"].append(bench_backend(target, lengths, repeats))
+        if stages:
+            if on_info:
+                on_info("pipeline stages")
+            report["stages"] = bench_stages(tmpdir, repeats)
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+
+def _timings(report: Dict[str, Any]) -> Dict[str, float]:
+    """Flatten a report to {metric: p50 seconds} for comparison."""
+    out: Dict[str, float] = {}
+    for b in report.get("backends", []):
+        prefix = f"{b['backend']}[{b['voice']}]"
+        out[f"{prefix}.load_s"] = b["load_s"]
+        for n, m in b["lengths"].items():
+            out[f"{prefix}.{n}.latency_s"] = m["latency_s"]["p50"]
+            out[f"{prefix}.{n}.ttfa_s"] = m["ttfa_s"]["p50"]
+    for name, s in report.get("stages", {}).items():
+        if "time_s" in s:
+            out[f"stage.{name}"] = s["time_s"]["p50"]
+    return out
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = 0.2) -> List[str]:
+    """Metrics whose p50 time grew by more than ``tolerance`` (0.2 = 20 %)."""
+    old, new = _timings(baseline), _timings(current)
+    return [
+        f"{k}: {old[k]:.4f}s → {new[k]:.4f}s (+{(new[k] / old[k] - 1) * 100:.0f}%)"
+        for k in sorted(old.keys() & new.keys())
+        if old[k] > 0 and new[k] > old[k] * (1 + tolerance)
+    ]
+
+
+def _print_summary(report: Dict[str, Any]) -> None:
+    for b in report["backends"]:
+        print(f"{b['backend']} [{b['voice']}]  load {b['load_s']:.3f}s  peak RSS {b['peak_rss_mb']} MB")
+        for n, m in b["lengths"].items():
+            lat = m["latency_s"]
+            print(f"  {n:>6} chars  p50 {lat['p50']:.3f}s  p95 {lat['p95']:.3f}s  p99 {lat['p99']:.3f}s  "
+                  f"ttfa {m['ttfa_s']['p50']:.3f}s  RTF {m['rtf']:.3f}  {m['chars_per_s']:.0f} chars/s")
+    for name, s in report.get("stages", {}).items():
+        print(f"stage {name:<12} " + (f"skipped: {s['skipped']}" if "skipped" in s
+                                       else f"p50 {s['time_s']['p50'] * 1000:.1f} ms"))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="text2audio bench", description="Benchmark backends and pipeline stages.")
+    ap.add_argument("-b", "--backend", action="append", choices=["fake", "gtts", "pyttsx3", "piper"],
+                    help="Backend to measure (repeatable; default: fake).")
+    ap.add_argument("--piper-model", action="append", default=[], help="Piper voice (repeatable).")
+    ap.add_argument("-l", "--lang", default="en")
+    ap.add_argument("--lengths", default=",".join(map(str, DEFAULT_LENGTHS)),
+                    help="Comma-separated text lengths in characters.")
+    ap.add_argument("-n", "--repeats", type=int, default=DEFAULT_REPEATS)
+    ap.add_argument("--no-stages", action="store_true", help="Skip the pipeline stage benchmarks.")
+    ap.add_argument("--json", default=None, help="Write the report to this file ('-' = stdout).")
+    ap.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), default=None,
+                    help="Compare two JSON reports instead of running; exit 1 on regressions.")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="Allowed p50 slowdown for --compare (0.2 = 20%%).")
+    args = ap.parse_args(argv)
+
+    if args.compare:
+        base, cur = (json.loads(Path(p).read_text(encoding="utf-8")) for p in args.compare)
+        regressions = compare(base, cur, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+        return 1 if regressions else 0
+
+    report = run(
+        args.backend or ["fake"],
+        piper_models=args.piper_model,
+        lang=args.lang,
+        lengths=[int(x) for x in args.lengths.split(",") if x.strip()],
+        repeats=args.repeats,
+        stages=not args.no_stages,
+        on_info=lambda msg: print(f"… {msg}", file=sys.stderr),
+    )
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return 0
+    _print_summary(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(args.json)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
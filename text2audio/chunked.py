@@ -0,0 +1,113 @@
+# chunked.py
+"""Long-text synthesis: segment → parallel synthesis → one gapless file (or a stored ZIP)."""
+from __future__ import annotations
+import tempfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Literal, Optional, Union
+
+from text2audio import encode, metrics
+from text2audio.audio import concat_writer
+from text2audio.parallel import synthesize_parts
+from text2audio.segment import DEFAULT_MAX_CHARS, iter_segments
+
+ChunkOutput = Literal["concat", "zip"]
+
+
+def synthesize_chunked(
+    text: str,
+    out: Union[str, Path],
+    *,
+    backend: str,
+    lang: str = "en",
+    piper_model: Optional[Union[str, Path]] = None,
+    chunk_size: int = DEFAULT_MAX_CHARS,
+    mode: ChunkOutput = "concat",
+    pause_ms: int = 0,
+    parallelism: Optional[int] = None,
+    cancel: Optional[threading.Event] = None,
+    cache: Optional[bool] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    bitrate: Optional[str] = None,
+    sample_rate: Optional[int] = None,
+    channels: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Split text into segments, synthesize them concurrently and assemble them.
+
+    mode="concat" appends every chunk's audio to ``out`` as soon as it is next
+    in order (WAV frames, or MP3 frames for gTTS); mode="zip" stores the chunk
+    files uncompressed in ``out`` with a .zip suffix. Chunk files live in a
+    temporary directory that is removed afterwards.
+
+    Chunks are synthesized and joined in the backend's native format; when
+    ``out`` asks for another one (.ogg, .flac, ...), the joined file (or each
+    zipped chunk) is encoded afterwards, see encode.py.
+    """
+    out_path = Path(out).expanduser().resolve()
+    # Same suffix rules as core.synthesize().
+    out_path = out_path.with_suffix(encode.output_suffix(out_path.suffix, backend))
+    opts = dict(bitrate=bitrate, sample_rate=sample_rate, channels=channels)
+    suffix = encode.native_suffix(backend)
+    encoded = encode.needs_encoding(suffix, out_path.suffix, **opts)
+    parts = list(iter_segments(text, chunk_size, lang=lang))
+    total = len(parts)
+    stem = out_path.stem
+
+    with tempfile.TemporaryDirectory(prefix="tts_chunks_") as tmp:
+        tmpdir = Path(tmp)
+        chunks = synthesize_parts(
+            parts,
+            lambda idx: tmpdir / f"{stem}_{idx}{suffix}",
+            backend=backend,
+            lang=lang,
+            piper_model=str(piper_model) if piper_model is not None else None,
+            parallelism=parallelism,
+            cancel=cancel,
+            cache=cache,
+        )
+
+        if mode == "zip":
+            zip_path = out_path.with_suffix(".zip")
+            names = []
+            packing = 0.0  # time spent writing the archive, not waiting for chunks
+            # Audio is already compressed (MP3) or incompressible PCM: store, don't deflate.
+            try:
+                with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as zf:
+                    for idx, chunk in chunks:
+                        if encoded:
+                            raw, chunk = chunk, encode.transcode(chunk, chunk.with_suffix(out_path.suffix), **opts)
+                            raw.unlink(missing_ok=True)
+                        t0 = time.perf_counter()
+                        zf.write(chunk, arcname=chunk.name)
+                        packing += time.perf_counter() - t0
+                        names.append(chunk.name)
+                        chunk.unlink(missing_ok=True)
+                        if on_progress:
+                            on_progress(idx, total)
+            except BaseException:
+                zip_path.unlink(missing_ok=True)
+                raise
+            metrics.record("zip", packing)
+            return {"zip": zip_path, "outputs": names, "chunks": len(names)}
+
+        if mode != "concat":
+            raise ValueError(f"Unknown chunk output mode: {mode}")
+
+        joined = tmpdir / f"{stem}{suffix}" if encoded else out_path
+        joining = 0.0
+        with concat_writer(joined, pause_ms=pause_ms) as writer:
+            for idx, chunk in chunks:
+                t0 = time.perf_counter()
+                writer.append(chunk)
+                joining += time.perf_counter() - t0
+                chunk.unlink(missing_ok=True)
+                if on_progress:
+                    on_progress(idx, total)
+        metrics.record("concat", joining)
+        if encoded:
+            with metrics.timed("encode"):
+                encode.transcode(joined, out_path, **opts)
+        return {"output": out_path, "chunks": writer.count}
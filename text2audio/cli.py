@@ -1,17 +1,65 @@
 import sys
 import argparse
 from pathlib import Path
-from text2audio.core import synthesize
+from text2audio.segment import iter_segments
+
+# Keep this module cheap to import: `--help` and argument errors should not
+# pay for the backends. Heavy modules are imported once a command needs them.
 
 def main():
-    ap = argparse.ArgumentParser(description="Text → Audio")
+    if sys.argv[1:2] == ["bench"]:  # text2audio bench … → see bench.py
+        from text2audio.bench import main as bench_main
+        sys.exit(bench_main(sys.argv[2:]))
+    if sys.argv[1:2] == ["batch"]:  # text2audio batch … → see batch.py
+        from text2audio.batch import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+
+    ap = argparse.ArgumentParser(
+        description="Text → Audio (`text2audio batch --help` for bulk runs, `text2audio bench --help` for benchmarks)"
+    )
     ap.add_argument("-t", "--text", help="Text to speak. If omitted, read from stdin.", default=None)
     ap.add_argument("-f", "--file", help="Read text from file.", default=None)
     ap.add_argument("-b", "--backend", choices=["gtts", "pyttsx3", "piper"], default="gtts")
     ap.add_argument("--piper-model", default=None, help="Path to Piper .onnx model")
     ap.add_argument("-l", "--lang", default="en", help="Language code (e.g., en, de, fr).")
-    ap.add_argument("-o", "--out", default="out.mp3", help="Output path (.mp3 for gTTS, .wav for pyttsx3).")
+    ap.add_argument("-o", "--out", default="out.mp3", help="Output path; the extension picks the format (.wav, .mp3, .ogg/.opus, .flac). "
+                         "Others fall back to .mp3 for gTTS, .wav for pyttsx3/Piper.")
+    ap.add_argument("--chunk-size", type=int, default=None,
+                    help="Split long text at sentence boundaries into chunks of at most N chars "
+                         "(writes <out>_1, <out>_2, ...).")
+    ap.add_argument("--bitrate", default=None, help="Encoder bitrate for .mp3/.ogg/.opus output, e.g. 48k.")
+    ap.add_argument("--sample-rate", type=int, default=None, help="Resample the output to this rate (Hz).")
+    ap.add_argument("--channels", type=int, default=None, help="Output channels (1 = downmix to mono).")
+    ap.add_argument("--no-cache", action="store_true", help="Do not read or write the synthesis result cache.")
+    ap.add_argument("-d", "--document", default=None,
+                    help="Read a .pdf/.docx/.txt document; extraction and synthesis run concurrently "
+                         "and chunks are appended to --out as they finish.")
+    ap.add_argument("--ocr", action="store_true", help="OCR PDF pages (needs tesseract + poppler).")
+    ap.add_argument("--ocr-lang", default="eng+deu", help="Tesseract languages for --ocr.")
     args = ap.parse_args()
+    encoding = dict(bitrate=args.bitrate, sample_rate=args.sample_rate, channels=args.channels)
+
+    if args.document:
+        from text2audio.pipeline import document_to_file
+
+        out, _ = document_to_file(
+            args.document,
+            args.out,
+            backend=args.backend,
+            lang=args.lang,
+            piper_model=args.piper_model,
+            chunk_size=args.chunk_size or 1200,
+            use_ocr=args.ocr,
+            ocr_lang=args.ocr_lang,
+            cache=False if args.no_cache else None,
+            on_info=lambda msg: print(msg, file=sys.stderr),
+            on_chunk=lambda idx: print(f"chunk {idx} done", file=sys.stderr),
+            **encoding,
+        )
+        print(out)
+        return
+
+    from text2audio.core import synthesize
 
     if args.text is None and args.file is None:
         text = sys.stdin.read()
@@ -24,11 +72,29 @@ def main():
         print("No text provided.", file=sys.stderr)
         sys.exit(1)
 
+    if args.chunk_size and len(text) > args.chunk_size:
+        out = Path(args.out)
+        parts = iter_segments(text, args.chunk_size, lang=args.lang)
+        for idx, part in enumerate(parts, start=1):
+            print(synthesize(
+                part,
+                backend=args.backend,
+                lang=args.lang,
+                out=str(out.with_name(f"{out.stem}_{idx}{out.suffix}")),
+                piper_model=args.piper_model,
+                cache=False if args.no_cache else None,
+                **encoding,
+            ))
+        return
+
     out_path = synthesize(
         text,
         backend=args.backend,
+        lang=args.lang,
         out=args.out,
         piper_model=args.piper_model,
+        cache=False if args.no_cache else None,
+        **encoding,
     )
     print(out_path)
 
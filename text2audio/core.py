@@ -1,9 +1,22 @@
+import time
 from pathlib import Path
 from typing import Literal, Optional, Union
-from text2audio.backends import tts_gtts, tts_pyttsx3, tts_piper
+from text2audio.backends import tts_gtts, tts_pyttsx3, tts_piper, resolve_piper_model
+from text2audio import encode, metrics, result_cache
+from text2audio.audio import audio_seconds
 
 Backend = Literal["gtts", "pyttsx3", "piper"]
 
+def _observe(backend: str, voice: str, chars: int, audio: Path, seconds: float) -> None:
+    metrics.SYNTH_SECONDS.observe(seconds, backend=backend, voice=voice)
+    metrics.CHARACTERS.inc(chars, backend=backend)
+    try:
+        duration = audio_seconds(audio)
+    except (OSError, EOFError, ValueError):
+        return  # unreadable/odd output: skip the real-time factor
+    if duration > 0:
+        metrics.RTF.observe(seconds / duration, backend=backend, voice=voice)
+
 def synthesize(
     text: str,
     backend: Backend = "gtts",
@@ -12,29 +25,101 @@ def synthesize(
     *,
     # Piper:
     piper_model: Optional[Union[str, Path]] = None,
+    # Result cache (None → TEXT2AUDIO_RESULT_CACHE, on by default):
+    cache: Optional[bool] = None,
+    # Per-sentence cache for re-synthesizing edited text (None → TEXT2AUDIO_SEGMENT_CACHE, off by default):
+    sentence_cache: Optional[bool] = None,
+    # Output encoding (None → TEXT2AUDIO_AUDIO_*; see encode.py):
+    bitrate: Optional[str] = None,
+    sample_rate: Optional[int] = None,
+    channels: Optional[int] = None,
 ) -> Path:
     out_path = Path(out).expanduser().resolve()
 
-    if backend == "gtts":
-        if out_path.suffix.lower() != ".mp3":
-            out_path = out_path.with_suffix(".mp3")
-        return tts_gtts(text, lang=lang, out=out_path)
-
-    elif backend == "pyttsx3":
-        if out_path.suffix.lower() != ".wav":
-            out_path = out_path.with_suffix(".wav")
-        return tts_pyttsx3(text, lang=lang, out=out_path)
-
-    elif backend == "piper":
-        if out_path.suffix.lower() != ".wav":
-            out_path = out_path.with_suffix(".wav")
-        if not piper_model:
-            raise ValueError("For backend='piper', provide piper_model (short key or path).")
+    model_path = None
+    if backend in ("gtts", "pyttsx3", "piper"):
+        # .wav/.mp3/.ogg/.opus/.flac are kept; anything else becomes the backend's native format.
+        suffix = encode.output_suffix(out_path.suffix, backend)
+        if out_path.suffix != suffix:
+            out_path = out_path.with_suffix(suffix)
+        if backend == "piper":
+            if not piper_model:
+                raise ValueError("For backend='piper', provide piper_model (short key or path).")
+            model_path = resolve_piper_model(piper_model)
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+
+    opts = dict(bitrate=bitrate, sample_rate=sample_rate, channels=channels)
+    native = encode.native_suffix(backend)
+    encoded = encode.needs_encoding(native, out_path.suffix, **opts)
+
+    key = None
+    if result_cache.RESULTS.use(cache):
+        # Native output keeps its plain-suffix key; encoded output includes the encoder settings.
+        fmt = encode.format_id(out_path.suffix, **opts) if encoded else out_path.suffix
+        key = result_cache.cache_key(text, backend, lang, fmt, model_path)
+        hit = result_cache.RESULTS.get(key, out_path)
+        metrics.CACHE.inc(result="miss" if hit is None else "hit")
+        if hit is not None:
+            return hit
+
+    from text2audio import segment_cache
+
+    # Texts of several sentences are joined from per-sentence audio, see segment_cache.py.
+    use_segments = segment_cache.enabled(sentence_cache) and cache is not False
+    units = segment_cache.split(text, lang) if use_segments else []
+
+    # Older versions hardlinked cache hits to out_path; unlink such a file so
+    # the backend writes a new one instead of through the link into the cache.
+    if out_path.exists() and out_path.stat().st_nlink > 1:
+        out_path.unlink()
+
+    # Backends write their native format; other formats are encoded from a sibling temp file.
+    raw_path = out_path.with_name(f".{out_path.stem}.raw{native}") if encoded else out_path
+    voice = model_path.stem if model_path is not None else lang
+
+    def run(part: str, dest: Path) -> Path:
+        if backend == "gtts":
+            return tts_gtts(part, lang=lang, out=dest)
+        if backend == "pyttsx3":
+            return tts_pyttsx3(part, lang=lang, out=dest)
         return tts_piper(
-            text,
-            model=piper_model,
-            out=out_path,
+            part,
+            model=model_path,
+            out=dest,
         )
 
-    else:
-        raise ValueError(f"Unknown backend: {backend}")
+    t0 = time.perf_counter()
+    try:
+        if len(units) > 1:
+            from text2audio.audio import FormatMismatch
+            from text2audio.parallel import REQUEST_PARALLEL
+
+            try:
+                final, chars = segment_cache.synthesize(
+                    units, raw_path, run, backend=backend, lang=lang, model_path=model_path,
+                    workers=REQUEST_PARALLEL,
+                )
+            except FormatMismatch:
+                # Sentences written by different paths (e.g. engine vs. CLI fallback) can't be joined.
+                final, chars = run(text, raw_path), len(text)
+        else:
+            final, chars = run(text, raw_path), len(text)
+        if metrics.ENABLED:
+            _observe(backend, voice, chars, final, time.perf_counter() - t0)
+        if encoded:
+            with metrics.timed("encode"):
+                final = encode.transcode(final, out_path, **opts)
+    except BaseException:
+        metrics.ERRORS.inc(backend=backend)
+        raise
+    finally:
+        if encoded:
+            raw_path.unlink(missing_ok=True)
+
+    if key is not None:
+        try:
+            result_cache.RESULTS.put(key, final)
+        except OSError:
+            pass  # a full or read-only cache must not fail synthesis
+    return final
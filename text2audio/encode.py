@@ -0,0 +1,179 @@
+# encode.py
+"""
+Output encoding: turn the WAV (Piper, pyttsx3) or MP3 (gTTS) a backend
+produced into the format the caller asked for, chosen by file extension.
+
+Encoding runs in an ffmpeg subprocess that reads the source file (or a PCM
+stream on stdin) and writes the target incrementally, so long outputs are
+never held in memory. File output goes to a temporary sibling and is moved
+into place when ffmpeg succeeds.
+"""
+from __future__ import annotations
+import os
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# suffix → (ffmpeg codec, ffmpeg muxer, lossy)
+FORMATS: Dict[str, Tuple[str, str, bool]] = {
+    ".wav": ("pcm_s16le", "wav", False),
+    ".mp3": ("libmp3lame", "mp3", True),
+    ".ogg": ("libopus", "ogg", True),
+    ".opus": ("libopus", "opus", True),
+    ".flac": ("flac", "flac", False),
+}
+_DEFAULT_BITRATE = {".mp3": "64k", ".ogg": "32k", ".opus": "32k"}
+
+# Empty / 0 → keep the format's default bitrate, the source rate and channel count.
+BITRATE = os.getenv("TEXT2AUDIO_AUDIO_BITRATE", "")
+SAMPLE_RATE = int(os.getenv("TEXT2AUDIO_AUDIO_SAMPLE_RATE", "0"))
+CHANNELS = int(os.getenv("TEXT2AUDIO_AUDIO_CHANNELS", "0"))
+
+
+def native_suffix(backend: str) -> str:
+    """What the backend writes itself: MP3 for gTTS, WAV for pyttsx3/Piper."""
+    return ".mp3" if backend == "gtts" else ".wav"
+
+
+def output_suffix(requested: str, backend: str) -> str:
+    """The requested extension if we can produce it, else the backend's native one."""
+    requested = requested.lower()
+    return requested if requested in FORMATS else native_suffix(backend)
+
+
+def options(
+    suffix: str,
+    bitrate: Optional[str] = None,
+    sample_rate: Optional[int] = None,
+    channels: Optional[int] = None,
+) -> Dict[str, Optional[Union[str, int]]]:
+    """Effective encoder settings for suffix (call arguments override the environment)."""
+    lossy = FORMATS[suffix.lower()][2]
+    return {
+        "bitrate": (bitrate or BITRATE or _DEFAULT_BITRATE.get(suffix.lower())) if lossy else None,
+        "sample_rate": sample_rate or SAMPLE_RATE or None,
+        "channels": channels or CHANNELS or None,
+    }
+
+
+def format_id(suffix: str, **opts: Optional[Union[str, int]]) -> str:
+    """Suffix plus encoder settings, for cache keys ("'.ogg:32k:24000:1'")."""
+    o = options(suffix, **opts)  # type: ignore[arg-type]
+    return ":".join([suffix.lower(), *(str(o[k] or "") for k in ("bitrate", "sample_rate", "channels"))])
+
+
+def needs_encoding(src_suffix: str, dst_suffix: str, **opts: Optional[Union[str, int]]) -> bool:
+    o = options(dst_suffix, **opts)  # type: ignore[arg-type]
+    return src_suffix.lower() != dst_suffix.lower() or bool(o["sample_rate"] or o["channels"])
+
+
+def require_ffmpeg() -> str:
+    """Path of the ffmpeg executable; RuntimeError if it is not installed."""
+    exe = shutil.which("ffmpeg")
+    if not exe:
+        raise RuntimeError("ffmpeg not found in PATH; it is needed to write compressed or resampled audio.")
+    return exe
+
+
+def _args(src: Path, tmp: Path, suffix: str, o: Dict[str, Optional[Union[str, int]]]) -> List[str]:
+    codec, muxer, _ = FORMATS[suffix]
+    cmd = [require_ffmpeg(), "-nostdin", "-hide_banner", "-loglevel", "error", "-y", "-i", str(src), "-vn"]
+    if o["channels"]:
+        cmd += ["-ac", str(o["channels"])]  # downmix
+    if o["sample_rate"]:
+        cmd += ["-ar", str(o["sample_rate"])]
+    cmd += ["-c:a", codec]
+    if o["bitrate"]:
+        cmd += ["-b:a", str(o["bitrate"])]
+    if codec == "libopus":
+        cmd += ["-application", "voip"]  # tuned for speech
+    return cmd + ["-f", muxer, str(tmp)]
+
+
+def transcode(
+    src: Union[str, Path],
+    out: Union[str, Path],
+    *,
+    bitrate: Optional[str] = None,
+    sample_rate: Optional[int] = None,
+    channels: Optional[int] = None,
+) -> Path:
+    """Encode src (any format ffmpeg reads) into out; the format follows out's extension."""
+    src, out = Path(src), Path(out)
+    suffix = out.suffix.lower()
+    if suffix not in FORMATS:
+        raise ValueError(f"Unsupported output format {suffix or '(none)'}; use one of {', '.join(FORMATS)}")
+    o = options(suffix, bitrate, sample_rate, channels)
+    tmp = out.with_name(f".{out.name}.{os.getpid()}.part")
+    cp = subprocess.run(_args(src, tmp, suffix, o), capture_output=True, text=True)
+    if cp.returncode != 0 or not tmp.exists() or tmp.stat().st_size == 0:
+        tmp.unlink(missing_ok=True)
+        raise RuntimeError(f"ffmpeg failed to encode {out.name}: {cp.stderr.strip()[-500:]}")
+    os.replace(tmp, out)
+    return out
+
+
+def encode_stream(
+    pcm: Iterable[bytes],
+    sample_rate: int,
+    suffix: str,
+    *,
+    in_channels: int = 1,
+    bitrate: Optional[str] = None,
+    out_rate: Optional[int] = None,
+    channels: Optional[int] = None,
+    block: int = 1 << 14,
+) -> Iterator[bytes]:
+    """
+    Encode a stream of s16le PCM pieces on the fly: a feeder thread writes
+    them to ffmpeg's stdin while encoded bytes are yielded as ffmpeg emits
+    them. Back-pressure flows through the pipes, so a slow consumer pauses
+    the producer instead of growing a buffer. Closing the generator stops
+    ffmpeg.
+    """
+    suffix = suffix.lower()
+    if suffix not in FORMATS:
+        raise ValueError(f"Unsupported output format {suffix}; use one of {', '.join(FORMATS)}")
+    o = options(suffix, bitrate, out_rate, channels)
+    cmd = _args(Path("pipe:0"), Path("pipe:1"), suffix, o)
+    i = cmd.index("-i")
+    cmd[i:i] = ["-f", "s16le", "-ar", str(sample_rate), "-ac", str(in_channels)]
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    failure: List[BaseException] = []
+
+    def _feed() -> None:
+        try:
+            for piece in pcm:
+                proc.stdin.write(piece)  # type: ignore[union-attr]
+        except BrokenPipeError:
+            pass  # ffmpeg exited (consumer closed or encoder error)
+        except BaseException as e:  # hand the error to the consumer
+            failure.append(e)
+        finally:
+            try:
+                proc.stdin.close()  # type: ignore[union-attr]
+            except OSError:
+                pass
+
+    feeder = threading.Thread(target=_feed, name="tts-encode", daemon=True)
+    feeder.start()
+    try:
+        while True:
+            data = proc.stdout.read1(block)  # type: ignore[union-attr]
+            if not data:
+                break
+            yield data
+        feeder.join()
+        if failure:
+            raise failure[0]
+        if proc.wait() != 0:
+            err = proc.stderr.read().decode("utf-8", "replace").strip()  # type: ignore[union-attr]
+            raise RuntimeError(f"ffmpeg failed to encode the stream: {err[-500:]}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        for f in (proc.stdout, proc.stderr):
+            f.close()  # type: ignore[union-attr]
@@ -0,0 +1,63 @@
+# extract_cache.py
+"""
+Cache of extracted document text.
+
+Keys cover a sha256 of the document bytes plus the extraction options (OCR
+on/off and OCR languages). PDFs are stored page by page, together with a
+page count once a document has been extracted completely, so a finished
+document is served without opening it and an interrupted extraction only
+redoes the missing pages. Entries are small files in a ResultCache: atomic
+writes, shared between processes, LRU eviction within a byte budget.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+from typing import Optional
+
+from text2audio.result_cache import DEFAULT_CACHE_DIR, ResultCache
+
+ENABLED = os.getenv("TEXT2AUDIO_EXTRACT_CACHE", "1").lower() not in ("0", "false", "no", "off")
+DEFAULT_MAX_MB = float(os.getenv("TEXT2AUDIO_EXTRACT_CACHE_MB", "256"))
+
+_KEY_VERSION = 1
+
+TEXTS = ResultCache(DEFAULT_CACHE_DIR / "extract", int(DEFAULT_MAX_MB * 1024 * 1024), enabled=ENABLED)
+
+
+def enabled(cache: Optional[bool] = None) -> bool:
+    return TEXTS.use(cache)
+
+
+def doc_key(digest: str, kind: str, use_ocr: bool = False, ocr_lang: Optional[str] = None) -> str:
+    """Key of one document + options; kind is the file type ("pdf", "docx")."""
+    payload = [_KEY_VERSION, digest, kind, bool(use_ocr), ocr_lang if use_ocr else None]
+    return hashlib.sha256(json.dumps(payload).encode("utf-8")).hexdigest()
+
+
+def _sub(doc: str, part: str) -> str:
+    return hashlib.sha256(f"{doc}:{part}".encode("ascii")).hexdigest()
+
+
+def get_text(doc: str, page: Optional[int] = None) -> Optional[str]:
+    data = TEXTS.get_bytes(doc if page is None else _sub(doc, f"p{page}"), ".txt")
+    return None if data is None else data.decode("utf-8")
+
+
+def put_text(doc: str, text: str, page: Optional[int] = None) -> None:
+    try:
+        TEXTS.put_bytes(doc if page is None else _sub(doc, f"p{page}"), text.encode("utf-8"), ".txt")
+    except OSError:
+        pass  # caching is best effort
+
+
+def get_page_count(doc: str) -> Optional[int]:
+    data = TEXTS.get_bytes(_sub(doc, "pages"), ".json")
+    return None if data is None else int(json.loads(data))
+
+
+def put_page_count(doc: str, pages: int) -> None:
+    try:
+        TEXTS.put_bytes(_sub(doc, "pages"), json.dumps(pages).encode("ascii"), ".json")
+    except OSError:
+        pass
@@ -1,20 +1,20 @@
 # file_to_text.py
 from __future__ import annotations
+import hashlib
 import io
+import os
 import tempfile
+from collections import deque
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
 
-# ---- Optional imports (lazily checked) ----
-try:
-    from pdfminer.high_level import extract_text as _pdf_extract_text
-except Exception:
-    _pdf_extract_text = None  # type: ignore
+from text2audio import lazy, metrics
 
-try:
-    import docx2txt as _docx2txt
-except Exception:
-    _docx2txt = None  # type: ignore
+OCR_WORKERS = max(1, int(os.getenv("TEXT2AUDIO_OCR_WORKERS", str(os.cpu_count() or 1))))
+OCR_DPI = int(os.getenv("TEXT2AUDIO_OCR_DPI", "300"))
+
+# ---- Optional imports (loaded on first use, see lazy.py) ----
+_docx2txt = lazy.module("docx2txt", "docx2txt not installed. Install with: pip install docx2txt")
 
 
 def has_ocr_stack() -> bool:
@@ -28,26 +28,328 @@ def has_ocr_stack() -> bool:
         return False
 
 
-def _ocr_pdf_bytes(
-    file_bytes: bytes,
+def _ocr_worker_init() -> None:
+    # One tesseract per core: stop each one from also spawning OpenMP threads.
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+@metrics.timed("ocr_page")  # recorded by whichever process runs it
+def _ocr_page(pdf_path: str, page: int, dpi: int, ocr_lang: str) -> str:
+    """Rasterize a single page and OCR it; only this page is ever in memory."""
+    import pytesseract
+    from pdf2image import convert_from_path
+
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=page, last_page=page)
+    try:
+        return "\n".join(pytesseract.image_to_string(img, lang=ocr_lang) for img in images)
+    finally:
+        for img in images:
+            img.close()
+
+
+def pdf_page_count(pdf_path: Path | str) -> int:
+    from pdf2image import pdfinfo_from_path
+    return int(pdfinfo_from_path(str(pdf_path))["Pages"])
+
+
+def iter_ocr_pages(
+    pdf_path: Path | str,
     *,
     ocr_lang: str = "eng+deu",
+    dpi: int = OCR_DPI,
+    workers: int = OCR_WORKERS,
+    pages: Optional[Sequence[int]] = None,
     on_info: Optional[Callable[[str], None]] = None,
-) -> str:
-    """OCR a PDF (bytes) page-by-page using pytesseract + pdf2image."""
-    import pytesseract
-    from pdf2image import convert_from_bytes
+) -> Iterator[str]:
+    """
+    Yield OCR text page by page, in page order (all pages, or the 1-based
+    ``pages`` given).
+
+    Pages are rasterized one at a time inside a process pool; at most
+    2 * workers pages are in flight, so memory does not grow with page count.
+    """
+    pdf_path = str(pdf_path)
+    total = pdf_page_count(pdf_path)
+    todo = list(range(1, total + 1)) if pages is None else list(pages)
+    workers = max(1, min(workers, len(todo)))
+
+    if workers == 1:
+        for page in todo:
+            if on_info:
+                on_info(f"OCR page {page}/{total}…")
+            yield _ocr_page(pdf_path, page, dpi, ocr_lang)
+        return
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    from text2audio.parallel import MP_START
+
+    ctx = multiprocessing.get_context(MP_START)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_ocr_worker_init) as ex:
+        pending: Deque = deque()
+        queued = iter(todo)
+        try:
+            for page in todo:
+                while len(pending) < 2 * workers:
+                    nxt = next(queued, None)
+                    if nxt is None:
+                        break
+                    pending.append(ex.submit(_ocr_page, pdf_path, nxt, dpi, ocr_lang))
+                text = pending.popleft().result()
+                if on_info:
+                    on_info(f"OCR page {page}/{total}…")
+                yield text
+        finally:
+            for fut in pending:  # consumer stopped early or a page failed
+                fut.cancel()
+
+
+def _iter_pdf_text(fp, skip: Callable[[int], bool] = lambda page: False) -> Iterator[Tuple[int, Optional[str]]]:
+    """
+    pdfminer text page by page as (page, text); the texts join to what
+    extract_text() returns. Pages for which skip(page) is true are not
+    interpreted and come back as (page, None).
+    """
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    rsrc = PDFResourceManager()
+    buf = io.StringIO()
+    device = TextConverter(rsrc, buf, laparams=LAParams())
+    try:
+        interpreter = PDFPageInterpreter(rsrc, device)
+        for number, page in enumerate(PDFPage.get_pages(fp), start=1):
+            if skip(number):
+                yield number, None
+                continue
+            with metrics.timed("pdf_page"):
+                interpreter.process_page(page)
+            text = buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+            yield number, text
+    finally:
+        device.close()
+
+
+def _iter_txt(fh, block: int = 1 << 20) -> Iterator[str]:
+    """Decode a text file block by block: utf-8, falling back to latin-1 from the first bad byte."""
+    import codecs
+
+    dec = codecs.getincrementaldecoder("utf-8")()
+    fallback = False
+    while True:
+        data = fh.read(block)
+        final = not data
+        if not fallback:
+            try:
+                text = dec.decode(data, final=final)
+            except UnicodeDecodeError:
+                fallback = True
+                pending, _ = dec.getstate()
+                text = (pending + data).decode("latin-1", errors="ignore")
+        else:
+            text = data.decode("latin-1", errors="ignore")
+        if text:
+            yield text
+        if final:
+            return
+
+
+def _doc_key(src: Path | bytes, kind: str, use_ocr: bool, ocr_lang: str, cache: Optional[bool]) -> Optional[str]:
+    from text2audio import extract_cache
+    from text2audio.result_cache import file_checksum
+
+    if not extract_cache.enabled(cache):
+        return None
+    digest = hashlib.sha256(src).hexdigest() if isinstance(src, bytes) else file_checksum(src)
+    return extract_cache.doc_key(digest, kind, use_ocr, ocr_lang)
+
+
+def _cached_pages(doc: str) -> Optional[List[str]]:
+    """All page texts of a completely extracted PDF, or None."""
+    from text2audio import extract_cache
+
+    total = extract_cache.get_page_count(doc)
+    if total is None:
+        return None
+    pages = []
+    for page in range(1, total + 1):
+        text = extract_cache.get_text(doc, page)
+        if text is None:
+            return None
+        pages.append(text)
+    return pages
+
+
+def _pdfminer_pages(fp, doc: Optional[str]) -> Iterator[str]:
+    from text2audio import extract_cache
+
+    hits: Dict[int, str] = {}
+
+    def cached(page: int) -> bool:
+        text = extract_cache.get_text(doc, page) if doc else None
+        if text is not None:
+            hits[page] = text
+        return text is not None
+
+    pages = _iter_pdf_text(fp, skip=cached)
+    count = 0
+    while True:
+        try:
+            count, text = next(pages)
+        except StopIteration:
+            break
+        except Exception as e:
+            raise RuntimeError(f"PDF text extraction failed (pdfminer): {e}") from e
+        if text is None:
+            text = hits.pop(count)
+        elif doc:
+            extract_cache.put_text(doc, text, count)
+        yield text  # may be empty for scanned pages when OCR is not enabled
+    if doc:
+        extract_cache.put_page_count(doc, count)
+
+
+def _ocr_pages(pdf_path: Path, doc: Optional[str], ocr_lang: str, on_info) -> Iterator[str]:
+    from text2audio import extract_cache
+
+    total = pdf_page_count(pdf_path)
+    hits: Dict[int, str] = {}
+    if doc:
+        for page in range(1, total + 1):
+            text = extract_cache.get_text(doc, page)
+            if text is not None:
+                hits[page] = text
+    missing = [page for page in range(1, total + 1) if page not in hits]
+    ocr = iter_ocr_pages(pdf_path, ocr_lang=ocr_lang, pages=missing, on_info=on_info)
+    for page in range(1, total + 1):
+        text = hits.pop(page, None)
+        if text is None:
+            text = next(ocr)
+            if doc:
+                extract_cache.put_text(doc, text, page)
+        yield text
+    if doc:
+        extract_cache.put_page_count(doc, total)
 
-    pages = convert_from_bytes(file_bytes, dpi=300)
-    out_parts = []
-    total = len(pages)
-    for i, img in enumerate(pages, start=1):
-        if on_info:
-            on_info(f"OCR page {i}/{total}…")
-        out_parts.append(pytesseract.image_to_string(img, lang=ocr_lang))
-    return "\n".join(out_parts)
+
+def _iter_pdf(
+    src: Path | bytes,
+    *,
+    use_ocr: bool,
+    ocr_lang: str,
+    on_info: Optional[Callable[[str], None]],
+    doc: Optional[str],
+) -> Iterator[str]:
+    cached = _cached_pages(doc) if doc else None
+    if use_ocr:
+        if cached is None and not has_ocr_stack():
+            raise RuntimeError(
+                "OCR stack missing. Install: pdf2image pillow pytesseract, and system poppler + tesseract."
+            )
+        if cached is not None:
+            pages: Iterator[str] = iter(cached)
+        elif isinstance(src, bytes):
+            pages = _ocr_staged(src, doc, ocr_lang, on_info)
+        else:
+            pages = _ocr_pages(src, doc, ocr_lang, on_info)
+        for i, text in enumerate(pages):
+            yield text if i == 0 else "\n" + text
+        return
+
+    if cached is not None:
+        yield from cached
+        return
+    if not lazy.available("pdfminer"):
+        raise RuntimeError("Install pdfminer.six or enable OCR to extract from PDFs.")
+    with (io.BytesIO(src) if isinstance(src, bytes) else open(src, "rb")) as fp:
+        yield from _pdfminer_pages(fp, doc)
+
+
+def _ocr_staged(data: bytes, doc: Optional[str], ocr_lang: str, on_info) -> Iterator[str]:
+    # OCR workers read pages from disk, not from pickled bytes.
+    with tempfile.TemporaryDirectory(prefix="tts_ocr_") as tmp:
+        pdf_path = Path(tmp) / "doc.pdf"
+        pdf_path.write_bytes(data)
+        yield from _ocr_pages(pdf_path, doc, ocr_lang, on_info)
+
+
+def _docx_text(src: Path | bytes, doc: Optional[str]) -> str:
+    from text2audio import extract_cache
+
+    if doc:
+        text = extract_cache.get_text(doc)
+        if text is not None:
+            return text
+    # docx2txt opens the document with zipfile, which reads from memory just as well.
+    with metrics.timed("docx"):
+        text = _docx2txt.process(io.BytesIO(src) if isinstance(src, bytes) else str(src)) or ""
+    if doc:
+        extract_cache.put_text(doc, text)
+    return text
+
+
+def _iter_document(
+    filename: str,
+    src: Path | bytes,
+    *,
+    use_ocr: bool,
+    ocr_lang: str,
+    on_info: Optional[Callable[[str], None]],
+    cache: Optional[bool],
+) -> Iterator[str]:
+    fname = filename.lower()
+    if fname.endswith(".txt"):
+        with (io.BytesIO(src) if isinstance(src, bytes) else open(src, "rb")) as fh:
+            yield from _iter_txt(fh)
+    elif fname.endswith(".docx"):
+        yield _docx_text(src, _doc_key(src, "docx", False, ocr_lang, cache))
+    elif fname.endswith(".pdf"):
+        doc = _doc_key(src, "pdf", use_ocr, ocr_lang, cache)
+        yield from _iter_pdf(src, use_ocr=use_ocr, ocr_lang=ocr_lang, on_info=on_info, doc=doc)
+    else:
+        raise RuntimeError("Unsupported file type. Supported: .pdf, .docx, .txt")
+
+
+def iter_text_from_path(
+    path: Path | str,
+    *,
+    use_ocr: bool = False,
+    ocr_lang: str = "eng+deu",
+    on_info: Optional[Callable[[str], None]] = None,
+    cache: Optional[bool] = None,
+) -> Iterator[str]:
+    """
+    Text of a document as a stream of pieces whose concatenation is the full
+    text: one piece per page for PDFs (pdfminer, or OCR when use_ocr), blocks
+    for .txt, the whole text for .docx. Only the current piece is in memory.
+
+    PDF pages and DOCX text are cached by content hash and options (see
+    extract_cache.py); cache=False bypasses the cache.
+    """
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(p)
+    yield from _iter_document(p.name, p, use_ocr=use_ocr, ocr_lang=ocr_lang, on_info=on_info, cache=cache)
+
+
+def iter_text_from_bytes(
+    filename: str,
+    data: bytes,
+    *,
+    use_ocr: bool = False,
+    ocr_lang: str = "eng+deu",
+    on_info: Optional[Callable[[str], None]] = None,
+    cache: Optional[bool] = None,
+) -> Iterator[str]:
+    """iter_text_from_path() for in-memory uploads; only OCR stages the bytes in a temp file."""
+    yield from _iter_document(filename, data, use_ocr=use_ocr, ocr_lang=ocr_lang, on_info=on_info, cache=cache)
 
 
+@metrics.timed("extract")
 def extract_text_from_bytes(
     filename: str,
     data: bytes,
@@ -55,77 +357,29 @@ def extract_text_from_bytes(
     use_ocr: bool = False,
     ocr_lang: str = "eng+deu",
     on_info: Optional[Callable[[str], None]] = None,
+    cache: Optional[bool] = None,
 ) -> str:
     """
     Best-effort text extraction from (filename, bytes).
 
     - .txt  → decode (utf-8 → latin-1 fallback)
     - .docx → docx2txt
-    - .pdf  → pdfminer.six (if available), else OCR if enabled,
-              or OCR if text extraction returns empty and use_ocr=True.
+    - .pdf  → pdfminer.six, or OCR if use_ocr=True;
+              returns "" for scanned PDFs when OCR is not enabled.
     """
-    fname = filename.lower()
-
-    # TXT
-    if fname.endswith(".txt"):
-        try:
-            return data.decode("utf-8")
-        except UnicodeDecodeError:
-            return data.decode("latin-1", errors="ignore")
-
-    # DOCX
-    if fname.endswith(".docx"):
-        if _docx2txt is None:
-            raise RuntimeError("docx2txt not installed. Install with: pip install docx2txt")
-        with tempfile.NamedTemporaryFile(suffix=".docx", delete=False) as tmp:
-            tmp.write(data)
-            tmp.flush()
-            try:
-                return _docx2txt.process(tmp.name) or ""
-            finally:
-                Path(tmp.name).unlink(missing_ok=True)
-
-    # PDF
-    if fname.endswith(".pdf"):
-        # 1) Try text extraction first when possible (fast, accurate for text PDFs)
-        if _pdf_extract_text is not None and not use_ocr:
-            try:
-                txt = _pdf_extract_text(io.BytesIO(data)) or ""
-                if txt.strip():
-                    return txt
-                # If empty and OCR requested, fall through to OCR below
-            except Exception as e:
-                # If OCR is allowed, we’ll try that next.
-                if not use_ocr:
-                    raise RuntimeError(f"PDF text extraction failed (pdfminer): {e}") from e
-
-        # 2) OCR path
-        if use_ocr:
-            if not has_ocr_stack():
-                raise RuntimeError(
-                    "OCR stack missing. Install: pdf2image pillow pytesseract, and system poppler + tesseract."
-                )
-            return _ocr_pdf_bytes(data, ocr_lang=ocr_lang, on_info=on_info)
-
-        # If we got here: either pdfminer is missing or yielded nothing and OCR wasn’t requested
-        if _pdf_extract_text is None:
-            raise RuntimeError("Install pdfminer.six or enable OCR to extract from PDFs.")
-        return ""  # pdfminer returned nothing and OCR not enabled
-
-    # Unsupported
-    raise RuntimeError("Unsupported file type. Supported: .pdf, .docx, .txt")
+    return "".join(iter_text_from_bytes(
+        filename, data, use_ocr=use_ocr, ocr_lang=ocr_lang, on_info=on_info, cache=cache
+    ))
 
 
+@metrics.timed("extract")
 def extract_text_from_path(
     path: Path | str,
     *,
     use_ocr: bool = False,
     ocr_lang: str = "eng+deu",
     on_info: Optional[Callable[[str], None]] = None,
+    cache: Optional[bool] = None,
 ) -> str:
     """Convenience for non-Streamlit contexts: extract text from a file path."""
-    p = Path(path)
-    if not p.exists():
-        raise FileNotFoundError(p)
-    data = p.read_bytes()
-    return extract_text_from_bytes(p.name, data, use_ocr=use_ocr, ocr_lang=ocr_lang, on_info=on_info)
+    return "".join(iter_text_from_path(path, use_ocr=use_ocr, ocr_lang=ocr_lang, on_info=on_info, cache=cache))
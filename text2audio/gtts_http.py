@@ -0,0 +1,171 @@
+# gtts_http.py
+"""
+Concurrent gTTS client.
+
+The gtts library sends one request per ~100-character token, strictly in
+sequence and over a new connection each time. This module speaks the same
+protocol (the Google Translate ``batchexecute`` RPC gTTS uses) but cuts the
+text with our own segmenter, sends the token requests concurrently through
+one keep-alive ``requests.Session`` and appends the MP3 frames in text
+order. A shared thread pool caps the number of requests in flight across all
+callers, so long texts get faster without hammering the endpoint.
+"""
+from __future__ import annotations
+import base64
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.parse
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Deque, Optional, Union
+
+from text2audio.audio import mp3_frames
+from text2audio.segment import iter_segments
+
+GTTS_URL = os.getenv(
+    "TEXT2AUDIO_GTTS_URL", "https://translate.google.com/_/TranslateWebserverUi/data/batchexecute"
+)
+# Requests in flight across all callers; 0 → use the gtts library (sequential).
+CONCURRENCY = int(os.getenv("TEXT2AUDIO_GTTS_CONCURRENCY", "4"))
+RETRIES = int(os.getenv("TEXT2AUDIO_GTTS_RETRIES", "3"))
+TIMEOUT_S = float(os.getenv("TEXT2AUDIO_GTTS_TIMEOUT_S", "10"))
+
+MAX_CHARS = 100  # gTTS' per-request limit
+_RPC = "jQ1olc"
+_AUDIO_RE = re.compile(r'jQ1olc","\[\\"(.*)\\"]')
+_HEADERS = {
+    "Referer": "http://translate.google.com/",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; WOW64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/47.0.2526.106 Safari/537.36",
+    "Content-Type": "application/x-www-form-urlencoded;charset=utf-8",
+}
+_RETRY_STATUS = (429, 500, 502, 503, 504)
+_BACKOFF_S = 0.5
+_BACKOFF_MAX_S = 8.0
+
+_LOCK = threading.Lock()
+_SESSION: Optional[Any] = None
+_POOL: Optional[ThreadPoolExecutor] = None
+
+
+def enabled() -> bool:
+    return CONCURRENCY > 0
+
+
+def _session() -> Any:
+    global _SESSION
+    with _LOCK:
+        if _SESSION is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            s = requests.Session()
+            # Keep one connection per concurrent request alive; retries are ours.
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, CONCURRENCY), max_retries=0)
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            s.headers.update(_HEADERS)
+            _SESSION = s
+        return _SESSION
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _POOL
+    with _LOCK:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(max_workers=max(1, CONCURRENCY), thread_name_prefix="tts-gtts")
+        return _POOL
+
+
+def _payload(token: str, lang: str) -> str:
+    params = json.dumps([token, lang, None, "null"], separators=(",", ":"))
+    rpc = json.dumps([[[_RPC, params, None, "generic"]]], separators=(",", ":"))
+    return f"f.req={urllib.parse.quote(rpc)}&"
+
+
+def _decode(body: str) -> bytes:
+    audio = b""
+    for line in body.splitlines():
+        if _RPC in line:
+            m = _AUDIO_RE.search(line)
+            if m:
+                audio += base64.b64decode(m.group(1).encode("ascii"))
+    return audio
+
+
+def _retry_after(resp: Any) -> Optional[float]:
+    try:
+        return float(resp.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+def _fetch(token: str, lang: str) -> bytes:
+    """MP3 for one token; retries connection errors, 429 and 5xx with jittered backoff."""
+    import requests
+
+    session = _session()
+    last = "no attempt"
+    for attempt in range(RETRIES + 1):
+        wait_s: Optional[float] = None
+        try:
+            resp = session.post(GTTS_URL, data=_payload(token, lang), timeout=TIMEOUT_S)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            last = str(e)
+        else:
+            if resp.status_code == 200:
+                audio = _decode(resp.text)
+                if not audio:
+                    raise RuntimeError(f"gTTS returned no audio for {token[:40]!r} (lang={lang!r})")
+                return audio
+            if resp.status_code not in _RETRY_STATUS:
+                raise RuntimeError(f"gTTS request failed: HTTP {resp.status_code} from {GTTS_URL}")
+            last = f"HTTP {resp.status_code}"
+            wait_s = _retry_after(resp)
+        if attempt < RETRIES:
+            backoff = min(_BACKOFF_MAX_S, _BACKOFF_S * 2 ** attempt) * random.uniform(0.5, 1.0)
+            time.sleep(min(_BACKOFF_MAX_S, wait_s) if wait_s else backoff)
+    raise RuntimeError(f"gTTS request failed after {RETRIES + 1} attempts: {last}")
+
+
+def _tokens(text: str, lang: str):
+    for seg in iter_segments(" ".join(text.split()), MAX_CHARS, lang=lang):
+        seg = seg.strip()
+        if any(c.isalnum() for c in seg):  # gTTS also drops punctuation-only tokens
+            yield seg
+
+
+def synthesize_to_mp3(text: str, lang: str, out: Union[str, Path]) -> Path:
+    """Write text as one MP3 to out, fetching up to CONCURRENCY tokens at a time."""
+    out = Path(out)
+    pool = _pool()
+    tmp = out.with_name(f".{out.name}.part")
+    todo = iter(_tokens(text, lang))
+    window = 2 * max(1, CONCURRENCY)  # bounded read-ahead keeps memory flat
+    inflight: Deque[Future] = deque()
+    count = 0
+    try:
+        with open(tmp, "wb") as fh:
+            while True:
+                while len(inflight) < window:
+                    token = next(todo, None)
+                    if token is None:
+                        break
+                    inflight.append(pool.submit(_fetch, token, lang))
+                if not inflight:
+                    break
+                fh.write(mp3_frames(inflight.popleft().result(), first=count == 0))
+                count += 1
+        if count == 0:
+            raise RuntimeError("No text to speak")
+        os.replace(tmp, out)
+    finally:
+        for f in inflight:
+            f.cancel()
+        tmp.unlink(missing_ok=True)
+    return out
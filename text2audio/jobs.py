@@ -0,0 +1,224 @@
+# jobs.py
+"""
+Background synthesis jobs persisted in SQLite.
+
+A JobManager owns a small thread pool. Each job row stores the original
+request (JSON), status, progress (chunks done/total), outputs and error.
+Jobs that were queued or running when the process stopped are re-queued on
+start(), so a restart does not lose accepted work.
+
+That requeue assumes the starting process is the only one working on the
+database: a "running" row of another live process would be run twice. So
+start() takes an exclusive lock on ``<db>.lock`` and refuses to start while
+another process holds it; serve the API with a single worker process per
+TEXT2AUDIO_JOBS_DB. (The lock uses flock and is skipped where fcntl is
+unavailable, e.g. on Windows.)
+"""
+from __future__ import annotations
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, List, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+
+# runner(request, on_progress(done, total), cancel_event) -> outputs
+Runner = Callable[[Dict[str, Any], Callable[[int, int], None], threading.Event], Dict[str, Any]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id       TEXT PRIMARY KEY,
+    status   TEXT NOT NULL,
+    request  TEXT NOT NULL,
+    done     INTEGER NOT NULL DEFAULT 0,
+    total    INTEGER NOT NULL DEFAULT 0,
+    outputs  TEXT,
+    error    TEXT,
+    created  REAL NOT NULL,
+    updated  REAL NOT NULL
+)
+"""
+
+
+class JobStore:
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(_SCHEMA)
+
+    def _exec(self, sql: str, args: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._db.execute(sql, args).fetchall()
+
+    def create(self, request: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._exec(
+            "INSERT INTO jobs (id, status, request, created, updated) VALUES (?, 'queued', ?, ?, ?)",
+            (job_id, json.dumps(request), now, now),
+        )
+        return job_id
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        if "outputs" in fields and fields["outputs"] is not None:
+            fields["outputs"] = json.dumps(fields["outputs"])
+        fields["updated"] = time.time()
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        self._exec(f"UPDATE jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+
+    def set_status_if(self, job_id: str, expected: tuple, status: str) -> bool:
+        """Atomically move a job to status if it is currently in one of expected."""
+        marks = ", ".join("?" for _ in expected)
+        with self._lock:
+            cur = self._db.execute(
+                f"UPDATE jobs SET status = ?, updated = ? WHERE id = ? AND status IN ({marks})",
+                (status, time.time(), job_id, *expected),
+            )
+            return cur.rowcount > 0
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._exec("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return self._row(rows[0]) if rows else None
+
+    def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        rows = self._exec("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,))
+        return [self._row(r) for r in rows]
+
+    def ids_with_status(self, statuses: tuple) -> List[str]:
+        marks = ", ".join("?" for _ in statuses)
+        rows = self._exec(f"SELECT id FROM jobs WHERE status IN ({marks}) ORDER BY created", statuses)
+        return [r["id"] for r in rows]
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> Dict[str, Any]:
+        d = dict(row)
+        d["request"] = json.loads(d["request"])
+        d["outputs"] = json.loads(d["outputs"]) if d["outputs"] else None
+        return d
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class JobManager:
+    def __init__(self, db_path: Union[str, Path], runner: Runner, workers: int = 2):
+        self.store = JobStore(db_path)
+        self._runner = runner
+        self._workers = max(1, workers)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._cancel: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._owner: Optional[IO[bytes]] = None
+
+    def _acquire_db(self) -> None:
+        if fcntl is None:
+            return
+        path = self.store.path.with_name(self.store.path.name + ".lock")
+        fh = open(path, "ab")
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            raise RuntimeError(
+                f"Job database {self.store.path} is in use by another process; "
+                "run one worker process per TEXT2AUDIO_JOBS_DB."
+            ) from None
+        self._owner = fh
+
+    def _release_db(self) -> None:
+        fh, self._owner = self._owner, None
+        if fh is not None:
+            fh.close()  # drops the flock
+
+    def start(self) -> None:
+        """
+        Start the worker pool and resume jobs interrupted by a restart. Every
+        "running" row is re-queued, which is only safe because no other
+        process can hold the database (see the module docstring).
+        """
+        if self._pool is not None:
+            return
+        self._acquire_db()
+        self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="tts-job")
+        for job_id in self.store.ids_with_status(("running",)):
+            self.store.update(job_id, status="queued", done=0)
+        for job_id in self.store.ids_with_status(("queued",)):
+            self._enqueue(job_id)
+
+    def shutdown(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            with self._lock:
+                for ev in self._cancel.values():
+                    ev.set()
+            # Interrupted jobs stay "running" in the DB and are re-queued on next start().
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._release_db()
+
+    def submit(self, request: Dict[str, Any]) -> str:
+        job_id = self.store.create(request)
+        self._enqueue(job_id)
+        return job_id
+
+    def _enqueue(self, job_id: str) -> None:
+        if self._pool is None:
+            raise RuntimeError("JobManager is not started.")
+        with self._lock:
+            self._cancel[job_id] = threading.Event()
+        self._pool.submit(self._run, job_id)
+
+    def _run(self, job_id: str) -> None:
+        with self._lock:
+            cancel = self._cancel.setdefault(job_id, threading.Event())
+        try:
+            if not self.store.set_status_if(job_id, ("queued",), "running"):
+                return  # cancelled while queued
+            job = self.store.get(job_id)
+
+            def on_progress(done: int, total: int) -> None:
+                self.store.update(job_id, done=done, total=total)
+
+            try:
+                outputs = self._runner(job["request"], on_progress, cancel)
+            except Exception as e:
+                if cancel.is_set():
+                    if self._pool is not None:  # user cancel, not shutdown
+                        self.store.update(job_id, status="cancelled")
+                    return
+                self.store.update(job_id, status="failed", error=str(e))
+                return
+            self.store.update(job_id, status="done", outputs=outputs)
+        finally:
+            with self._lock:
+                self._cancel.pop(job_id, None)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return self.store.list(limit)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job. Returns False if it already finished."""
+        if self.store.set_status_if(job_id, ("queued",), "cancelled"):
+            return True
+        with self._lock:
+            ev = self._cancel.get(job_id)
+        job = self.store.get(job_id)
+        if ev is None or job is None or job["status"] != "running":
+            return False
+        ev.set()
+        return True
@@ -0,0 +1,65 @@
+# lazy.py
+"""
+Deferred imports for the heavy optional dependencies (pdfminer, docx2txt,
+pyttsx3, gTTS, Piper/onnxruntime, requests).
+
+    pyttsx3 = lazy.module("pyttsx3", "pip install pyttsx3")
+    ...
+    pyttsx3.init()          # first attribute access imports the package
+
+available() answers "is it installed?" from the import system's metadata
+without executing the package, so feature checks stay cheap too. A missing
+dependency surfaces as a RuntimeError carrying the install hint when the
+feature is first used, not when text2audio is imported.
+"""
+from __future__ import annotations
+import importlib
+import importlib.util
+import threading
+from types import ModuleType
+from typing import Any, Optional
+
+_LOCK = threading.Lock()
+
+
+def available(name: str) -> bool:
+    """True if name can be imported (checked without importing it)."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):  # missing parent package / broken metadata
+        return False
+
+
+def load(name: str, hint: Optional[str] = None) -> ModuleType:
+    """Import name now; a missing module becomes a RuntimeError with hint."""
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:
+        raise RuntimeError(hint or f"{name} is not installed") from e
+
+
+class LazyModule:
+    """Module stand-in that imports the real module on first attribute access."""
+
+    def __init__(self, name: str, hint: Optional[str] = None):
+        self.__name = name
+        self.__hint = hint
+        self.__module: Optional[ModuleType] = None
+
+    def __load(self) -> ModuleType:
+        if self.__module is None:
+            with _LOCK:  # imports hold their own lock; this only avoids duplicate error work
+                if self.__module is None:
+                    self.__module = load(self.__name, self.__hint)
+        return self.__module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.__load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__module is not None else "not loaded"
+        return f"<lazy module {self.__name!r} ({state})>"
+
+
+def module(name: str, hint: Optional[str] = None) -> LazyModule:
+    return LazyModule(name, hint)
@@ -0,0 +1,271 @@
+# metrics.py
+"""
+Lightweight instrumentation: stage timers, counters and histograms rendered
+in the Prometheus text format, plus per-request Server-Timing entries.
+
+    with metrics.timed("voice_load"):
+        ...
+
+    @metrics.timed("extract")
+    def extract(...): ...
+
+Every timed() block is observed in ``text2audio_stage_seconds{stage=...}``
+and, inside a request_timings() scope, recorded for the Server-Timing
+header. With TEXT2AUDIO_METRICS=0 (and Server-Timing off) timed() returns a
+shared no-op object and the record functions return immediately, so the
+instrumented code pays one attribute lookup and a call.
+"""
+from __future__ import annotations
+import bisect
+import contextvars
+import functools
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+_TRUE = ("1", "true", "yes", "on")
+ENABLED = os.getenv("TEXT2AUDIO_METRICS", "1").lower() in _TRUE
+SERVER_TIMING = os.getenv("TEXT2AUDIO_SERVER_TIMING", "0").lower() in _TRUE
+_ACTIVE = ENABLED or SERVER_TIMING
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+RTF_BUCKETS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...], extra: str = "") -> str:
+        parts = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        with self._lock:
+            samples = self._samples()
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *samples]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{self._labels(k)} {_fmt(v)}" for k, v in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1  # made cumulative when rendering
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self) -> List[str]:
+        out = []
+        for key, (counts, total, n) in sorted(self._values.items()):
+            running = 0
+            for bound, c in zip(self.buckets, counts):
+                running += c
+                le = 'le="%s"' % _fmt(bound)
+                out.append(f"{self.name}_bucket{self._labels(key, le)} {running}")
+            out.append(f"{self.name}_sum{self._labels(key)} {_fmt(total)}")
+            out.append(f"{self.name}_count{self._labels(key)} {n}")
+        return out
+
+
+REGISTRY: List[_Metric] = []
+
+STAGE_SECONDS = Histogram("text2audio_stage_seconds", "Time spent per pipeline stage.", ("stage",))
+SYNTH_SECONDS = Histogram("text2audio_synthesis_seconds", "End-to-end synthesize() latency.", ("backend", "voice"))
+CHARACTERS = Counter("text2audio_characters_total", "Characters synthesized (cache hits excluded).", ("backend",))
+RTF = Histogram("text2audio_realtime_factor", "Synthesis time divided by audio duration.",
+                ("backend", "voice"), buckets=RTF_BUCKETS)
+CACHE = Counter("text2audio_result_cache_requests_total", "Result cache lookups in synthesize().", ("result",))
+FALLBACKS = Counter("text2audio_fallbacks_total", "Backend fallbacks taken (CLI, espeak, ...).", ("backend", "fallback"))
+SEGMENT_CACHE = Counter("text2audio_segment_cache_requests_total",
+                        "Sentence cache lookups (distinct sentences per synthesize()).", ("result",))
+ROUTE_SKIPS = Counter("text2audio_route_skips_total", "Calls that skipped a backend path with an open circuit.",
+                      ("path",))
+BREAKER_OPEN = Gauge("text2audio_open_circuits", "Open circuit breakers per backend path.", ("path",))
+ERRORS = Counter("text2audio_synthesis_errors_total", "Failed synthesize() calls.", ("backend",))
+INFLIGHT = Gauge("text2audio_inflight_requests", "HTTP requests being processed.", ("route",))
+HTTP_SECONDS = Histogram("text2audio_http_request_seconds", "HTTP request latency (until response start).",
+                         ("method", "route", "status"))
+
+
+# ---------- timers ----------
+
+_TIMINGS: "contextvars.ContextVar[Optional[List[Tuple[str, float]]]]" = contextvars.ContextVar(
+    "text2audio_timings", default=None
+)
+
+
+def record(stage: str, seconds: float) -> None:
+    """Record a stage duration measured elsewhere."""
+    if ENABLED:
+        STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _TIMINGS.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+class _Timer:
+    __slots__ = ("stage", "_t0")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._t0 = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        record(self.stage, time.perf_counter() - self._t0)
+
+    def __call__(self, fn: Callable) -> Callable:
+        stage = self.stage
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with _Timer(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopTimer":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+    def __call__(self, fn: Callable) -> Callable:
+        return fn
+
+
+_NOOP = _NoopTimer()
+
+
+def timed(stage: str) -> Any:
+    """Context manager / decorator timing one stage (no-op when instrumentation is off)."""
+    return _Timer(stage) if _ACTIVE else _NOOP
+
+
+@contextmanager
+def request_timings() -> Iterator[List[Tuple[str, float]]]:
+    """Collect the stages timed in this context (and threads that copied it) for Server-Timing."""
+    timings: List[Tuple[str, float]] = []
+    token = _TIMINGS.set(timings)
+    try:
+        yield timings
+    finally:
+        _TIMINGS.reset(token)
+
+
+def server_timing(timings: Sequence[Tuple[str, float]], total: Optional[float] = None) -> str:
+    """Server-Timing header value; repeated stages are summed ("inference;dur=812.4;desc=\"3x\"")."""
+    agg: Dict[str, List[float]] = {}
+    for stage, seconds in timings:
+        entry = agg.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+    parts = [
+        f"{stage};dur={seconds * 1000:.1f}" + (f';desc="{n}x"' if n > 1 else "")
+        for stage, (seconds, n) in agg.items()
+    ]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+# ---------- export ----------
+
+def _cache_samples() -> List[str]:
+    """Hit/miss counters the caches keep themselves (only for modules already in use)."""
+    sources = []
+    vc = sys.modules.get("text2audio.voice_cache")
+    if vc is not None:
+        sources.append(("voice", vc.VOICES))
+    rc = sys.modules.get("text2audio.result_cache")
+    if rc is not None:
+        sources.append(("result", rc.RESULTS))
+    sc = sys.modules.get("text2audio.segment_cache")
+    if sc is not None:
+        sources.append(("segment", sc.SEGMENTS))
+    ec = sys.modules.get("text2audio.extract_cache")
+    if ec is not None:
+        sources.append(("extract", ec.TEXTS))
+    if not sources:
+        return []
+    lines = ["# HELP text2audio_cache_hits_total Cache hits by cache.", "# TYPE text2audio_cache_hits_total counter"]
+    lines += [f'text2audio_cache_hits_total{{cache="{name}"}} {c.hits}' for name, c in sources]
+    lines += ["# HELP text2audio_cache_misses_total Cache misses by cache.",
+              "# TYPE text2audio_cache_misses_total counter"]
+    lines += [f'text2audio_cache_misses_total{{cache="{name}"}} {c.misses}' for name, c in sources]
+    return lines
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format (0.0.4)."""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    lines += _cache_samples()
+    return "\n".join(lines) + "\n"
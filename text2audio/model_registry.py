@@ -0,0 +1,227 @@
+# model_registry.py
+"""
+On-disk index of installed Piper voices.
+
+Each models directory gets a ``.models-index.json`` with one entry per
+``.onnx`` file: size, mtime, sha256, sample rate and a few fields from the
+``.onnx.json`` sidecar, plus the result of validating the header once. On the
+hot path a model is only stat()ed; it is re-read and re-hashed only when its
+size or mtime (or the sidecar's mtime) no longer match the index.
+
+The index file is only written into managed directories: the default models
+directory and any directory that already has an index (ensure_model() and
+list_models() create one). Models passed by path from anywhere else are
+indexed in memory, so nothing is written next to a user's own files.
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+INDEX_NAME = ".models-index.json"
+_INDEX_VERSION = 1
+
+
+def _sidecar(model_path: Path) -> Path:
+    return model_path.with_suffix(model_path.suffix + ".json")
+
+
+def _check_header(model_path: Path) -> None:
+    with open(model_path, "rb") as f:
+        sig = f.read(256)
+    if sig.startswith(b"\x1f\x8b"):
+        raise RuntimeError(f"{model_path.name} is gzipped (.onnx.gz). Decompress first.")
+    if sig.startswith(b"version https://git-lfs"):
+        raise RuntimeError(f"{model_path.name} is a Git LFS pointer. Download the real model.")
+    if b"<html" in sig.lower() or b"<!doctype html" in sig.lower():
+        raise RuntimeError(f"{model_path.name} looks like an HTML page, not a model.")
+
+
+def _sidecar_info(sidecar: Path) -> Dict[str, Any]:
+    cfg = json.loads(sidecar.read_text(encoding="utf-8"))
+    audio = cfg.get("audio") or {}
+    language = cfg.get("language") or {}
+    return {
+        "sample_rate": audio.get("sample_rate"),
+        "quality": audio.get("quality"),
+        "language": language.get("code") or (cfg.get("espeak") or {}).get("voice"),
+        "num_speakers": cfg.get("num_speakers", 1),
+        "dataset": cfg.get("dataset"),
+        "piper_version": cfg.get("piper_version"),
+    }
+
+
+class ModelRegistry:
+    """Index for one models directory. Entries are keyed by resolved model path."""
+
+    def __init__(self, models_dir: Union[str, Path], persist: bool = True):
+        self.models_dir = Path(models_dir).expanduser().resolve()
+        self.index_path = self.models_dir / INDEX_NAME
+        self.persist = persist
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.persist:
+            return {}
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != _INDEX_VERSION:
+            return {}
+        return data.get("models", {})
+
+    def _save(self) -> None:
+        # Caller holds _lock. Atomic replace; a read-only directory just keeps the index in memory.
+        if not self.persist:
+            return
+        tmp = self.index_path.with_name(f"{INDEX_NAME}.{os.getpid()}.tmp")
+        try:
+            tmp.write_text(json.dumps({"version": _INDEX_VERSION, "models": self._entries}, indent=1))
+            os.replace(tmp, self.index_path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+
+    @staticmethod
+    def _fresh(entry: Optional[Dict[str, Any]], st: os.stat_result, side_mtime: Optional[int]) -> bool:
+        return (
+            entry is not None
+            and entry.get("size") == st.st_size
+            and entry.get("mtime_ns") == st.st_mtime_ns
+            and entry.get("sidecar_mtime_ns") == side_mtime
+        )
+
+    def _build(self, path: Path, st: os.stat_result, side_mtime: Optional[int]) -> Dict[str, Any]:
+        from text2audio.result_cache import file_checksum
+
+        entry: Dict[str, Any] = {
+            "path": str(path),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sidecar_mtime_ns": side_mtime,
+            "indexed": time.time(),
+            "valid": False,
+            "error": None,
+            "missing_sidecar": False,
+        }
+        try:
+            _check_header(path)
+            if side_mtime is None:
+                raise FileNotFoundError(f"Missing sidecar next to model: {_sidecar(path).name}")
+            entry.update(_sidecar_info(_sidecar(path)))
+            entry["sha256"] = file_checksum(path)
+            entry["valid"] = True
+        except (OSError, ValueError, RuntimeError) as e:
+            entry["error"] = str(e)
+            entry["missing_sidecar"] = isinstance(e, FileNotFoundError)
+        return entry
+
+    def entry(self, model_path: Union[str, Path]) -> Dict[str, Any]:
+        """Index entry for model_path, (re)validating it only if the files changed."""
+        path = Path(model_path).expanduser().resolve()
+        st = path.stat()
+        try:
+            side_mtime: Optional[int] = _sidecar(path).stat().st_mtime_ns
+        except FileNotFoundError:
+            side_mtime = None
+        key = str(path)
+        with self._lock:
+            cur = self._entries.get(key)
+        if self._fresh(cur, st, side_mtime):
+            return cur  # type: ignore[return-value]
+        fresh = self._build(path, st, side_mtime)
+        with self._lock:
+            self._entries[key] = fresh
+            self._save()
+        return fresh
+
+    def validated(self, model_path: Union[str, Path]) -> Dict[str, Any]:
+        """entry(), raising the recorded validation error for unusable models."""
+        e = self.entry(model_path)
+        if not e["valid"]:
+            raise (FileNotFoundError if e["missing_sidecar"] else RuntimeError)(e["error"] or "invalid model")
+        return e
+
+    def scan(self) -> List[Dict[str, Any]]:
+        """Index every .onnx in the directory and drop entries whose files are gone."""
+        found = sorted(self.models_dir.glob("*.onnx")) if self.models_dir.is_dir() else []
+        entries = []
+        for p in found:
+            try:
+                entries.append(self.entry(p))
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            stale = [k for k in self._entries if Path(k).parent == self.models_dir and not Path(k).exists()]
+            for k in stale:
+                del self._entries[k]
+            if stale:
+                self._save()
+        return entries
+
+
+_REGISTRIES: Dict[Path, ModelRegistry] = {}
+_IN_MEMORY: Dict[Path, ModelRegistry] = {}
+_REGISTRIES_LOCK = threading.Lock()
+
+
+def registry_for(models_dir: Union[str, Path]) -> ModelRegistry:
+    """The persisted index of a models directory (created on first write)."""
+    d = Path(models_dir).expanduser().resolve()
+    with _REGISTRIES_LOCK:
+        reg = _REGISTRIES.get(d)
+        if reg is None:
+            reg = _REGISTRIES[d] = ModelRegistry(d)
+        return reg
+
+
+def _registry_of(model_path: Path) -> ModelRegistry:
+    from text2audio.model_repo import DEFAULT_MODELS_DIR
+
+    d = model_path.parent
+    with _REGISTRIES_LOCK:
+        reg = _REGISTRIES.get(d) or _IN_MEMORY.get(d)
+    if reg is not None:
+        return reg
+    if d == DEFAULT_MODELS_DIR.expanduser().resolve() or (d / INDEX_NAME).exists():
+        return registry_for(d)
+    with _REGISTRIES_LOCK:
+        return _IN_MEMORY.setdefault(d, ModelRegistry(d, persist=False))
+
+
+def entry(model_path: Union[str, Path]) -> Dict[str, Any]:
+    """Index entry for a model; persisted only if it lives in a managed models directory."""
+    p = Path(model_path).expanduser().resolve()
+    return _registry_of(p).entry(p)
+
+
+def validated(model_path: Union[str, Path]) -> Dict[str, Any]:
+    """Validated index entry for a model (see entry())."""
+    p = Path(model_path).expanduser().resolve()
+    return _registry_of(p).validated(p)
+
+
+def list_models(models_dir: Optional[Union[str, Path]] = None) -> List[Dict[str, Any]]:
+    """Every known short key (installed or not) plus any other .onnx in models_dir."""
+    from text2audio.model_repo import DEFAULT_MODELS_DIR, MODELS, model_files
+
+    reg = registry_for(models_dir or DEFAULT_MODELS_DIR)
+    by_path = {e["path"]: e for e in reg.scan()}
+    out = []
+    for key in sorted(MODELS):
+        onnx, _ = model_files(key, reg.models_dir)
+        e = by_path.pop(str(onnx.resolve()), None)
+        out.append(_view(key, e))
+    out.extend(_view(None, e) for e in by_path.values())
+    return out
+
+
+def _view(key: Optional[str], e: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if e is None:
+        return {"key": key, "installed": False}
+    view = {k: v for k, v in e.items() if k not in ("mtime_ns", "sidecar_mtime_ns", "missing_sidecar")}
+    return {"key": key, "installed": True, **view}
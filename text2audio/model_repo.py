@@ -1,10 +1,27 @@
 from __future__ import annotations
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Tuple
-import shutil, gzip
+from typing import Dict, Iterator, List, Optional, Tuple
+import json, os, threading, zlib
+
+from text2audio import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
 
 DEFAULT_MODELS_DIR = Path("models")
-HF_BASE = "https://huggingface.co/rhasspy/piper-voices/resolve/main"
+# Base URL of the voice repository; point at a mirror with TEXT2AUDIO_MODEL_MIRROR.
+HF_BASE = os.getenv(
+    "TEXT2AUDIO_MODEL_MIRROR", "https://huggingface.co/rhasspy/piper-voices/resolve/main"
+).rstrip("/")
+# Parallel ranged connections for large uncompressed models (1 = sequential).
+DOWNLOAD_CONNECTIONS = max(1, int(os.getenv("TEXT2AUDIO_DOWNLOAD_CONNECTIONS", "4")))
+PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+_CHUNK = 1024 * 256
+_TIMEOUT = 60
 
 MODELS: Dict[str, Tuple[str, str]] = {
     "Thorsten (DE)": (
@@ -25,9 +42,9 @@ MODELS: Dict[str, Tuple[str, str]] = {
     ),
 }
 
-def _hf_url(dirpath: str, base: str, ext: str) -> str:
+def _hf_url(dirpath: str, base: str, ext: str, mirror: Optional[str] = None) -> str:
     # ext in {".onnx", ".onnx.gz", ".onnx.json"}
-    return f"{HF_BASE}/{dirpath}/{base}{ext}"
+    return f"{(mirror or HF_BASE).rstrip('/')}/{dirpath}/{base}{ext}"
 
 def model_files(short_name: str, models_dir: Path = DEFAULT_MODELS_DIR) -> Tuple[Path, Path]:
     if short_name not in MODELS:
@@ -37,61 +54,232 @@ def model_files(short_name: str, models_dir: Path = DEFAULT_MODELS_DIR) -> Tuple
     meta = models_dir / f"{base}.onnx.json"
     return onnx, meta
 
-def ensure_model(short_name: str, models_dir: Path = DEFAULT_MODELS_DIR, *, progress_cb=None) -> Tuple[Path, Path]:
+_THREAD_LOCKS: Dict[str, threading.Lock] = {}
+_THREAD_LOCKS_GUARD = threading.Lock()
+
+@contextmanager
+def _model_lock(models_dir: Path, base: str) -> Iterator[None]:
+    """Single-flight per model: one download across threads (lock) and processes (flock)."""
+    path = models_dir / f".{base}.lock"
+    with _THREAD_LOCKS_GUARD:
+        lk = _THREAD_LOCKS.setdefault(str(path.resolve()), threading.Lock())
+    with lk, open(path, "a+b") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+def _get(url: str, start: int = 0, end: Optional[int] = None):
+    import requests
+
+    headers = {"Accept-Encoding": "identity"}  # byte offsets must refer to the stored file
+    if start or end is not None:
+        headers["Range"] = f"bytes={start}-{'' if end is None else end}"
+    r = requests.get(url, stream=True, timeout=_TIMEOUT, headers=headers)
+    if r.status_code == 404:
+        r.close()
+        raise FileNotFoundError(f"404 for {url}")
+    return r
+
+def _probe(url: str) -> Tuple[int, bool]:
+    """(size, supports ranges) of url; (0, False) if unknown."""
     import requests
 
+    try:
+        r = requests.head(url, allow_redirects=True, timeout=_TIMEOUT, headers={"Accept-Encoding": "identity"})
+    except requests.RequestException:
+        return 0, False
+    if r.status_code == 404:
+        raise FileNotFoundError(f"404 for {url}")
+    if not r.ok:
+        return 0, False
+    return int(r.headers.get("Content-Length") or 0), "bytes" in r.headers.get("Accept-Ranges", "")
+
+class _Progress:
+    def __init__(self, label: str, total: int, done: int, cb) -> None:
+        self.label, self.total, self.done, self._cb = label, total, done, cb
+        self._lock = threading.Lock()
+
+    def add(self, n: int) -> None:
+        with self._lock:
+            self.done += n
+            if self.total and self._cb:
+                self._cb(self.label, min(self.done / self.total, 1.0))
+
+def _fetch(url: str, dest: Path, label: str, progress_cb=None, *, gunzip: bool = False,
+           connections: int = 1) -> None:
+    """
+    Download url to dest. Bytes go to a .part file first, so an interrupted
+    download resumes with a Range request. With gunzip the stream is
+    decompressed while it arrives; the compressed .part is kept until the end
+    so a resume can replay it.
+    """
+    part = dest.with_name(dest.name + (".gz.part" if gunzip else ".part"))
+    if not gunzip and connections > 1:
+        ranges = part.with_name(part.name + ".ranges")
+        if ranges.exists() or not part.exists():
+            size, ok = _probe(url)
+            if ok and size >= PARALLEL_MIN_BYTES:
+                _fetch_ranges(url, part, size, connections, _Progress(label, size, 0, progress_cb))
+                os.replace(part, dest)
+                return
+            ranges.unlink(missing_ok=True)
+
+    offset = part.stat().st_size if part.exists() else 0
+    r = _get(url, offset)
+    with r:
+        if r.status_code == 416 and offset:
+            total = offset  # .part already holds the whole file
+            stream: Iterator[bytes] = iter(())
+        else:
+            r.raise_for_status()
+            if r.status_code != 206:
+                offset = 0  # server ignored the Range header: start over
+            total = offset + int(r.headers.get("Content-Length") or 0)
+            stream = (c for c in r.iter_content(chunk_size=_CHUNK) if c)
+        prog = _Progress(label, total, offset, progress_cb)
+
+        if not gunzip:
+            with open(part, "ab" if offset else "wb") as f:
+                for chunk in stream:
+                    f.write(chunk)
+                    prog.add(len(chunk))
+        else:
+            tmp = dest.with_name(dest.name + ".gunzip.part")
+            d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            with open(tmp, "wb") as out:
+                if offset:  # replay what we already have
+                    with open(part, "rb") as old:
+                        for chunk in iter(lambda: old.read(_CHUNK), b""):
+                            out.write(d.decompress(chunk))
+                with open(part, "ab" if offset else "wb") as f:
+                    for chunk in stream:
+                        f.write(chunk)
+                        out.write(d.decompress(chunk))
+                        prog.add(len(chunk))
+                out.write(d.flush())
+            if not d.eof:
+                tmp.unlink(missing_ok=True)
+                raise RuntimeError(f"Truncated gzip stream from {url}")
+    if total and part.stat().st_size != total:
+        raise RuntimeError(f"Incomplete download of {url}: {part.stat().st_size}/{total} bytes")
+    if gunzip:
+        os.replace(tmp, dest)
+        part.unlink(missing_ok=True)
+    else:
+        os.replace(part, dest)
+
+def _fetch_ranges(url: str, part: Path, total: int, connections: int, prog: _Progress) -> None:
+    """Fetch url into part over several Range requests; per-range progress is persisted for resume."""
+    state_path = part.with_name(part.name + ".ranges")
+    step = -(-total // connections)
+    spans = [(i, min(i + step, total) - 1) for i in range(0, total, step)]
+    done: List[int] = [0] * len(spans)
+    try:
+        state = json.loads(state_path.read_text())
+        if state.get("total") == total and len(state.get("done", [])) == len(spans) and part.exists():
+            done = [int(x) for x in state["done"]]
+    except (OSError, ValueError):
+        pass
+    if not any(done):
+        with open(part, "wb") as f:
+            f.truncate(total)
+    prog.add(sum(done))
+    lock = threading.Lock()
+
+    def save() -> None:
+        with lock:
+            state_path.write_text(json.dumps({"total": total, "done": done}))
+
+    def worker(i: int) -> None:
+        start, end = spans[i]
+        pos = start + done[i]
+        if pos > end:
+            return
+        with _get(url, pos, end) as r, open(part, "r+b") as f:
+            if r.status_code != 206:
+                raise RuntimeError(f"Server ignored Range request for {url} (HTTP {r.status_code})")
+            f.seek(pos)
+            since_save = 0
+            for chunk in r.iter_content(chunk_size=_CHUNK):
+                if not chunk:
+                    continue
+                f.write(chunk)
+                with lock:
+                    done[i] += len(chunk)
+                prog.add(len(chunk))
+                since_save += len(chunk)
+                if since_save >= 8 * 1024 * 1024:
+                    f.flush()
+                    save()
+                    since_save = 0
+
+    save()
+    try:
+        with ThreadPoolExecutor(max_workers=len(spans), thread_name_prefix="model-fetch") as ex:
+            for fut in [ex.submit(worker, i) for i in range(len(spans))]:
+                fut.result()
+    finally:
+        save()
+    if sum(done) != total:
+        raise RuntimeError(f"Incomplete download of {url}: {sum(done)}/{total} bytes")
+    state_path.unlink(missing_ok=True)
+
+def _check_onnx(path: Path) -> None:
+    with open(path, "rb") as f:
+        head = f.read(256)
+    size = path.stat().st_size
+    err = None
+    if head.startswith(b"version https://git-lfs") or b"<html" in head.lower():
+        err = f"{path.name} is not a valid ONNX (LFS pointer or HTML)."
+    elif size < 1024 * 1024:
+        err = f"{path.name} seems too small ({size} bytes)."
+    if err:
+        path.unlink(missing_ok=True)  # don't let a bad file pass as cached next time
+        raise RuntimeError(err)
+
+def ensure_model(short_name: str, models_dir: Path = DEFAULT_MODELS_DIR, *, progress_cb=None,
+                 mirror: Optional[str] = None) -> Tuple[Path, Path]:
+    """
+    Download a voice (.onnx + .onnx.json) into models_dir unless present.
+    Concurrent callers for the same voice, in this or other processes, wait
+    for a single download instead of starting their own.
+    """
     models_dir.mkdir(parents=True, exist_ok=True)
     onnx_path, json_path = model_files(short_name, models_dir)
     dirpath, base = MODELS[short_name]
+    if onnx_path.exists() and json_path.exists():
+        return onnx_path, json_path
 
-    def _download(url: str, dest: Path, label: str):
-        with requests.get(url, stream=True, timeout=60) as r:
-            if r.status_code == 404:
-                raise FileNotFoundError(f"404 for {url}")
-            r.raise_for_status()
-            total = int(r.headers.get("Content-Length") or 0)
-            done = 0
-            tmp = dest.with_suffix(dest.suffix + ".part")
-            with open(tmp, "wb") as f:
-                for chunk in r.iter_content(chunk_size=1024 * 256):
-                    if not chunk: continue
-                    f.write(chunk); done += len(chunk)
-                    if total and progress_cb:
-                        progress_cb(label, min(done / total, 1.0))
-            tmp.rename(dest)
-
-    if not onnx_path.exists():
-        try_exts = [(".onnx", False), (".onnx.gz", True)]
-        last_err = None
-        for ext, is_gz in try_exts:
-            url = _hf_url(dirpath, base, ext)
-            try:
-                if progress_cb: progress_cb(f"Downloading {base}{ext}", 0.0)
-                tmp = onnx_path.with_suffix(onnx_path.suffix + (".dl" if not is_gz else ".gz.dl"))
-                _download(url, tmp, f"{base}{ext}")
-                if is_gz:
-                    if progress_cb: progress_cb(f"Decompressing {base}{ext}", 0.0)
-                    with gzip.open(tmp, "rb") as src, open(onnx_path, "wb") as dst:
-                        shutil.copyfileobj(src, dst)
-                    tmp.unlink(missing_ok=True)
-                else:
-                    tmp.rename(onnx_path)
-                break
-            except Exception as e:
-                last_err = e
-                continue
-        else:
-            raise RuntimeError(f"Failed to fetch ONNX for {short_name}: {last_err}")
-
-        head = onnx_path.read_bytes()[:256]
-        if head.startswith(b"version https://git-lfs") or b"<html" in head.lower():
-            raise RuntimeError(f"{onnx_path.name} is not a valid ONNX (LFS pointer or HTML).")
-        if onnx_path.stat().st_size < 1024 * 1024:
-            raise RuntimeError(f"{onnx_path.name} seems too small ({onnx_path.stat().st_size} bytes).")
-
-    if not json_path.exists():
-        url = _hf_url(dirpath, base, ".onnx.json")
-        if progress_cb: progress_cb(f"Downloading {json_path.name}", 0.0)
-        _download(url, json_path, json_path.name)
+    with metrics.timed("ensure_model"), _model_lock(models_dir, base):
+        if not onnx_path.exists():  # re-check: another worker may have finished meanwhile
+            try_exts = [(".onnx", False), (".onnx.gz", True)]
+            last_err = None
+            for ext, is_gz in try_exts:
+                url = _hf_url(dirpath, base, ext, mirror)
+                try:
+                    if progress_cb: progress_cb(f"Downloading {base}{ext}", 0.0)
+                    with metrics.timed("model_download"):
+                        _fetch(url, onnx_path, f"{base}{ext}", progress_cb, gunzip=is_gz,
+                               connections=DOWNLOAD_CONNECTIONS)
+                    break
+                except Exception as e:
+                    if last_err is None or not isinstance(e, FileNotFoundError):
+                        last_err = e  # report an interrupted download over a later 404
+                    continue
+            else:
+                raise RuntimeError(f"Failed to fetch ONNX for {short_name}: {last_err}")
+            _check_onnx(onnx_path)
+
+        if not json_path.exists():
+            url = _hf_url(dirpath, base, ".onnx.json", mirror)
+            if progress_cb: progress_cb(f"Downloading {json_path.name}", 0.0)
+            _fetch(url, json_path, json_path.name, progress_cb)
+
+        from text2audio.model_registry import registry_for
+        registry_for(models_dir).entry(onnx_path)  # validate and checksum once, at install
 
     return onnx_path, json_path
@@ -0,0 +1,139 @@
+# parallel.py
+"""
+Concurrent chunk synthesis with ordered reassembly.
+
+Chunks of every backend run in one thread pool shared by all requests in the
+process: gTTS is network-bound, pyttsx3 already runs each engine in its own
+worker process (see pyttsx3_pool.py), and Piper's ONNX inference releases
+the GIL. Keeping Piper in-process means chunks share the loaded voices
+(voice_cache.py), the warm-up, the circuit breakers (routing.py) and the
+metrics of the serving process. A global
+semaphore caps the number of chunks in flight across all requests, and each
+request additionally keeps at most ``parallelism`` chunks of its own in flight.
+"""
+from __future__ import annotations
+import os
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Deque, Iterable, Iterator, Optional, Tuple
+
+MAX_PARALLEL = max(1, int(os.getenv("TEXT2AUDIO_MAX_PARALLEL", str(os.cpu_count() or 2))))
+REQUEST_PARALLEL = max(1, int(os.getenv("TEXT2AUDIO_REQUEST_PARALLEL", str(MAX_PARALLEL))))
+# Start method for process pools (OCR, see file_to_text.py); "spawn" avoids
+# forking a multi-threaded server process.
+MP_START = os.getenv("TEXT2AUDIO_MP_START", "spawn")
+
+_POOL: Optional[ThreadPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+_GLOBAL_SLOTS = threading.BoundedSemaphore(MAX_PARALLEL)
+_SLOT_WAIT_S = 0.25
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(max_workers=MAX_PARALLEL, thread_name_prefix="tts-chunk")
+        return _POOL
+
+
+def configure(max_parallel: int) -> None:
+    """Resize the shared pool, e.g. from a batch run's --workers. Call before any synthesis starts."""
+    global MAX_PARALLEL, _GLOBAL_SLOTS
+    shutdown()
+    MAX_PARALLEL = max(1, int(max_parallel))
+    _GLOBAL_SLOTS = threading.BoundedSemaphore(MAX_PARALLEL)
+
+
+def shutdown() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _synth_chunk(
+    text: str, backend: str, lang: str, out: str, piper_model: Optional[str], cache: Optional[bool]
+) -> str:
+    # Runs on a pool thread; imported lazily to keep this module cheap to import.
+    from text2audio.core import synthesize
+    # No sentence cache here: chunks already run concurrently (see segment_cache.py).
+    return str(synthesize(text, backend=backend, lang=lang, out=out, piper_model=piper_model, cache=cache,
+                          sentence_cache=False))
+
+
+def synthesize_parts(
+    parts: Iterable[str],
+    out_for: Callable[[int], Path],
+    *,
+    backend: str,
+    lang: str = "en",
+    piper_model: Optional[str] = None,
+    parallelism: Optional[int] = None,
+    cancel: Optional[threading.Event] = None,
+    cache: Optional[bool] = None,
+) -> Iterator[Tuple[int, Path]]:
+    """
+    Synthesize parts concurrently and yield (index, path) in original order,
+    starting at index 1. ``out_for(index)`` names each chunk's output file.
+
+    If any chunk fails (or ``cancel`` is set), chunks that have not started
+    are cancelled and the error is raised.
+    """
+    window = max(1, min(parallelism or REQUEST_PARALLEL, MAX_PARALLEL))
+    pool = _pool()
+    # Bound once: configure() may swap the global semaphore, and releases must
+    # go to the one they were acquired from.
+    slots = _GLOBAL_SLOTS
+    model = str(piper_model) if piper_model is not None else None
+    todo = enumerate(parts, start=1)
+    inflight: Deque[Tuple[int, Future]] = deque()
+    exhausted = False
+
+    def _submit_next() -> bool:
+        try:
+            idx, part = next(todo)
+        except StopIteration:
+            return False
+        while not slots.acquire(timeout=_SLOT_WAIT_S):
+            if cancel is not None and cancel.is_set():
+                raise RuntimeError("Synthesis cancelled.")
+        try:
+            fut = pool.submit(_synth_chunk, part, backend, lang, str(out_for(idx)), model, cache)
+        except BaseException:
+            slots.release()
+            raise
+        fut.add_done_callback(lambda _f: slots.release())
+        inflight.append((idx, fut))
+        return True
+
+    try:
+        while True:
+            # Hand out a finished head first: pulling the next part may block
+            # when parts come from a lazy source (see pipeline.py).
+            while not exhausted and len(inflight) < window and not (inflight and inflight[0][1].done()):
+                if cancel is not None and cancel.is_set():
+                    raise RuntimeError("Synthesis cancelled.")
+                exhausted = not _submit_next()
+            if not inflight:
+                return
+
+            # Wait for the head chunk, but surface failures of later chunks early.
+            head_idx, head = inflight[0]
+            while True:
+                for _, f in inflight:
+                    if f.done() and not f.cancelled() and f.exception() is not None:
+                        raise f.exception()  # type: ignore[misc]
+                if head.done():
+                    break
+                if cancel is not None and cancel.is_set():
+                    raise RuntimeError("Synthesis cancelled.")
+                wait([f for _, f in inflight if not f.done()], timeout=0.5, return_when=FIRST_COMPLETED)
+            inflight.popleft()
+            yield head_idx, Path(head.result())
+    finally:
+        for _, f in inflight:
+            f.cancel()
@@ -0,0 +1,179 @@
+# pipeline.py
+"""
+Document → audio as a chain of generators.
+
+Extraction runs in its own thread and hands pages to the rest of the chain
+through a bounded queue; segmentation is lazy (iter_segments over the page
+stream); synthesis keeps a bounded window of chunks in flight (see
+parallel.synthesize_parts). Audio for the first pages is therefore ready
+while later pages are still being extracted or OCRed, and memory is bounded
+by the queue sizes, not by the document size.
+"""
+from __future__ import annotations
+import queue
+import tempfile
+import threading
+import wave
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple, Union
+
+from text2audio.audio import mp3_frames, wav_header
+from text2audio.parallel import synthesize_parts
+from text2audio.segment import DEFAULT_MAX_CHARS, iter_segments
+
+_DONE = object()
+
+
+def _threaded(items: Iterable[Any], maxsize: int, stop: threading.Event) -> Iterator[Any]:
+    """Run items in a producer thread, handing them over through a bounded queue."""
+    q: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, maxsize))
+
+    def _put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.25)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce() -> None:
+        try:
+            for item in items:
+                if not _put(item):
+                    return
+            _put(_DONE)
+        except BaseException as e:  # hand the error to the consumer
+            _put(e)
+
+    threading.Thread(target=_produce, name="tts-extract", daemon=True).start()
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def document_to_audio(
+    source: Union[str, Path, Tuple[str, bytes]],
+    *,
+    backend: str,
+    lang: str = "en",
+    piper_model: Optional[Union[str, Path]] = None,
+    chunk_size: int = DEFAULT_MAX_CHARS,
+    use_ocr: bool = False,
+    ocr_lang: str = "eng+deu",
+    parallelism: Optional[int] = None,
+    cache: Optional[bool] = None,
+    cancel: Optional[threading.Event] = None,
+    page_queue: int = 4,
+    on_info: Optional[Callable[[str], None]] = None,
+) -> Iterator[Tuple[int, Path]]:
+    """
+    Yield (index, chunk audio file) in text order as soon as each chunk is
+    synthesized. ``source`` is a document path or a (filename, bytes) upload.
+
+    Chunk files live in a temporary directory; each one is deleted when the
+    generator advances, so consume (append, stream, copy) it before that.
+    """
+    from text2audio.file_to_text import iter_text_from_bytes, iter_text_from_path
+
+    opts = dict(use_ocr=use_ocr, ocr_lang=ocr_lang, on_info=on_info, cache=cache)
+    if isinstance(source, tuple):
+        pages = iter_text_from_bytes(source[0], source[1], **opts)
+    else:
+        pages = iter_text_from_path(source, **opts)
+    suffix = ".mp3" if backend == "gtts" else ".wav"  # same rule as core.synthesize()
+
+    stop = threading.Event()
+    with tempfile.TemporaryDirectory(prefix="tts_doc_chunks_") as tmp:
+        tmpdir = Path(tmp)
+        segments = iter_segments(_threaded(pages, page_queue, stop), chunk_size, lang=lang)
+        chunks = synthesize_parts(
+            segments,
+            lambda idx: tmpdir / f"chunk_{idx}{suffix}",
+            backend=backend,
+            lang=lang,
+            piper_model=str(piper_model) if piper_model is not None else None,
+            parallelism=parallelism,
+            cancel=cancel,
+            cache=cache,
+        )
+        try:
+            for idx, path in chunks:
+                try:
+                    yield idx, path
+                finally:
+                    path.unlink(missing_ok=True)
+        finally:
+            stop.set()
+            chunks.close()
+
+
+def document_to_file(
+    source: Union[str, Path, Tuple[str, bytes]],
+    out: Union[str, Path],
+    *,
+    backend: str,
+    bitrate: Optional[str] = None,
+    sample_rate: Optional[int] = None,
+    channels: Optional[int] = None,
+    on_chunk: Optional[Callable[[int], None]] = None,
+    **opts: Any,
+) -> Tuple[Path, int]:
+    """
+    Synthesize a document into one audio file; the format follows out's
+    extension (see encode.py). Chunks are appended as they finish, so the
+    file is complete as soon as the last chunk is. Other keyword arguments
+    go to document_to_audio(). Returns (output path, number of chunks).
+    """
+    from text2audio import encode
+    from text2audio.audio import concat_writer
+
+    out = Path(out)
+    out = out.with_suffix(encode.output_suffix(out.suffix, backend))
+    enc = dict(bitrate=bitrate, sample_rate=sample_rate, channels=channels)
+    native = encode.native_suffix(backend)
+    encoded = encode.needs_encoding(native, out.suffix, **enc)
+    joined = out.with_name(f".{out.stem}.raw{native}") if encoded else out
+    try:
+        with concat_writer(joined) as writer:
+            for idx, chunk in document_to_audio(source, backend=backend, **opts):
+                writer.append(chunk)
+                if on_chunk:
+                    on_chunk(idx)
+        if encoded:
+            encode.transcode(joined, out, **enc)
+    finally:
+        if encoded:
+            joined.unlink(missing_ok=True)
+    return out, writer.count
+
+
+def iter_audio_bytes(chunks: Iterable[Tuple[int, Path]], fmt: str) -> Iterator[bytes]:
+    """
+    Turn chunk files into one continuous stream: a streaming WAV header plus
+    PCM frames (fmt="wav"), or MP3 frames without repeated ID3 tags ("mp3").
+    """
+    params = None
+    for n, (_, path) in enumerate(chunks):
+        if fmt == "mp3":
+            yield mp3_frames(path.read_bytes(), first=n == 0)
+            continue
+        with wave.open(str(path), "rb") as src:
+            fmt_now = (src.getnchannels(), src.getsampwidth(), src.getframerate())
+            if params is None:
+                params = fmt_now
+                yield wav_header(fmt_now[2], nchannels=fmt_now[0], sampwidth=fmt_now[1])
+            elif fmt_now != params:
+                raise RuntimeError(f"Chunk format {fmt_now} differs from stream format {params}")
+            while True:
+                block = src.readframes(1 << 16)
+                if not block:
+                    break
+                yield block
@@ -0,0 +1,227 @@
+# piper_cli.py
+"""
+Driving the ``piper`` CLI when the Python API is unusable.
+
+The piper-tts CLI (1.3.0, pinned in requirements.txt) has no ``--text``
+flag: leftover arguments are spoken literally, and otherwise every stdin
+line is an utterance. Its ``--output_dir`` mode writes all remaining stdin
+into the first file and ``--output-raw`` has no end-of-utterance marker, so
+it cannot be kept running per request; synthesize_once() starts it once per
+call and feeds the text on stdin.
+
+The standalone C++ ``piper`` binary accepts ``--json-input`` instead: every
+stdin line is a JSON object with ``text`` and ``output_file``, and after
+writing the file it prints the path on stdout. For such binaries one
+long-lived process per (binary, model) keeps the model loaded, so only the
+first request pays for model load. Requests to one worker are serialized
+and matched to responses by order and path. A crashed worker is restarted
+(and the request retried once), and workers idle for longer than
+TEXT2AUDIO_PIPER_CLI_IDLE_S are shut down by a reaper thread.
+"""
+from __future__ import annotations
+import atexit
+import json
+import os
+import queue
+import subprocess
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Optional, Tuple, Union
+
+IDLE_TIMEOUT = float(os.getenv("TEXT2AUDIO_PIPER_CLI_IDLE_S", "300"))
+_START_GRACE = 60.0  # first request includes model load
+
+_PROBES: Dict[str, bool] = {}
+_PROBES_LOCK = threading.Lock()
+
+
+def supports_json_input(cli: str) -> bool:
+    """True if this piper binary advertises --json-input (checked once per binary)."""
+    with _PROBES_LOCK:
+        if cli in _PROBES:
+            return _PROBES[cli]
+    try:
+        cp = subprocess.run([cli, "--help"], capture_output=True, text=True, timeout=15)
+        ok = "--json-input" in (cp.stdout + cp.stderr) or "--json_input" in (cp.stdout + cp.stderr)
+    except Exception:
+        ok = False
+    with _PROBES_LOCK:
+        _PROBES[cli] = ok
+    return ok
+
+
+class PiperCliWorker:
+    def __init__(self, cli: str, model_path: Union[str, Path]):
+        self.cli = cli
+        self.model_path = Path(model_path)
+        self._proc: Optional[subprocess.Popen] = None
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._stderr: Deque[str] = deque(maxlen=20)
+        self._lock = threading.Lock()
+        self._served = 0
+        self.last_used = time.monotonic()
+        self.restarts = 0
+
+    def _start(self) -> None:
+        self._proc = subprocess.Popen(
+            [self.cli, "--model", str(self.model_path), "--json-input"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+        )
+        self._lines = queue.Queue()
+        self._served = 0
+        threading.Thread(target=self._pump_stdout, args=(self._proc, self._lines), daemon=True).start()
+        threading.Thread(target=self._pump_stderr, args=(self._proc,), daemon=True).start()
+
+    @staticmethod
+    def _pump_stdout(proc: subprocess.Popen, lines: "queue.Queue[Optional[str]]") -> None:
+        for line in proc.stdout:  # type: ignore[union-attr]
+            lines.put(line.strip())
+        lines.put(None)  # EOF → process exited
+
+    def _pump_stderr(self, proc: subprocess.Popen) -> None:
+        for line in proc.stderr:  # type: ignore[union-attr]
+            self._stderr.append(line.rstrip())
+
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def _request(self, text: str, out: Path, timeout: float) -> None:
+        if not self.alive():
+            if self._proc is not None:
+                self.restarts += 1
+            self._start()
+        proc = self._proc
+        assert proc is not None and proc.stdin is not None
+        # One utterance per line: the CLI reads newline-delimited JSON.
+        proc.stdin.write(json.dumps({"text": text, "output_file": str(out)}) + "\n")
+        proc.stdin.flush()
+        deadline = timeout + (_START_GRACE if self._served == 0 else 0.0)
+        try:
+            line = self._lines.get(timeout=deadline)
+        except queue.Empty:
+            self.close()
+            raise TimeoutError(f"piper CLI did not answer within {deadline:.0f}s")
+        if line is None:
+            try:
+                code = proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:  # stdout closed but still running: unusable
+                self.close()
+                code = proc.poll()
+            tail = " | ".join(self._stderr)
+            raise RuntimeError(f"piper CLI exited with code {code}: {tail}")
+        if Path(line).resolve() != out.resolve():
+            self.close()  # responses out of sync; never trust this process again
+            raise RuntimeError(f"piper CLI answered {line!r}, expected {out}")
+        self._served += 1
+
+    def synthesize(self, text: str, out: Union[str, Path], timeout_per_1k_chars: float = 30.0) -> Path:
+        out = Path(out)
+        timeout = max(10.0, len(text) / 1000.0 * timeout_per_1k_chars)
+        with self._lock:
+            self.last_used = time.monotonic()
+            try:
+                try:
+                    self._request(text, out, timeout)
+                except TimeoutError:
+                    raise
+                except (RuntimeError, OSError):
+                    if self.alive():
+                        raise
+                    self._request(text, out, timeout)  # crashed: restart once and retry
+            finally:
+                self.last_used = time.monotonic()
+        if not out.exists() or out.stat().st_size == 0:
+            raise RuntimeError("Piper produced no audio via CLI.")
+        return out
+
+    def close(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            if proc.stdin:
+                proc.stdin.close()  # EOF lets the CLI exit cleanly
+            proc.wait(timeout=5)
+        except Exception:
+            proc.kill()
+            proc.wait()
+
+
+_WORKERS: Dict[Tuple[str, str], PiperCliWorker] = {}
+_WORKERS_LOCK = threading.Lock()
+_REAPER: Optional[threading.Thread] = None
+
+
+def _reap_idle() -> None:
+    while True:
+        time.sleep(max(1.0, min(30.0, IDLE_TIMEOUT / 4)))
+        now = time.monotonic()
+        with _WORKERS_LOCK:
+            idle = [w for w in _WORKERS.values() if w.alive() and now - w.last_used > IDLE_TIMEOUT]
+        for w in idle:
+            if w._lock.acquire(blocking=False):  # skip workers serving a request
+                try:
+                    w.close()
+                finally:
+                    w._lock.release()
+
+
+def get_worker(cli: str, model_path: Union[str, Path]) -> PiperCliWorker:
+    global _REAPER
+    key = (cli, str(Path(model_path).resolve()))
+    with _WORKERS_LOCK:
+        w = _WORKERS.get(key)
+        if w is None:
+            w = _WORKERS[key] = PiperCliWorker(cli, key[1])
+        if _REAPER is None:
+            _REAPER = threading.Thread(target=_reap_idle, name="piper-cli-reaper", daemon=True)
+            _REAPER.start()
+            atexit.register(shutdown)
+        return w
+
+
+def synthesize_once(
+    cli: str, model_path: Union[str, Path], text: str, out: Union[str, Path], timeout_per_1k_chars: float = 30.0
+) -> Path:
+    """One CLI run for one text: model and output file as flags, the text on stdin."""
+    out = Path(out)
+    timeout = _START_GRACE + max(10.0, len(text) / 1000.0 * timeout_per_1k_chars)
+    try:
+        cp = subprocess.run(
+            [cli, "--model", str(model_path), "--output_file", str(out)],
+            input=text + "\n",
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        raise TimeoutError(f"piper CLI did not finish within {timeout:.0f}s")
+    if cp.returncode != 0:
+        tail = " | ".join(cp.stderr.strip().splitlines()[-5:])
+        raise RuntimeError(f"piper CLI exited with code {cp.returncode}: {tail}")
+    if not out.exists() or out.stat().st_size == 0:
+        raise RuntimeError("Piper produced no audio via CLI.")
+    return out
+
+
+def synthesize(cli: str, model_path: Union[str, Path], text: str, out: Union[str, Path]) -> Path:
+    """Persistent worker if the binary speaks --json-input, else one run per call."""
+    if supports_json_input(cli):
+        return get_worker(cli, model_path).synthesize(text, out)
+    return synthesize_once(cli, model_path, text, out)
+
+
+def shutdown() -> None:
+    with _WORKERS_LOCK:
+        workers = list(_WORKERS.values())
+        _WORKERS.clear()
+    for w in workers:
+        w.close()
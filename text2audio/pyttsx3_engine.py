@@ -1,10 +1,19 @@
 # pyttsx3_engine.py
-import threading, atexit, time, os
-import pyttsx3
+import threading, atexit, time, os, wave
+from typing import Dict, Optional
+from text2audio import lazy
+
+pyttsx3 = lazy.module("pyttsx3", "pyttsx3 not installed. Install with: pip install pyttsx3")
 
 _ENGINE = None
 _LOCK = threading.Lock()
 
+# Per-engine state, guarded by _LOCK.
+_VOICE_BY_LANG: Dict[str, Optional[str]] = {}
+_CURRENT_VOICE: Optional[str] = None
+_DONE = threading.Event()
+_COMPLETED = [False]
+
 def _shutdown():
     global _ENGINE
     try:
@@ -13,64 +22,92 @@ def _shutdown():
     finally:
         _ENGINE = None
 
+def _on_finished(name, completed):
+    _COMPLETED[0] = bool(completed)
+    _DONE.set()
+
 def get_engine():
-    global _ENGINE
+    global _ENGINE, _CURRENT_VOICE
     if _ENGINE is None:
         e = pyttsx3.init(driverName="espeak")
+        # Connected once; the callback signals whichever request holds _LOCK.
+        e.connect('finished-utterance', _on_finished)
         _ENGINE = e
+        _VOICE_BY_LANG.clear()
+        _CURRENT_VOICE = None
         atexit.register(_shutdown)
     return _ENGINE
 
+def _voice_for(e, voice_lang: str) -> Optional[str]:
+    """Voice id matching voice_lang; the voice list is scanned once per language."""
+    key = voice_lang.lower()
+    if key in _VOICE_BY_LANG:
+        return _VOICE_BY_LANG[key]
+    found = None
+    try:
+        for v in e.getProperty("voices"):
+            langs = []
+            try:
+                langs = [x.decode().lower() if isinstance(x, (bytes, bytearray)) else str(x).lower()
+                         for x in getattr(v, "languages", [])]
+            except Exception:
+                pass
+            name = getattr(v, "name", "").lower()
+            if key in name or any(key in l for l in langs):
+                found = v.id
+                break
+    except Exception:
+        pass
+    _VOICE_BY_LANG[key] = found
+    return found
+
+def _verify_wav(out_path: str) -> None:
+    """The espeak driver writes the file before 'finished-utterance'; check it is complete."""
+    try:
+        with wave.open(out_path, "rb") as wf:
+            frames = wf.getnframes()
+            expected = 44 + frames * wf.getnchannels() * wf.getsampwidth()
+    except (FileNotFoundError, EOFError, wave.Error) as err:
+        raise RuntimeError(f"pyttsx3 did not produce audio at: {out_path} ({err})") from err
+    if frames == 0 or os.path.getsize(out_path) < expected:
+        raise RuntimeError(f"pyttsx3 produced an empty or truncated WAV at: {out_path}")
+
 def synthesize_to_wav(text: str, out_path: str, voice_lang: str | None = None, *,
                       timeout_per_1k_chars: float = 6.0):
     """
-    Reuses a single engine. Runs a manual event loop with a timeout so it can’t hang forever.
+    Reuses a single engine. Completion is signalled by the 'finished-utterance'
+    callback; the loop never sleeps for a fixed time and gives up after a timeout.
     """
+    global _CURRENT_VOICE
     e = get_engine()
-    done = threading.Event()
-
-    def _on_end(name, completed):
-        done.set()
 
     with _LOCK:
-        # (Re)connect listener every time (Streamlit reloads can drop refs)
-        try:
-            e.disconnect('finished-utterance')  # ignore error if not connected
-        except Exception:
-            pass
-        e.connect('finished-utterance', _on_end)
-
         if voice_lang:
-            try:
-                for v in e.getProperty("voices"):
-                    langs = []
-                    try:
-                        langs = [x.decode().lower() if isinstance(x, (bytes, bytearray)) else str(x).lower()
-                                 for x in getattr(v, "languages", [])]
-                    except Exception:
-                        pass
-                    name = getattr(v, "name", "").lower()
-                    if voice_lang.lower() in name or any(voice_lang.lower() in l for l in langs):
-                        e.setProperty("voice", v.id)
-                        break
-            except Exception:
-                pass
+            vid = _voice_for(e, voice_lang)
+            if vid is not None and vid != _CURRENT_VOICE:
+                e.setProperty("voice", vid)
+                _CURRENT_VOICE = vid
+
+        _DONE.clear()
+        _COMPLETED[0] = False
 
         # Queue and run a manual loop
         e.save_to_file(text, out_path)
         e.startLoop(False)  # non-blocking loop
 
         try:
-            # Iterate until finished or timeout
+            # The espeak driver synthesizes synchronously inside iterate() and fires
+            # the callback from there, so this usually finishes after one pass.
             timeout = max(4.0, (len(text) / 1000.0) * timeout_per_1k_chars)
-            t0 = time.time()
+            deadline = time.monotonic() + timeout
             while True:
                 e.iterate()
-                if done.is_set():
+                remaining = deadline - time.monotonic()
+                # Wakes immediately if the callback fires from a driver thread.
+                if _DONE.is_set() or _DONE.wait(min(max(remaining, 0.0), 0.05)):
                     break
-                if time.time() - t0 > timeout:
+                if remaining <= 0:
                     raise TimeoutError(f"pyttsx3 synthesis timed out after {timeout:.1f}s")
-                time.sleep(0.01)
         finally:
             # Ensure we end the loop and clear the queue either way
             try:
@@ -79,9 +116,8 @@ def synthesize_to_wav(text: str, out_path: str, voice_lang: str | None = None, *
                 pass
             e.stop()
 
-    # Finalize: wait a moment for file flush
-    for _ in range(50):
-        if os.path.exists(out_path) and os.path.getsize(out_path) > 0:
-            return out_path
-        time.sleep(0.05)
-    raise RuntimeError(f"pyttsx3 did not produce audio at: {out_path}")
+        if not _COMPLETED[0]:
+            raise RuntimeError("pyttsx3 utterance was cancelled before completion")
+
+    _verify_wav(out_path)
+    return out_path
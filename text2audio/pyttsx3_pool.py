@@ -0,0 +1,235 @@
+# pyttsx3_pool.py
+"""
+Pool of worker processes, each owning its own pyttsx3/espeak engine.
+
+pyttsx3 engines are process-global and not thread-safe, so a single engine
+serializes all offline synthesis. Here every worker process runs one engine;
+requests are dispatched to whichever worker is idle. A worker that crashes or
+does not answer within its deadline is killed and replaced, and a monitor
+thread periodically pings idle workers so broken ones are replaced before
+they are handed a request.
+"""
+from __future__ import annotations
+import atexit
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from typing import Any, List, Optional
+
+from text2audio.routing import BackendError
+
+POOL_SIZE = max(1, int(os.getenv("TEXT2AUDIO_PYTTSX3_WORKERS", str(min(4, os.cpu_count() or 1)))))
+HEALTH_INTERVAL = float(os.getenv("TEXT2AUDIO_PYTTSX3_HEALTH_S", "30"))
+_PING_TIMEOUT = 5.0
+_START_TIMEOUT = 20.0  # first request also pays pyttsx3.init()
+
+
+def _worker_main(conn) -> None:
+    """Worker loop: ('ping',) → ('pong',); ('synth', text, out, lang, timeout) → ('ok', path) | ('err', msg)."""
+    from text2audio.pyttsx3_engine import synthesize_to_wav
+
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            return
+        if msg[0] == "ping":
+            conn.send(("pong",))
+        elif msg[0] == "synth":
+            _, text, out, lang, per_1k = msg
+            try:
+                conn.send(("ok", synthesize_to_wav(text, out, voice_lang=lang, timeout_per_1k_chars=per_1k)))
+            except Exception as e:
+                conn.send(("err", f"{type(e).__name__}: {e}"))
+        elif msg[0] == "stop":
+            return
+
+
+class _Worker:
+    def __init__(self, ctx) -> None:
+        self.conn, child = ctx.Pipe()
+        self.proc = ctx.Process(target=_worker_main, args=(child,), name="pyttsx3-worker", daemon=True)
+        self.proc.start()
+        child.close()
+        self.warm = False  # engine initialized (first request done)
+
+    def call(self, msg: tuple, timeout: float) -> tuple:
+        """Send msg and wait for the reply. Raises TimeoutError / RuntimeError on a dead worker."""
+        try:
+            self.conn.send(msg)
+            if not self.conn.poll(timeout):
+                raise TimeoutError(f"pyttsx3 worker {self.proc.pid} did not answer within {timeout:.1f}s")
+            return self.conn.recv()
+        except TimeoutError:  # an OSError subclass; keep it distinct from a dead pipe
+            raise
+        except (EOFError, OSError) as e:
+            raise BackendError(f"pyttsx3 worker {self.proc.pid} died (exit code {self.proc.exitcode})") from e
+
+    def alive(self) -> bool:
+        return self.proc.is_alive()
+
+    def kill(self) -> None:
+        try:
+            self.conn.close()
+        finally:
+            if self.proc.is_alive():
+                self.proc.kill()
+            self.proc.join(timeout=2)
+
+
+class Pyttsx3Pool:
+    def __init__(self, size: int = POOL_SIZE, start_method: str = "spawn"):
+        self.size = max(1, size)
+        self._ctx = multiprocessing.get_context(start_method)
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.restarts = 0
+        self.dispatched = 0
+        for _ in range(self.size):
+            w = _Worker(self._ctx)
+            self._workers.append(w)
+            self._idle.put(w)
+        self._monitor = threading.Thread(target=self._monitor_loop, name="pyttsx3-pool-health", daemon=True)
+        self._monitor.start()
+
+    def _replace(self, w: _Worker) -> _Worker:
+        w.kill()
+        fresh = _Worker(self._ctx)
+        with self._lock:
+            self._workers = [fresh if x is w else x for x in self._workers]
+            self.restarts += 1
+        return fresh
+
+    def synthesize_to_wav(
+        self,
+        text: str,
+        out_path: str,
+        voice_lang: Optional[str] = None,
+        *,
+        timeout_per_1k_chars: float = 6.0,
+    ) -> str:
+        if self._closed:
+            raise RuntimeError("pyttsx3 pool is shut down")
+        slot = [self._idle.get()]
+        try:
+            return self._synth_on(slot, text, out_path, voice_lang, timeout_per_1k_chars)
+        finally:
+            self._idle.put(slot[0])
+
+    def _synth_on(
+        self, slot: List[_Worker], text: str, out_path: str, voice_lang: Optional[str], timeout_per_1k_chars: float
+    ) -> str:
+        """Run one synthesis on slot[0] (taken from the idle queue); a replaced worker is stored back in slot."""
+        timeout = max(4.0, (len(text) / 1000.0) * timeout_per_1k_chars)
+        w = slot[0]
+        if not w.alive():
+            w = slot[0] = self._replace(w)
+        deadline = timeout + (0.0 if w.warm else _START_TIMEOUT)
+        with self._lock:
+            self.dispatched += 1
+        try:
+            reply = w.call(("synth", text, out_path, voice_lang, timeout_per_1k_chars), deadline + 2.0)
+        except (TimeoutError, RuntimeError):
+            # Hung or crashed: never reuse this process.
+            slot[0] = self._replace(w)
+            raise
+        w.warm = True
+        if reply[0] == "ok":
+            return reply[1]
+        raise BackendError(reply[1])
+
+    def warm_up(self, text: str, out_dir: str, voice_lang: Optional[str] = None) -> List[Optional[str]]:
+        """
+        Synthesize text once on every worker, concurrently, so each engine is
+        initialized before the first request. Waits until all workers are
+        idle; returns one entry per worker: None if it is warm, else the error.
+        """
+        slots = [[self._idle.get()] for _ in range(self.size)]
+        errors: List[Optional[str]] = [None] * len(slots)
+
+        def _run(i: int) -> None:
+            try:
+                self._synth_on(slots[i], text, os.path.join(out_dir, f"warmup_{i}.wav"), voice_lang, 6.0)
+            except Exception as e:
+                errors[i] = str(e) or type(e).__name__
+
+        threads = [threading.Thread(target=_run, args=(i,), name="pyttsx3-warmup", daemon=True)
+                   for i in range(len(slots))]
+        try:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            for slot in slots:
+                self._idle.put(slot[0])
+        return errors
+
+    def check(self) -> int:
+        """Ping every idle worker; replace the ones that don't answer. Returns replacements."""
+        replaced = 0
+        checked: List[_Worker] = []
+        while True:
+            try:
+                w = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                if not w.alive() or w.call(("ping",), _PING_TIMEOUT if w.warm else _START_TIMEOUT)[0] != "pong":
+                    raise RuntimeError("bad ping")
+            except Exception:
+                w = self._replace(w)
+                replaced += 1
+            checked.append(w)
+        for w in checked:
+            self._idle.put(w)
+        return replaced
+
+    def _monitor_loop(self) -> None:
+        while not self._closed:
+            time.sleep(HEALTH_INTERVAL)
+            if not self._closed:
+                self.check()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "alive": sum(1 for w in self._workers if w.alive()),
+                "idle": self._idle.qsize(),
+                "dispatched": self.dispatched,
+                "restarts": self.restarts,
+            }
+
+    def shutdown(self) -> None:
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers)
+        for w in workers:
+            try:
+                w.conn.send(("stop",))
+            except Exception:
+                pass
+            w.kill()
+
+
+_POOL: Optional[Pyttsx3Pool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool() -> Pyttsx3Pool:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = Pyttsx3Pool()
+            atexit.register(_POOL.shutdown)
+        return _POOL
+
+
+def synthesize_to_wav(text: str, out_path: str, voice_lang: Optional[str] = None, **kwargs: Any) -> str:
+    """Drop-in for pyttsx3_engine.synthesize_to_wav that runs in the worker pool."""
+    return get_pool().synthesize_to_wav(text, out_path, voice_lang, **kwargs)
@@ -0,0 +1,249 @@
+# result_cache.py
+"""
+Content-addressed cache of synthesized audio files.
+
+Entries live under ``<cache dir>/<2 hex chars>/<sha256><suffix>``; the key
+covers the normalized text, backend, language, model identity (path plus
+checksum) and output format. Writes go to a temp file and are moved into
+place atomically, so concurrent processes never see partial entries. Hits
+touch the entry's mtime, which makes eviction (oldest mtime first, until the
+byte budget fits) least-recently-used.
+
+Hits are copied to the caller's destination: a hardlink would make the
+user's file and the entry one inode, so LRU touches would change the file's
+mtime and any in-place edit of the output would corrupt later hits. Only
+callers that own the destination (a private temp dir) ask for a link.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+DEFAULT_CACHE_DIR = Path(os.getenv("TEXT2AUDIO_CACHE_DIR", "~/.cache/text2audio")).expanduser()
+DEFAULT_MAX_MB = float(os.getenv("TEXT2AUDIO_RESULT_CACHE_MB", "1024"))
+ENABLED = os.getenv("TEXT2AUDIO_RESULT_CACHE", "1").lower() not in ("0", "false", "no", "off")
+
+_KEY_VERSION = 1
+_WS = re.compile(r"\s+")
+
+_CHECKSUMS: Dict[Tuple[str, int, int], str] = {}
+_CHECKSUMS_LOCK = threading.Lock()
+
+
+def normalize_text(text: str) -> str:
+    """NFC + collapsed whitespace, so cosmetic differences share an entry."""
+    return _WS.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def file_checksum(path: Union[str, Path]) -> str:
+    """sha256 of a file, memoized per (path, size, mtime) for the process lifetime."""
+    p = Path(path).resolve()
+    st = p.stat()
+    memo_key = (str(p), st.st_size, st.st_mtime_ns)
+    with _CHECKSUMS_LOCK:
+        hit = _CHECKSUMS.get(memo_key)
+    if hit:
+        return hit
+    h = hashlib.sha256()
+    with open(p, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    digest = h.hexdigest()
+    with _CHECKSUMS_LOCK:
+        _CHECKSUMS[memo_key] = digest
+    return digest
+
+
+def cache_key(
+    text: str,
+    backend: str,
+    lang: Optional[str],
+    fmt: str,
+    model_path: Optional[Union[str, Path]] = None,
+) -> str:
+    model_id: Optional[List[str]] = None
+    if model_path is not None:
+        from text2audio.model_registry import entry
+
+        p = Path(model_path).resolve()
+        # The models index keeps the sha256 across restarts; hash directly if it has none.
+        model_id = [str(p), entry(p).get("sha256") or file_checksum(p)]
+    # Piper voices fix their own language; lang only matters for gTTS/pyttsx3.
+    key_lang = None if backend == "piper" else (lang or "")
+    payload = [_KEY_VERSION, normalize_text(text), backend, key_lang, model_id, fmt.lower()]
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _materialize(src: Path, dest: Path, link: bool) -> None:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.unlink(missing_ok=True)
+    if link:
+        try:
+            os.link(src, tmp)
+            os.replace(tmp, dest)
+            return
+        except OSError:  # cross-device, or filesystem without hardlinks
+            tmp.unlink(missing_ok=True)
+    try:
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+class ResultCache:
+    """
+    One cache directory. ``enabled`` is the cache's on/off switch: callers
+    consult it (directly or via ``use()``) before get()/put(), and stats()
+    reports it.
+    """
+
+    def __init__(self, root: Union[str, Path], max_bytes: int, enabled: bool = True):
+        self.root = Path(root)
+        self.max_bytes = max(0, max_bytes)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._bytes: Optional[int] = None  # lazily scanned
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def use(self, cache: Optional[bool] = None) -> bool:
+        """Whether to consult the cache: a caller's explicit choice, else the switch."""
+        return self.enabled if cache is None else cache
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.root / key[:2] / f"{key}{suffix}"
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        out = []
+        if not self.root.exists():
+            return out
+        for p in self.root.glob("*/*"):
+            if p.name.startswith("."):
+                continue
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            out.append((st.st_mtime, st.st_size, p))
+        return out
+
+    def _total(self) -> int:
+        if self._bytes is None:
+            self._bytes = sum(size for _, size, _ in self._entries())
+        return self._bytes
+
+    def get(self, key: str, dest: Union[str, Path], *, link: bool = False) -> Optional[Path]:
+        """
+        On a hit, copy the entry to dest and return dest. ``link=True``
+        hardlinks instead (falling back to a copy); only for destinations
+        the caller owns and never modifies, e.g. a private temp dir.
+        """
+        dest = Path(dest)
+        src = self._path(key, dest.suffix)
+        try:
+            os.utime(src)  # LRU touch
+            _materialize(src, dest, link)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return dest
+
+    def get_bytes(self, key: str, suffix: str) -> Optional[bytes]:
+        """Small entries (e.g. extracted text): return the content itself."""
+        src = self._path(key, suffix)
+        try:
+            os.utime(src)  # LRU touch
+            data = src.read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, src: Union[str, Path]) -> None:
+        src = Path(src)
+
+        def _copy(f) -> None:
+            # Copy (not link): the caller's file may be overwritten in place later.
+            with open(src, "rb") as s:
+                shutil.copyfileobj(s, f, 1 << 20)
+
+        self._store(self._path(key, src.suffix), _copy)
+
+    def put_bytes(self, key: str, data: bytes, suffix: str) -> None:
+        self._store(self._path(key, suffix), lambda f: f.write(data))
+
+    def _store(self, dst: Path, write: Callable[[Any], Any]) -> None:
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".", dir=dst.parent)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp, dst)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        size = dst.stat().st_size
+        with self._lock:
+            self.stores += 1
+            self._bytes = self._total() + size
+            if self.max_bytes and self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Caller holds self._lock. Rescan: other processes share the directory.
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+                total -= size
+                self.evictions += 1
+            except FileNotFoundError:
+                total -= size
+        self._bytes = total
+
+    def clear(self) -> int:
+        with self._lock:
+            n = 0
+            for _, _, p in self._entries():
+                p.unlink(missing_ok=True)
+                n += 1
+            self._bytes = 0
+            return n
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "dir": str(self.root),
+                "enabled": self.enabled,
+                "bytes": self._total(),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+            }
+
+
+# Process-wide instance; the directory itself is shared across processes.
+RESULTS = ResultCache(DEFAULT_CACHE_DIR / "results", int(DEFAULT_MAX_MB * 1024 * 1024), enabled=ENABLED)
@@ -0,0 +1,222 @@
+# routing.py
+"""
+Backend health router: one circuit breaker per synthesis path.
+
+Piper tries its Python API before the ``piper`` CLI, pyttsx3 its engine
+before the espeak CLI. On a host where the first path is broken every call
+used to pay for a full failed attempt (including a model load) before the
+fallback ran. route() remembers that instead:
+
+    closed  ── FAILURES consecutive errors ──▶ open   (path skipped)
+    open    ── COOLDOWN_S elapsed ──▶ probing   (a background probe runs;
+                                                 calls still skip the path)
+    probing ── probe succeeds ──▶ closed,  probe fails ──▶ open again
+
+A path is only skipped while its fallback is usable, so a host without the
+fallback keeps trying the primary path as before. Any error of the primary
+path hands the call to the fallback, but only failures of the path itself
+(BACKEND_ERRORS: BackendError, OSError, TimeoutError) count toward opening
+the breaker; other errors, e.g. from bad input or an API mismatch, neither
+open it nor reset its count.
+
+Breakers are keyed by path and scope (the Piper model, so one broken voice
+does not send every voice to the CLI) and live in the process that calls
+route(): the API server and its chunk/job threads share one set, while a
+separate process (a CLI or batch run) starts with all breakers closed.
+"""
+from __future__ import annotations
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from text2audio import metrics
+
+FAILURES = max(1, int(os.getenv("TEXT2AUDIO_BREAKER_FAILURES", "3")))
+COOLDOWN_S = float(os.getenv("TEXT2AUDIO_BREAKER_COOLDOWN_S", "60"))
+PROBE_PHRASE = "Hello."
+
+log = logging.getLogger("text2audio.routing")
+
+T = TypeVar("T")
+
+
+class CircuitOpen(RuntimeError):
+    """Handed to the fallback in place of the error when a path was skipped."""
+
+
+class BackendError(RuntimeError):
+    """A synthesis path itself failed: engine missing, crashed, or produced nothing."""
+
+
+# What counts toward opening a breaker (TimeoutError is an OSError; listed for clarity).
+BACKEND_ERRORS = (BackendError, OSError, TimeoutError)
+
+
+class Breaker:
+    """Failure bookkeeping for one path; all methods are thread-safe."""
+
+    def __init__(self, path: str, scope: str = ""):
+        self.path, self.scope = path, scope
+        self.name = f"{path}[{scope}]" if scope else path
+        self.probe: Optional[Callable[[], Any]] = None
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self.failures = 0  # consecutive
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.calls = self.errors = self.skipped = self.probes = 0
+
+    def allow(self) -> bool:
+        """True if the path should be tried; may start a background probe."""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - (self.opened_at or 0.0) >= COOLDOWN_S:
+                if self.probe is None:
+                    # Nothing to probe with: let this one call through as the trial.
+                    self.state = "probing"
+                    log.info("%s: cool-down over, trying one call", self.name)
+                    return True
+                self.state = "probing"
+                threading.Thread(target=self._run_probe, args=(self.probe,),
+                                 name="tts-probe", daemon=True).start()
+            self.skipped += 1
+        metrics.ROUTE_SKIPS.inc(path=self.path)
+        return False
+
+    def success(self) -> None:
+        with self._lock:
+            self.calls += 1
+            self.failures = 0
+            self._close("call succeeded")
+
+    def failure(self, err: BaseException) -> None:
+        with self._lock:
+            self.calls += 1
+            self.errors += 1
+            self.failures += 1
+            self.last_error = str(err) or type(err).__name__
+            if self.state == "probing" or (self.state == "closed" and self.failures >= FAILURES):
+                self._open()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._close("reset")
+
+    def _open(self) -> None:  # lock held
+        if self.state != "open":
+            if self.state == "closed":
+                metrics.BREAKER_OPEN.inc(path=self.path)
+                log.warning("%s: %d consecutive failures, skipping it for %gs (last error: %s)",
+                            self.name, self.failures, COOLDOWN_S, self.last_error)
+            else:
+                log.info("%s: still failing (%s), next probe in %gs", self.name, self.last_error, COOLDOWN_S)
+        self.state = "open"
+        self.opened_at = time.monotonic()
+
+    def _close(self, why: str) -> None:  # lock held
+        if self.state != "closed":
+            metrics.BREAKER_OPEN.dec(path=self.path)
+            log.warning("%s: %s, routing calls to it again", self.name, why)
+        self.state = "closed"
+        self.opened_at = None
+
+    def _run_probe(self, probe: Callable[[], Any]) -> None:
+        try:
+            probe()
+        except Exception as e:
+            with self._lock:
+                self.probes += 1
+                self.last_error = str(e) or type(e).__name__
+                if self.state == "probing":
+                    self._open()
+        else:
+            with self._lock:
+                self.probes += 1
+                self.failures = 0
+                if self.state == "probing":
+                    self._close("probe succeeded")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            open_for = time.monotonic() - self.opened_at if self.opened_at is not None else None
+            return {
+                "path": self.path,
+                "scope": self.scope,
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "open_s": round(open_for, 1) if open_for is not None else None,
+                "last_error": self.last_error,
+                "calls": self.calls,
+                "errors": self.errors,
+                "skipped": self.skipped,
+                "probes": self.probes,
+            }
+
+
+_LOCK = threading.Lock()
+_BREAKERS: Dict[Tuple[str, str], Breaker] = {}
+
+
+def breaker(path: str, scope: str = "") -> Breaker:
+    with _LOCK:
+        b = _BREAKERS.get((path, scope))
+        if b is None:
+            b = _BREAKERS[(path, scope)] = Breaker(path, scope)
+        return b
+
+
+def route(
+    path: str,
+    primary: Callable[[], T],
+    fallback: Callable[[BaseException], T],
+    *,
+    scope: str = "",
+    probe: Optional[Callable[[], Any]] = None,
+    fallback_ready: Callable[[], bool] = lambda: True,
+) -> T:
+    """
+    Run primary(), or fallback(error) if it fails; only BACKEND_ERRORS are
+    recorded as failures of path. While path's breaker is open (and
+    fallback_ready()), primary is skipped and fallback receives a CircuitOpen
+    error. probe() re-tests the path in the background.
+    """
+    b = breaker(path, scope)
+    if probe is not None:
+        b.probe = probe
+    # Never skip the only working option: without a fallback, keep trying primary.
+    if b.state == "closed" or not fallback_ready() or b.allow():
+        try:
+            result = primary()
+        except Exception as e:
+            if isinstance(e, BACKEND_ERRORS):
+                b.failure(e)
+            return fallback(e)
+        b.success()
+        return result
+    log.debug("%s: circuit open, using the fallback", b.name)
+    return fallback(CircuitOpen(f"{b.name} skipped after {b.failures} failures (last error: {b.last_error})"))
+
+
+def stats() -> Dict[str, Any]:
+    """Breaker states for the API: settings plus one entry per path seen."""
+    with _LOCK:
+        breakers: List[Breaker] = list(_BREAKERS.values())
+    return {
+        "failures_to_open": FAILURES,
+        "cooldown_s": COOLDOWN_S,
+        "paths": [b.snapshot() for b in breakers],
+    }
+
+
+def reset() -> int:
+    """Close every breaker; returns how many were open."""
+    with _LOCK:
+        breakers = list(_BREAKERS.values())
+    n = sum(b.state != "closed" for b in breakers)
+    for b in breakers:
+        b.reset()
+    return n
@@ -0,0 +1,189 @@
+# segment.py
+"""
+Boundary-aware text segmentation.
+
+Text is split into sentences first, then sentences are packed greedily into
+chunks of at most ``max_chars``. Sentences that are too long on their own are
+broken at clause punctuation, then at whitespace, and only as a last resort
+in the middle of a word. Input may be a string or any iterable of string
+pieces (e.g. file blocks or PDF pages); it is consumed lazily.
+"""
+from __future__ import annotations
+import re
+from typing import Callable, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Lower-case, without the trailing period.
+_ABBREV_EN = frozenset("""
+    mr mrs ms dr prof sr jr st vs etc e.g i.e inc ltd co corp no nos fig figs approx dept est
+    jan feb mar apr jun jul aug sep sept oct nov dec mon tue wed thu fri sat sun
+    u.s u.k a.m p.m cf al ed eds vol vols pp p ca gen gov sen rep rev lt col sgt capt
+""".split())
+
+_ABBREV_DE = frozenset("""
+    z.b d.h u.a u.ä o.ä usw bzw ca vgl nr dr prof hr fr frl str st ggf evtl inkl zzgl bspw sog
+    etc u.u u.v.m z.t m.e abs art bd s ff mio mrd tsd jh jhd gem lt allg geb gest
+    jan feb mär apr jun jul aug sep sept okt nov dez mo di mi do fr sa so
+""".split())
+
+_ABBREVIATIONS = {"en": _ABBREV_EN, "de": _ABBREV_DE}
+
+# Sentence-final punctuation (plus closing quotes/brackets) followed by whitespace,
+# or a blank line. The lookahead needs the next visible char to be buffered so a
+# boundary is never decided at the edge of a streamed piece.
+_SENTENCE_END = re.compile(r"([.!?…]+[\"'»«”“’)\]]*)(\s+)(?=\S)|\n[ \t]*\n\s*(?=\S)")
+# A sentence end can still form at the buffer's tail while it ends in these.
+_PENDING = frozenset(".!?…\"'»«”“’)]")
+_MAX_WORD = 64  # how far back _is_boundary looks for the word before a period
+_CLAUSE_END = re.compile(r"(?<=[,;:])\s+|\s+(?=[–—-]\s)")
+_WS = re.compile(r"\s+")
+
+DEFAULT_MAX_CHARS = 1200
+
+
+def _lang_rules(lang: Optional[str]) -> Tuple[FrozenSet[str], bool]:
+    """Abbreviations for lang, and whether "3. Oktober"-style ordinals are used."""
+    if lang:
+        key = lang.lower().replace("_", "-").split("-")[0][:2]
+        if key in _ABBREVIATIONS:
+            return _ABBREVIATIONS[key], key == "de"
+    return _ABBREV_EN | _ABBREV_DE, True
+
+
+def _is_boundary(buf: str, m: "re.Match[str]", abbrevs: FrozenSet[str], ordinals: bool) -> bool:
+    if m.group(1) is None:
+        return True  # paragraph break
+    nxt = buf[m.end()]
+    if nxt.islower():
+        return False  # "z.B. das", "etc. and so on"
+    punct = m.group(1)
+    if not punct.startswith(".") or punct.startswith("..."):
+        return True
+    start = m.start(1)
+    lo = max(0, start - _MAX_WORD)  # bounded: never rescan the buffer per candidate
+    word_start = max(lo, buf.rfind(" ", lo, start) + 1, buf.rfind("\n", lo, start) + 1,
+                     buf.rfind("\t", lo, start) + 1)
+    word = buf[word_start:start].lstrip("\"'„“«»([").lower()
+    if not word:
+        return True
+    if len(word) == 1 and word.isalpha():
+        return False  # initials: "J. R. R. Tolkien"
+    if word.isdigit() and (nxt.isdigit() or (ordinals and len(word) <= 2)):
+        return False  # "3. 4." lists / dates, German ordinals "am 3. Oktober"
+    return word not in abbrevs
+
+
+def _pending_start(buf: str, lo: int) -> int:
+    """Start of the tail of buf (not before lo) where a sentence end may still be completed."""
+    i = len(buf)
+    while i > lo and (buf[i - 1] in _PENDING or buf[i - 1].isspace()):
+        i -= 1
+    return i
+
+
+def iter_sentences(
+    text: Union[str, Iterable[str]],
+    *,
+    lang: Optional[str] = None,
+    max_buffer: int = 20000,
+) -> Iterator[str]:
+    """Yield whitespace-normalized sentences from a string or stream of pieces."""
+    abbrevs, ordinals = _lang_rules(lang)
+    pieces = [text] if isinstance(text, str) else text
+    buf = ""
+    scan = 0  # buf[:scan] was searched already and cannot start a sentence end
+
+    for piece in pieces:
+        if not piece:
+            continue
+        buf += piece
+        last = 0
+        for m in _SENTENCE_END.finditer(buf, scan):
+            if _is_boundary(buf, m, abbrevs, ordinals):
+                end = m.end(1) if m.group(1) is not None else m.start()
+                sentence = _WS.sub(" ", buf[last:end]).strip()
+                if sentence:
+                    yield sentence
+                last = m.end()
+        if last:
+            buf = buf[last:]
+        # Only the trailing punctuation/whitespace can still become a boundary
+        # once more text arrives; everything before it is not searched again.
+        scan = _pending_start(buf, max(0, scan - last))
+
+        # No boundary in sight (e.g. text without punctuation): cut at whitespace
+        # to keep memory bounded.
+        while len(buf) > max_buffer:
+            cut = buf.rfind(" ", 0, max_buffer)
+            cut = cut if cut > 0 else max_buffer
+            head = _WS.sub(" ", buf[:cut]).strip()
+            if head:
+                yield head
+            buf = buf[cut:]
+            scan = max(0, scan - cut)
+
+    tail = _WS.sub(" ", buf).strip()
+    if tail:
+        yield tail
+
+
+def _hard_cut(text: str, max_chars: int) -> Iterator[str]:
+    for i in range(0, len(text), max_chars):
+        yield text[i : i + max_chars]
+
+
+def _split_words(text: str, max_chars: int) -> Iterator[str]:
+    yield from _pack(_WS.split(text), max_chars, _hard_cut)
+
+
+def _split_clauses(text: str, max_chars: int) -> Iterator[str]:
+    yield from _pack([p for p in _CLAUSE_END.split(text) if p], max_chars, _split_words)
+
+
+def _pack(
+    parts: Iterable[str],
+    max_chars: int,
+    split_long: Callable[[str, int], Iterator[str]],
+) -> Iterator[str]:
+    """Greedily join parts with spaces; parts longer than max_chars go to split_long."""
+    cur: List[str] = []
+    size = 0
+    for part in parts:
+        if len(part) > max_chars:
+            if cur:
+                yield " ".join(cur)
+                cur, size = [], 0
+            yield from split_long(part, max_chars)
+            continue
+        if cur and size + 1 + len(part) > max_chars:
+            yield " ".join(cur)
+            cur, size = [], 0
+        size += len(part) + (1 if cur else 0)
+        cur.append(part)
+    if cur:
+        yield " ".join(cur)
+
+
+def iter_segments(
+    text: Union[str, Iterable[str]],
+    max_chars: int = DEFAULT_MAX_CHARS,
+    *,
+    lang: Optional[str] = None,
+) -> Iterator[str]:
+    """
+    Yield chunks of at most ``max_chars`` characters that end on sentence
+    boundaries whenever possible. Lazy: only one sentence plus the chunk being
+    built are held in memory.
+    """
+    if max_chars < 1:
+        raise ValueError("max_chars must be positive")
+    yield from _pack(iter_sentences(text, lang=lang), max_chars, _split_clauses)
+
+
+def segment(
+    text: Union[str, Iterable[str]],
+    max_chars: int = DEFAULT_MAX_CHARS,
+    *,
+    lang: Optional[str] = None,
+) -> List[str]:
+    """List version of iter_segments()."""
+    return list(iter_segments(text, max_chars, lang=lang))
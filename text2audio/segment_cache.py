@@ -0,0 +1,112 @@
+# segment_cache.py
+"""
+Sentence-level audio cache.
+
+The result cache only helps when the whole text is unchanged. Here text is
+split into sentences (paragraph breaks count as boundaries), and each
+sentence's audio is stored under a key of its normalized text plus backend,
+language and voice. synthesize() looks every sentence up, synthesizes only
+the missing ones, each distinct sentence once, and joins the cached audio in
+text order with TEXT2AUDIO_SEGMENT_PAUSE_MS of silence between sentences.
+Editing a few words of a long text then costs the sentences that changed.
+
+It is opt-in (``sentence_cache=True`` or TEXT2AUDIO_SEGMENT_CACHE=1) and
+meant for the edit-and-re-synthesize loop of the API and web UI. Chunk
+workers (parallel.py) never use it: their chunks already run concurrently,
+and a pool of sentence threads inside each would oversubscribe the machine.
+If the sentences cannot be joined because their formats differ (e.g. some
+were written by a fallback path), synthesize() raises FormatMismatch and the
+caller synthesizes the text in one piece.
+
+Entries are small native files (WAV for Piper/pyttsx3, MP3 for gTTS) in a
+ResultCache: atomic writes, shared between processes, LRU eviction within a
+byte budget.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from text2audio import metrics
+from text2audio.result_cache import DEFAULT_CACHE_DIR, ResultCache, cache_key, normalize_text
+from text2audio.segment import iter_sentences
+
+ENABLED = os.getenv("TEXT2AUDIO_SEGMENT_CACHE", "0").lower() in ("1", "true", "yes", "on")
+DEFAULT_MAX_MB = float(os.getenv("TEXT2AUDIO_SEGMENT_CACHE_MB", "1024"))
+PAUSE_MS = max(0, int(os.getenv("TEXT2AUDIO_SEGMENT_PAUSE_MS", "200")))
+
+SEGMENTS = ResultCache(DEFAULT_CACHE_DIR / "segments", int(DEFAULT_MAX_MB * 1024 * 1024), enabled=ENABLED)
+
+
+def enabled(cache: Optional[bool] = None) -> bool:
+    return SEGMENTS.use(cache)
+
+
+def split(text: str, lang: Optional[str] = None) -> List[str]:
+    """The units audio is cached by: whitespace-normalized sentences."""
+    return list(iter_sentences(text, lang=lang))
+
+
+def _keys(units: List[str], voice_key: str) -> List[str]:
+    return [
+        hashlib.sha256(f"{voice_key}:{normalize_text(u)}".encode("utf-8")).hexdigest() for u in units
+    ]
+
+
+def synthesize(
+    units: List[str],
+    out: Union[str, Path],
+    synth: Callable[[str, Path], Path],
+    *,
+    backend: str,
+    lang: Optional[str],
+    model_path: Optional[Union[str, Path]] = None,
+    workers: int = 1,
+) -> Tuple[Path, int]:
+    """
+    Write the audio of units, joined in order with PAUSE_MS of silence, to
+    out (.wav or .mp3, the backend's native format). ``synth(text, path)``
+    synthesizes one unit; up to ``workers`` missing units run at once.
+    Returns (out, characters actually synthesized). Raises FormatMismatch
+    (from audio.py) if the units' audio formats differ.
+    """
+    from text2audio.audio import concat_writer
+
+    out = Path(out)
+    suffix = out.suffix.lower()
+    # One model lookup for the whole text; units only add their own text.
+    keys = _keys(units, cache_key("", backend, lang, f"segment{suffix}", model_path))
+    todo: Dict[str, str] = {}
+    for key, unit in zip(keys, units):
+        todo.setdefault(key, unit)  # repeated units are looked up and synthesized once
+
+    with tempfile.TemporaryDirectory(prefix="tts_segments_") as tmp:
+        # Hits are linked into tmp, so eviction by another process cannot pull them away mid-join.
+        files = {key: Path(tmp) / f"{key}{suffix}" for key in todo}
+        missing = [key for key in todo if SEGMENTS.get(key, files[key], link=True) is None]
+        metrics.SEGMENT_CACHE.inc(len(todo) - len(missing), result="hit")
+        metrics.SEGMENT_CACHE.inc(len(missing), result="miss")
+
+        def _run(key: str) -> None:
+            synth(todo[key], files[key])
+            try:
+                SEGMENTS.put(key, files[key])
+            except OSError:
+                pass  # a full or read-only cache must not fail synthesis
+
+        if missing:
+            pool = ThreadPoolExecutor(max_workers=max(1, min(workers, len(missing))),
+                                      thread_name_prefix="tts-segment")
+            try:
+                for f in [pool.submit(_run, key) for key in missing]:
+                    f.result()
+            finally:
+                pool.shutdown(cancel_futures=True)  # after a failure, don't start the rest
+
+        with metrics.timed("concat"), concat_writer(out, pause_ms=PAUSE_MS) as writer:
+            for key in keys:
+                writer.append(files[key])
+    return out, sum(len(todo[key]) for key in missing)
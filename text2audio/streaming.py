@@ -0,0 +1,104 @@
+# streaming.py
+"""
+Incremental Piper synthesis for streaming responses.
+
+A producer thread synthesizes segment by segment and hands PCM to the
+consumer through a small bounded queue. When the consumer (an HTTP response
+writing to a slow client) stops pulling, the queue fills up and synthesis
+pauses, so at most ``queue_size`` chunks are ever buffered. Closing the
+generator (client disconnect) stops the producer.
+"""
+from __future__ import annotations
+import queue
+import threading
+from pathlib import Path
+from typing import Any, Iterator, Optional, Tuple, Union
+
+from text2audio.audio import wav_header
+from text2audio.segment import iter_segments
+
+_DONE = object()
+
+
+def _sample_rate(voice: Any) -> int:
+    return int(voice.config.sample_rate)
+
+
+def iter_piper_pcm(voice: Any, text: str) -> Iterator[bytes]:
+    """16-bit mono PCM for text, one piece per sentence (old and new Piper APIs)."""
+    if hasattr(voice, "synthesize_stream_raw"):  # piper-tts < 1.3
+        yield from voice.synthesize_stream_raw(text)
+        return
+    for chunk in voice.synthesize(text):
+        yield chunk.audio_int16_bytes
+
+
+def stream_piper(
+    text: str,
+    model: Union[str, Path],
+    *,
+    lang: Optional[str] = None,
+    segment_chars: int = 400,
+    container: str = "wav",
+    queue_size: int = 2,
+) -> Tuple[int, Iterator[bytes]]:
+    """
+    Return (sample_rate, byte iterator). With container="wav" the iterator
+    starts with a streaming WAV header; with "pcm" it yields raw s16le mono.
+
+    The model is resolved and loaded before returning, so configuration
+    errors surface before any response bytes are sent.
+    """
+    from text2audio.backends import resolve_piper_model
+    from text2audio.voice_cache import get_voice
+
+    voice = get_voice(resolve_piper_model(model))
+    rate = _sample_rate(voice)
+    return rate, _stream(voice, text, rate, lang, segment_chars, container, queue_size)
+
+
+def _stream(
+    voice: Any,
+    text: str,
+    rate: int,
+    lang: Optional[str],
+    segment_chars: int,
+    container: str,
+    queue_size: int,
+) -> Iterator[bytes]:
+    q: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+    stop = threading.Event()
+
+    def _put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.25)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce() -> None:
+        try:
+            for seg in iter_segments(text, segment_chars, lang=lang):
+                for pcm in iter_piper_pcm(voice, seg):
+                    if not _put(pcm):
+                        return
+            _put(_DONE)
+        except BaseException as e:  # hand the error to the consumer
+            _put(e)
+
+    worker = threading.Thread(target=_produce, name="tts-stream", daemon=True)
+    worker.start()
+    try:
+        if container == "wav":
+            yield wav_header(rate)
+        while True:
+            item = q.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
@@ -0,0 +1,149 @@
+# voice_cache.py
+from __future__ import annotations
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from text2audio import metrics
+
+# Defaults can be tuned per deployment without code changes.
+DEFAULT_MAX_VOICES = int(os.getenv("TEXT2AUDIO_VOICE_CACHE_SIZE", "4"))
+DEFAULT_MAX_MB = float(os.getenv("TEXT2AUDIO_VOICE_CACHE_MB", "0"))  # 0 = no memory budget
+
+Key = Tuple[str, int]
+
+
+def _load_piper_voice(model_path: Path) -> Any:
+    from piper import PiperVoice
+    return PiperVoice.load(model_path)
+
+
+class VoiceCache:
+    """
+    Bounded, thread-safe LRU of loaded voices.
+
+    Entries are keyed by (resolved model path, mtime_ns), so replacing a model
+    file on disk transparently invalidates the old session. The memory budget
+    is estimated from the ONNX file size, which is a good proxy for the size
+    of the inference session it produces.
+    """
+
+    def __init__(
+        self,
+        max_voices: int = DEFAULT_MAX_VOICES,
+        max_bytes: int = int(DEFAULT_MAX_MB * 1024 * 1024),
+        loader: Callable[[Path], Any] = _load_piper_voice,
+    ):
+        self.max_voices = max(1, max_voices)
+        self.max_bytes = max(0, max_bytes)
+        self._loader = loader
+        self._entries: "OrderedDict[Key, Tuple[Any, int]]" = OrderedDict()
+        self._loading: Dict[Key, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(model_path: Union[str, Path]) -> Tuple[Key, Path, int]:
+        path = Path(model_path).expanduser().resolve()
+        st = path.stat()
+        return (str(path), st.st_mtime_ns), path, st.st_size
+
+    def get(self, model_path: Union[str, Path]) -> Any:
+        """Return a loaded voice for model_path, loading it on a miss."""
+        key, path, size = self._key(model_path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            # One loader per key; concurrent callers wait instead of loading twice.
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                self.misses += 1
+
+            try:
+                with metrics.timed("voice_load"):
+                    voice = self._loader(path)
+            except BaseException:
+                with self._lock:
+                    self._loading.pop(key, None)
+                raise
+
+            with self._lock:
+                # Drop stale entries for an older version of the same file.
+                for k in [k for k in self._entries if k[0] == key[0] and k != key]:
+                    del self._entries[k]
+                self._entries[key] = (voice, size)
+                self._evict()
+                # Only now may a new caller miss without finding the loading lock:
+                # the entry is visible in the same critical section.
+                self._loading.pop(key, None)
+            return voice
+
+    def _evict(self) -> None:
+        # Caller holds self._lock. The newest entry is always kept.
+        def over_budget() -> bool:
+            if len(self._entries) > self.max_voices:
+                return True
+            if self.max_bytes and sum(s for _, s in self._entries.values()) > self.max_bytes:
+                return True
+            return False
+
+        while len(self._entries) > 1 and over_budget():
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, model_path: Optional[Union[str, Path]] = None) -> int:
+        """Drop one model (all its versions) or, without argument, everything. Returns count."""
+        with self._lock:
+            if model_path is None:
+                n = len(self._entries)
+                self._entries.clear()
+                return n
+            target = str(Path(model_path).expanduser().resolve())
+            stale = [k for k in self._entries if k[0] == target]
+            for k in stale:
+                del self._entries[k]
+            return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "voices": [k[0] for k in self._entries],
+                "size": len(self._entries),
+                "bytes": sum(s for _, s in self._entries.values()),
+                "max_voices": self.max_voices,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Process-wide cache shared by API, UI and CLI.
+VOICES = VoiceCache()
+
+
+def get_voice(model_path: Union[str, Path]) -> Any:
+    return VOICES.get(model_path)
+
+
+def invalidate(model_path: Optional[Union[str, Path]] = None) -> int:
+    return VOICES.invalidate(model_path)
+
+
+def stats() -> Dict[str, Any]:
+    return VOICES.stats()
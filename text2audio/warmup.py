@@ -0,0 +1,131 @@
+# warmup.py
+"""
+Startup warm-up: download/load configured Piper voices, initialize the
+engine of every pyttsx3 worker process, and run one short synthesis per
+voice/engine so lazy ONNX/allocator setup happens before the first user
+request. Piper chunks run on threads of this process (parallel.py), so the
+voices warmed here are the ones they use. Readiness is reported only once
+every voice and every pyttsx3 worker has finished.
+"""
+from __future__ import annotations
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+PRELOAD_VOICES: List[str] = [
+    v.strip() for v in os.getenv("TEXT2AUDIO_PRELOAD_VOICES", "").split(",") if v.strip()
+]
+WARMUP_PYTTSX3 = os.getenv("TEXT2AUDIO_WARMUP_PYTTSX3", "1").lower() not in ("0", "false", "no", "off")
+WARMUP_PHRASE = os.getenv("TEXT2AUDIO_WARMUP_PHRASE", "Hello.")
+
+
+class Readiness:
+    """Thread-safe record of warm-up progress, rendered by the /ready endpoint."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.voices: Dict[str, Dict[str, Any]] = {}
+        self.engines: Dict[str, Dict[str, Any]] = {}
+
+    def set(self, group: str, name: str, **info: Any) -> None:
+        with self._lock:
+            getattr(self, group).setdefault(name, {}).update(info)
+
+    @property
+    def ready(self) -> bool:
+        # Engines with a fallback (pyttsx3 → espeak CLI) don't block readiness;
+        # a configured voice that failed to load does.
+        with self._lock:
+            return self.finished is not None and all(v.get("ready") for v in self.voices.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        ready = self.ready
+        with self._lock:
+            return {
+                "ready": ready,
+                "started": self.started,
+                "finished": self.finished,
+                "voices": {k: dict(v) for k, v in self.voices.items()},
+                "engines": {k: dict(v) for k, v in self.engines.items()},
+            }
+
+
+READINESS = Readiness()
+
+
+def _warm_voice(key: str, phrase: str, state: Readiness) -> None:
+    from text2audio.backends import resolve_piper_model
+    from text2audio.streaming import iter_piper_pcm
+    from text2audio.voice_cache import get_voice
+
+    state.set("voices", key, ready=False, stage="download")
+    try:
+        t0 = time.perf_counter()
+        path = resolve_piper_model(key)  # downloads short keys on first use
+        t1 = time.perf_counter()
+        state.set("voices", key, stage="load", path=str(path), download_s=round(t1 - t0, 3))
+        voice = get_voice(path)
+        t2 = time.perf_counter()
+        state.set("voices", key, stage="warmup", load_s=round(t2 - t1, 3))
+        for _ in iter_piper_pcm(voice, phrase):
+            pass
+        t3 = time.perf_counter()
+        state.set("voices", key, ready=True, stage="ready", warmup_s=round(t3 - t2, 3))
+    except Exception as e:
+        state.set("voices", key, ready=False, stage="failed", error=str(e))
+
+
+def _warm_pyttsx3(phrase: str, state: Readiness) -> None:
+    from text2audio.backends import tts_pyttsx3
+    from text2audio.pyttsx3_pool import get_pool
+
+    state.set("engines", "pyttsx3", ready=False)
+    try:
+        t0 = time.perf_counter()
+        with tempfile.TemporaryDirectory(prefix="tts_warmup_") as tmp:
+            # Every pool worker owns an engine: initialize all of them, not just
+            # the one a single request would land on.
+            pool = get_pool()
+            errors = pool.warm_up(phrase, tmp)
+            failed = [e for e in errors if e]
+            if failed:
+                # Requests will fall back to espeak; make sure that path works.
+                tts_pyttsx3(phrase, lang=None, out=Path(tmp) / "warmup.wav")
+        info: Dict[str, Any] = {"workers": pool.size, "warm_workers": len(errors) - len(failed)}
+        if failed:
+            info["error"] = failed[0]
+        state.set("engines", "pyttsx3", ready=True, warmup_s=round(time.perf_counter() - t0, 3), **info)
+    except Exception as e:
+        state.set("engines", "pyttsx3", ready=False, error=str(e))
+
+
+def warm_up(
+    voices: Optional[List[str]] = None,
+    *,
+    pyttsx3: bool = WARMUP_PYTTSX3,
+    phrase: str = WARMUP_PHRASE,
+    state: Readiness = READINESS,
+) -> Readiness:
+    """Run the warm-up synchronously, recording timings in state."""
+    voices = PRELOAD_VOICES if voices is None else voices
+    state.started = time.time()
+    for key in voices:
+        state.set("voices", key, ready=False, stage="pending")
+    for key in voices:
+        _warm_voice(key, phrase, state)
+    if pyttsx3:
+        _warm_pyttsx3(phrase, state)
+    state.finished = time.time()
+    return state
+
+
+def start_background(**kwargs: Any) -> threading.Thread:
+    """Run warm_up() in a daemon thread so the server can answer /health meanwhile."""
+    t = threading.Thread(target=warm_up, kwargs=kwargs, name="tts-warmup", daemon=True)
+    t.start()
+    return t
@@ -1,16 +1,14 @@
 # app.py (Streamlit UI) — saves outputs to OUTPUT_DIR (default: /data)
 import os
 import sys
-import tempfile
 from pathlib import Path
 import streamlit as st
 
-from text2audio.core import synthesize
+# Streamlit re-runs this script on every interaction: only the model table is
+# needed to draw the page, the synthesis and extraction modules are imported
+# where they are used.
 from text2audio.model_repo import MODELS, ensure_model
 
-# File → Text helpers (optional step)
-from file_to_text import extract_text_from_bytes, has_ocr_stack
-
 # ---------- Shared output directory ----------
 OUTPUT_DIR = Path(os.getenv("OUTPUT_DIR", "/data"))
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -39,6 +37,8 @@ with st.expander("1) Optional: Convert a file to text (click to open)"):
     )
 
     if uploaded is not None:
+        from text2audio.file_to_text import extract_text_from_bytes, has_ocr_stack
+
         file_bytes = uploaded.read()
         uploaded.seek(0)
 
@@ -95,20 +95,34 @@ if backend_label.startswith("Piper"):
 
 filename = st.text_input(
     "Output filename",
-    value="speech.wav" if chosen in ("piper", "pyttsx3") else "speech.mp3"
+    value="speech.wav" if chosen in ("piper", "pyttsx3") else "speech.mp3",
+    help="The extension picks the format: .wav, .mp3, .ogg/.opus (Opus) or .flac.",
 )
 
 chunking = st.checkbox(
     "Split text into ~1200-character chunks (recommended for very long texts)",
     value=False
 )
+use_cache = st.checkbox("Reuse previously synthesized audio (cache)", value=True)
+sentence_cache = st.checkbox(
+    "After editing, re-synthesize only the changed sentences",
+    value=False,
+    disabled=not use_cache,
+    help="Keeps audio per sentence and joins it with a short pause. Not used for chunked output.",
+)
+as_zip = False
+pause_ms = 0
+if chunking:
+    pause_ms = st.number_input("Pause between chunks (ms)", min_value=0, max_value=5000, value=0, step=50)
+    as_zip = st.checkbox("Download chunks as separate files (ZIP) instead of one audio file", value=False)
 
-def _chunks(s, n=1200):
-    s = s.strip()
-    for i in range(0, len(s), n):
-        yield s[i:i+n]
+# Sentence-splitting hint: Piper voices carry their language in the file name.
+segment_lang = MODELS[piper_model_key][1][:2] if piper_model_key in MODELS else None
 
 if st.button("Synthesize") and text.strip():
+    from text2audio.core import synthesize
+    from text2audio.chunked import synthesize_chunked
+
     try:
         # Ensure Piper model exists (with a small progress bar)
         if chosen == "piper":
@@ -119,30 +133,30 @@ if st.button("Synthesize") and text.strip():
             prog.empty()
 
         if chunking and len(text) > 1500:
-            import zipfile
-
-            tmpdir = Path(tempfile.mkdtemp(prefix="tts_chunks_"))
-            out_zip = (OUTPUT_DIR / filename).with_suffix(".zip")
-            paths = []
-
-            for idx, part in enumerate(_chunks(text), start=1):
-                part_name = Path(filename).with_stem(Path(filename).stem + f"_{idx}")
-                part_out = tmpdir / part_name.name
-                out_path = synthesize(
-                    part,
-                    backend=chosen,
-                    out=str(part_out),  # keep chunk files in tmpdir first
-                    piper_model=piper_model_key if chosen == "piper" else None,
-                )
-                paths.append(out_path)
-
-            # Pack chunks into ZIP under OUTPUT_DIR
-            with zipfile.ZipFile(out_zip, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-                for p in paths:
-                    zf.write(p, arcname=p.name)
-
-            st.success(f"Saved {len(paths)} audio chunks → {out_zip}")
-            st.download_button("Download ZIP", data=out_zip.read_bytes(), file_name=out_zip.name)
+            bar = st.progress(0.0, text="Synthesizing chunks…")
+            result = synthesize_chunked(
+                text,
+                OUTPUT_DIR / filename,
+                backend=chosen,
+                lang=segment_lang or "en",
+                piper_model=piper_model_key if chosen == "piper" else None,
+                chunk_size=1200,
+                mode="zip" if as_zip else "concat",
+                pause_ms=pause_ms,
+                cache=use_cache,
+                on_progress=lambda done, total: bar.progress(done / total, text=f"Chunk {done}/{total}"),
+            )
+            bar.empty()
+
+            if as_zip:
+                out_zip = result["zip"]
+                st.success(f"Saved {result['chunks']} audio chunks → {out_zip}")
+                st.download_button("Download ZIP", data=out_zip.read_bytes(), file_name=out_zip.name)
+            else:
+                out_path = result["output"]
+                st.success(f"Joined {result['chunks']} chunks → {out_path}")
+                st.audio(str(out_path))
+                st.download_button("Download audio", data=out_path.read_bytes(), file_name=out_path.name)
 
         else:
             # Save single file directly to OUTPUT_DIR
@@ -150,8 +164,11 @@ if st.button("Synthesize") and text.strip():
             out_path = synthesize(
                 text,
                 backend=chosen,
+                lang=segment_lang or "en",
                 out=str(target),
                 piper_model=piper_model_key if chosen == "piper" else None,
+                cache=use_cache,
+                sentence_cache=sentence_cache,
             )
 
             if not Path(out_path).exists():